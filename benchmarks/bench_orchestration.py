@@ -0,0 +1,222 @@
+"""
+Benchmark of the time spent by ScoreCLI around the external tools: path discovery,
+normalisation, process spawning, parsing, and saving of the tables.
+The tools are replaced by instant fake binaries (given with BIN_PATHS), so it runs without
+the real tools and nearly all the time measured is overhead of the framework.
+Each variant (number of processes, batching, normalisation) runs in its own process, and is
+run several times to see the effect of the caches.
+
+Example:
+    python -m benchmarks.bench_orchestration --n_decoys 200 --out orchestration.json
+"""
+
+import argparse
+import os
+import resource
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yaml  # type: ignore
+from loguru import logger
+
+from benchmarks.bench_scores import get_metadata, run_isolated, save_benchmark
+from benchmarks.decoys import generate_decoy_set
+from benchmarks.fake_tools import FAKE_SCORES, write_fake_tools
+
+# Directory of the fake binaries, decoys and outputs
+ORCHESTRATION_DIR = os.path.join("tmp", "benchmarks", "orchestration")
+# Variants of the run: maximum number of processes per tool, batching and normalisation
+VARIANTS: Dict[str, Dict] = {
+    "serial": {"max_processes": 1, "batch": False, "normalise": False},
+    "parallel": {"max_processes": None, "batch": False, "normalise": False},
+    "parallel_batch": {"max_processes": None, "batch": True, "normalise": False},
+    "parallel_batch_normalise": {"max_processes": None, "batch": True, "normalise": True},
+}
+
+
+def write_config(
+    config_path: str,
+    pred_dir: str,
+    native_path: str,
+    bin_paths: Dict,
+    out_dir: str,
+    variant: Dict,
+    scores: List[str],
+) -> str:
+    """
+    Write the config.yaml of a variant.
+    :return: the path to the config
+    """
+    config = {
+        "SCORE_HP": {
+            "PRED_PATH": pred_dir,
+            "NATIVE_PATH": native_path,
+            "RESULT_PATH": os.path.join(out_dir, "results.csv"),
+            "TIME_PATH": os.path.join(out_dir, "times.csv"),
+            "LOG_PATH": os.path.join(out_dir, "log.log"),
+            "NORMALISATION": variant["normalise"],
+            "MAX_PROCESSES": variant["max_processes"],
+            "ALL_SCORES": scores,
+        },
+        "BIN_PATHS": bin_paths,
+    }
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f)
+    return config_path
+
+
+def run_cli(config_path: str, batch: bool = True) -> Dict:
+    """
+    Run ScoreCLI from the config and measure it.
+    :param config_path: path to the config.yaml
+    :param batch: whether the tools receive several predictions per process
+    :return: the measures of the run
+    """
+    from src.rnadvisor_cli import ScoreCLI
+    from src.tracing import TRACER
+
+    start = time.perf_counter()
+    score_cli = ScoreCLI(**ScoreCLI.convert_cli_args(config_path))
+    init_time = time.perf_counter() - start
+    if not batch:
+        for score_fn in score_cli.all_scores:
+            if hasattr(score_fn, "batch_size"):
+                score_fn.batch_size = 1  # type: ignore
+    score_cli.compute_scores()
+    wall = time.perf_counter() - start
+    stages: Dict[str, float] = {}
+    child_cpu = 0.0
+    for stats in TRACER.get_summary():
+        stages[stats["stage"]] = stages.get(stats["stage"], 0.0) + stats["wall"]
+        child_cpu += stats["child_cpu"]
+    scores = pd.read_csv(score_cli.result_path, index_col=0)
+    n_decoys = len(score_cli.pred_path)
+    return {
+        "n_decoys": n_decoys,
+        "n_scored": int(scores.notna().any(axis=1).sum()),
+        "wall": wall,
+        "init": init_time,
+        "throughput": n_decoys / wall if wall > 0 else float("inf"),
+        "overhead_per_decoy": wall / n_decoys if n_decoys > 0 else 0.0,
+        "stages": stages,
+        "child_cpu": child_cpu,
+        "latency": {},
+    }
+
+
+def run_variant(config_path: str, batch: bool, repeats: int) -> Dict:
+    """
+    Run ScoreCLI several times in the same process. Called in a new process.
+    :return: the measures of each run, and the peak memory of the process
+    """
+    logger.remove()
+    try:
+        runs = [run_cli(config_path, batch) for _ in range(repeats)]
+    except Exception as e:
+        return {"status": "error", "error": f"{e.__class__.__name__}: {e}"}
+    return {
+        "status": "ok",
+        "runs": runs,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_child_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def run_benchmark(
+    n_decoys: int = 100,
+    n_residues: Optional[int] = None,
+    variants: Optional[List[str]] = None,
+    repeats: int = 2,
+    scores: Optional[List[str]] = None,
+    timeout: Optional[float] = None,
+    out_dir: str = ORCHESTRATION_DIR,
+) -> Dict:
+    """
+    Run ScoreCLI with the fake tools for each variant.
+    :param n_decoys: number of decoys
+    :param n_residues: number of nucleotides of the decoys. None to use the test structure.
+    :param variants: names of the variants in VARIANTS. Default to all of them.
+    :param repeats: number of runs of each variant in the same process. The first one is cold
+            (no cache), the next ones reuse the caches of the process.
+    :param scores: names of the scores to compute. Default to all the ones with a fake tool.
+    :param timeout: maximum time (in seconds) of a variant
+    :param out_dir: directory of the fake binaries, decoys and outputs
+    :return: the metadata and the measures of each run, in the format of `bench_scores`
+    """
+    bin_paths = write_fake_tools(os.path.join(out_dir, "bin"))
+    native_path, decoy_paths = generate_decoy_set(
+        os.path.join(out_dir, f"decoys_{n_residues or 'template'}_{n_decoys}"),
+        n_decoys,
+        n_residues,
+    )
+    results = []
+    for name in variants if variants is not None else list(VARIANTS):
+        variant = VARIANTS[name]
+        config_path = write_config(
+            os.path.join(out_dir, name, "config.yaml"),
+            os.path.dirname(decoy_paths[0]),
+            native_path,
+            bin_paths,
+            os.path.join(out_dir, name),
+            variant,
+            scores if scores is not None else FAKE_SCORES,
+        )
+        result = run_isolated(run_variant, (config_path, variant["batch"], repeats), timeout)
+        case = f"{n_decoys}_{name}"
+        if result["status"] != "ok":
+            logger.info(f"{case} : {result['status'].upper()} {result.get('error', '')}")
+            results.append({"case": case, "metric": "orchestration", **result})
+            continue
+        for index, run in enumerate(result["runs"]):
+            logger.info(
+                f"{case} RUN {index} : {round(run['wall'], 3)}s, "
+                f"{round(run['overhead_per_decoy'] * 1000, 3)}ms per decoy"
+            )
+            memory = {key: result[key] for key in ["peak_rss_kb", "peak_child_rss_kb"]}
+            results.append(
+                {"case": case, "metric": f"run_{index}", "status": "ok", **run, **memory}
+            )
+    metadata = {**get_metadata("orchestration"), "n_decoys": n_decoys, "n_residues": n_residues}
+    return {"metadata": metadata, "results": results}
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n_decoys", type=int, default=100, help="Number of decoys.")
+    parser.add_argument(
+        "--n_residues",
+        type=int,
+        default=None,
+        help="Number of nucleotides of the decoys. Default to the test structure.",
+    )
+    parser.add_argument(
+        "--variants",
+        type=str,
+        default=None,
+        help=f"Variants separated by a comma, among {','.join(VARIANTS)}. Default to all.",
+    )
+    parser.add_argument("--repeats", type=int, default=2, help="Number of runs of each variant.")
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Maximum time (in seconds) of a variant."
+    )
+    parser.add_argument(
+        "--out", type=str, default=None, help="Path to the .json file of the results."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    benchmark = run_benchmark(
+        args.n_decoys,
+        args.n_residues,
+        args.variants.split(",") if args.variants is not None else None,
+        args.repeats,
+        timeout=args.timeout,
+    )
+    out_path = args.out or os.path.join(
+        "benchmarks", "results", f"orchestration_{benchmark['metadata']['commit']}.json"
+    )
+    save_benchmark(benchmark, out_path)
@@ -0,0 +1,249 @@
+"""
+Benchmark of the throughput, latency and peak memory of each metric on synthetic decoy sets.
+Each metric is run in its own process, so the peak memory is the one of the metric alone.
+
+Example:
+    python -m benchmarks.bench_scores --suite default --out benchmarks/baselines/default.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.decoys import generate_decoy_set
+
+# Decoy sets of each suite: (number of nucleotides, number of decoys). A number of nucleotides
+# of None means that the decoys are perturbations of the template structure.
+SUITES: Dict[str, List] = {
+    "quick": [(None, 10), (50, 10)],
+    "default": [(None, 100), (50, 1000), (500, 100), (3000, 10)],
+    "full": [(None, 1000), (50, 10000), (500, 1000), (3000, 100)],
+}
+# Directory where the decoy sets are generated (once)
+DECOYS_DIR = os.path.join("tmp", "benchmarks")
+
+
+def get_case_name(n_residues: Optional[int], n_decoys: int) -> str:
+    """Return the name of a decoy set."""
+    source = "template" if n_residues is None else f"{n_residues}nt"
+    return f"{source}_{n_decoys}"
+
+
+def get_latencies(times: Dict) -> List[float]:
+    """
+    Return the time spent for each decoy. The outputs of a metric computed together (like
+    GDT-TS and GDT-HA) share the same time, so the maximum is used.
+    :param times: the times returned by `compute`, for each prediction path
+    """
+    return [max(c_times.values()) for c_times in times.values() if len(c_times) > 0]
+
+
+def get_latency_stats(latencies: List[float]) -> Dict:
+    """Return the mean, median, 90th and 99th percentiles and maximum of the latencies."""
+    if len(latencies) == 0:
+        return {}
+    values = np.array(latencies)
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def run_metric(metric: str, native_path: str, decoy_paths: List[str], hp_params: Dict) -> Dict:
+    """
+    Compute a metric on all the decoys and measure it. Called in a new process.
+    :param metric: name of the metric in CONVERT_NAME_TO_SCORING_CLASS
+    :param native_path: path to the native structure
+    :param decoy_paths: paths to the decoys
+    :param hp_params: parameters given to `compute`
+    :return: the measures of the run
+    """
+    from src.tools import ToolNotFoundError
+    from src.tracing import TRACER
+
+    logger.remove()
+    try:
+        from src.enum import CONVERT_NAME_TO_SCORING_CLASS
+
+        score_fn = CONVERT_NAME_TO_SCORING_CLASS[metric]()
+        if hasattr(score_fn, "check_tools"):
+            score_fn.check_tools()
+    except (ToolNotFoundError, ImportError, OSError) as e:
+        return {"status": "unavailable", "error": str(e)}
+    TRACER.reset()
+    start = time.perf_counter()
+    try:
+        scores, times = score_fn.compute(decoy_paths, native_path, **hp_params)
+    except Exception as e:
+        return {"status": "error", "error": f"{e.__class__.__name__}: {e}"}
+    wall = time.perf_counter() - start
+    n_scored = sum(
+        any(isinstance(value, (int, float)) and not np.isnan(value) for value in c.values())
+        for c in scores.values()
+    )
+    return {
+        "status": "ok",
+        "n_decoys": len(decoy_paths),
+        "n_scored": int(n_scored),
+        "wall": wall,
+        "throughput": len(decoy_paths) / wall if wall > 0 else float("inf"),
+        "latency": get_latency_stats(get_latencies(times)),
+        "child_cpu": sum(stats["child_cpu"] for stats in TRACER.get_summary()),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_child_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def _run_in_child(connection, function: Callable, *args):
+    """Call the function and send its result to the parent process."""
+    connection.send(function(*args))
+    connection.close()
+
+
+def run_isolated(function: Callable, args: Tuple, timeout: Optional[float] = None) -> Dict:
+    """
+    Call the function in a new process, that is stopped after `timeout` seconds.
+    :param function: function (of a module) that returns a dictionary with a `status`
+    :param args: the arguments of the function
+    :param timeout: maximum time (in seconds) of the process
+    :return: the result of the function
+    """
+    context = multiprocessing.get_context("spawn")
+    parent_connection, child_connection = context.Pipe(duplex=False)
+    process = context.Process(target=_run_in_child, args=(child_connection, function, *args))
+    process.start()
+    child_connection.close()
+    if not parent_connection.poll(timeout):
+        process.terminate()
+        process.join()
+        return {"status": "timeout", "error": f"more than {timeout} seconds"}
+    try:
+        result = parent_connection.recv()
+    except EOFError:
+        process.join()
+        result = {"status": "error", "error": f"process exited with code {process.exitcode}"}
+    process.join()
+    return result
+
+
+def get_metadata(suite: str) -> Dict:
+    """Return the description of the machine and of the code that ran the benchmark."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "suite": suite,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmark(
+    suite: str = "quick",
+    metrics: Optional[List[str]] = None,
+    hp_params: Optional[Dict] = None,
+    timeout: Optional[float] = None,
+    decoys_dir: str = DECOYS_DIR,
+) -> Dict:
+    """
+    Run every metric on every decoy set of the suite.
+    :param suite: name of the suite in SUITES
+    :param metrics: names of the metrics. Default to all the metrics of
+            CONVERT_NAME_TO_SCORING_CLASS; the ones whose tools are missing are reported as
+            unavailable.
+    :param hp_params: parameters given to `compute`
+    :param timeout: maximum time (in seconds) of a metric on a decoy set
+    :param decoys_dir: directory where the decoy sets are generated
+    :return: the metadata of the run and the measures of each metric on each decoy set
+    """
+    if metrics is None:
+        from src.enum import CONVERT_NAME_TO_SCORING_CLASS
+
+        metrics = list(CONVERT_NAME_TO_SCORING_CLASS.keys())
+    results = []
+    for n_residues, n_decoys in SUITES[suite]:
+        case = get_case_name(n_residues, n_decoys)
+        native_path, decoy_paths = generate_decoy_set(
+            os.path.join(decoys_dir, case), n_decoys, n_residues
+        )
+        for metric in metrics:
+            result = run_isolated(
+                run_metric, (metric, native_path, decoy_paths, hp_params or {}), timeout
+            )
+            logger.info(
+                f"{case} {metric} : {result['status'].upper()} "
+                + (
+                    f"{round(result['throughput'], 2)} decoys/s"
+                    if result["status"] == "ok"
+                    else result.get("error", "")
+                )
+            )
+            results.append({"case": case, "metric": metric, **result})
+    return {"metadata": get_metadata(suite), "results": results}
+
+
+def save_benchmark(benchmark: Dict, out_path: str):
+    """Save the benchmark to a .json file (the baseline of later comparisons)."""
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(benchmark, f, indent=1)
+    logger.success(f"BENCHMARK SAVED AT {out_path}")
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--suite", type=str, default="quick", choices=list(SUITES), help="Decoy sets to use."
+    )
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        default=None,
+        help="Metrics to benchmark, separated by a comma. Default to all the metrics.",
+    )
+    parser.add_argument(
+        "--params", type=str, default="{}", help="Parameters given to the metrics (.json)."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Maximum time (in seconds) of a metric on a decoy set.",
+    )
+    parser.add_argument(
+        "--out", type=str, default=None, help="Path to the .json file of the results."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    benchmark = run_benchmark(
+        args.suite,
+        args.metrics.split(",") if args.metrics is not None else None,
+        json.loads(args.params),
+        args.timeout,
+    )
+    out_path = args.out or os.path.join(
+        "benchmarks", "results", f"{args.suite}_{benchmark['metadata']['commit']}.json"
+    )
+    save_benchmark(benchmark, out_path)
@@ -0,0 +1,103 @@
+"""
+Compare a benchmark to a baseline and report the regressions.
+It exits with an error code if a metric is slower, uses more memory, or doesn't run anymore.
+
+Example:
+    python -m benchmarks.compare benchmarks/baselines/default.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+# Default tolerances: relative loss of throughput, and relative increase of the latency and of
+# the peak memory, before a change is reported as a regression
+THROUGHPUT_TOLERANCE = 0.1
+LATENCY_TOLERANCE = 0.2
+MEMORY_TOLERANCE = 0.2
+
+
+def read_benchmark(path: str) -> Dict:
+    """Read a benchmark .json file and index its results by decoy set and metric."""
+    with open(path, "r") as f:
+        content = json.load(f)
+    return {(result["case"], result["metric"]): result for result in content["results"]}
+
+
+def compare_result(
+    baseline: Dict,
+    current: Dict,
+    throughput_tolerance: float = THROUGHPUT_TOLERANCE,
+    latency_tolerance: float = LATENCY_TOLERANCE,
+    memory_tolerance: float = MEMORY_TOLERANCE,
+) -> List[str]:
+    """
+    Compare the measures of a metric on a decoy set.
+    :param baseline: the measures of the baseline
+    :param current: the new measures
+    :return: the description of each regression (empty if there is none)
+    """
+    if baseline["status"] != "ok":
+        return []
+    if current["status"] != "ok":
+        return [f"status {current['status']} ({current.get('error', '')})"]
+    regressions = []
+    ratio = current["throughput"] / baseline["throughput"]
+    if ratio < 1 - throughput_tolerance:
+        regressions.append(f"throughput x{ratio:.2f}")
+    for key in ["p50", "p90"]:
+        before, after = baseline["latency"].get(key), current["latency"].get(key)
+        if before and after and after / before > 1 + latency_tolerance:
+            regressions.append(f"latency {key} x{after / before:.2f}")
+    for key in ["peak_rss_kb", "peak_child_rss_kb"]:
+        before, after = baseline.get(key), current.get(key)
+        if before and after and after / before > 1 + memory_tolerance:
+            regressions.append(f"{key} x{after / before:.2f}")
+    if current["n_scored"] < baseline["n_scored"]:
+        regressions.append(f"scored {current['n_scored']}/{baseline['n_scored']} decoys")
+    return regressions
+
+
+def compare_benchmarks(baseline_path: str, current_path: str, **tolerances) -> Dict:
+    """
+    Compare all the measures of two benchmarks. Only the decoy sets and metrics of both
+    benchmarks are compared.
+    :param baseline_path: the .json file of the baseline
+    :param current_path: the .json file of the new benchmark
+    :param tolerances: the tolerances given to `compare_result`
+    :return: the regressions of each decoy set and metric
+    """
+    baseline, current = read_benchmark(baseline_path), read_benchmark(current_path)
+    regressions = {}
+    for key in baseline.keys() & current.keys():
+        c_regressions = compare_result(baseline[key], current[key], **tolerances)
+        if len(c_regressions) > 0:
+            regressions[key] = c_regressions
+    return regressions
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", type=str, help="Path to the .json file of the baseline.")
+    parser.add_argument("current", type=str, help="Path to the .json file of the new benchmark.")
+    parser.add_argument("--throughput_tolerance", type=float, default=THROUGHPUT_TOLERANCE)
+    parser.add_argument("--latency_tolerance", type=float, default=LATENCY_TOLERANCE)
+    parser.add_argument("--memory_tolerance", type=float, default=MEMORY_TOLERANCE)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    all_regressions = compare_benchmarks(
+        args.baseline,
+        args.current,
+        throughput_tolerance=args.throughput_tolerance,
+        latency_tolerance=args.latency_tolerance,
+        memory_tolerance=args.memory_tolerance,
+    )
+    for (case, metric), c_regressions in sorted(all_regressions.items()):
+        print(f"REGRESSION {case} {metric} : {', '.join(c_regressions)}")
+    if len(all_regressions) > 0:
+        sys.exit(1)
+    print("NO REGRESSION")
@@ -0,0 +1,170 @@
+"""
+Generators of synthetic native structures and decoys for the benchmarks.
+The decoys are either perturbations of a real structure, or of a long chain built from its
+nucleotides.
+"""
+
+import math
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.score_abstract.score_abstract_potential import format_pdb_atoms, read_pdb_atoms
+
+# Structure used as template for the synthetic chains
+TEMPLATE_PATH = os.path.join("tests", "data", "structure_1.pdb")
+# Rise (in Angstrom) and twist (in degrees) between two nucleotides of an A-form helix
+HELIX_RISE, HELIX_TWIST = 2.81, 32.7
+# Radius (in Angstrom) of the helix followed by the centres of the nucleotides
+HELIX_RADIUS = 9.0
+# Number of nucleotides of each helical segment, and distance (in Angstrom) between segments
+SEGMENT_SIZE, SEGMENT_SPACING = 60, 25.0
+
+
+def write_pdb(
+    pdb_path: str,
+    coordinates: np.ndarray,
+    residue_names: List[str],
+    atom_names: List[str],
+    residue_indexes: np.ndarray,
+    chain: str = "A",
+):
+    """
+    Write the atoms to a .pdb file.
+    :param pdb_path: path to the .pdb file to write
+    :param coordinates: array of shape (n_atoms, 3)
+    :param residue_names: name of the residue of each atom
+    :param atom_names: name of each atom
+    :param residue_indexes: index (starting at 0) of the residue of each atom
+    :param chain: chain identifier
+    """
+    os.makedirs(os.path.dirname(pdb_path) or ".", exist_ok=True)
+    with open(pdb_path, "w") as f:
+        f.write(format_pdb_atoms(coordinates, residue_names, atom_names, residue_indexes, chain))
+
+
+def random_rotation(rng: np.random.Generator) -> np.ndarray:
+    """Return a random rotation matrix (from a uniform random quaternion)."""
+    q = rng.normal(size=4)
+    a, b, c, d = q / np.linalg.norm(q)
+    return np.array(
+        [
+            [a * a + b * b - c * c - d * d, 2 * (b * c - a * d), 2 * (b * d + a * c)],
+            [2 * (b * c + a * d), a * a - b * b + c * c - d * d, 2 * (c * d - a * b)],
+            [2 * (b * d - a * c), 2 * (c * d + a * b), a * a - b * b - c * c + d * d],
+        ]
+    )
+
+
+def perturb(
+    coordinates: np.ndarray,
+    residue_indexes: np.ndarray,
+    noise: float,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Return a decoy of a structure: each residue is moved as a block, then each atom is moved a
+    bit, and the whole structure is rotated and translated (so the metrics need to superpose).
+    :param coordinates: array of shape (n_atoms, 3)
+    :param residue_indexes: index of the residue of each atom
+    :param noise: standard deviation (in Angstrom) of the displacement of the residues
+    :param rng: the random generator
+    :return: the new coordinates
+    """
+    n_residues = int(residue_indexes.max()) + 1 if len(residue_indexes) > 0 else 0
+    residue_shift = rng.normal(scale=noise, size=(n_residues, 3))
+    atom_shift = rng.normal(scale=noise / 4, size=coordinates.shape)
+    new_coordinates = coordinates + residue_shift[residue_indexes] + atom_shift
+    centre = new_coordinates.mean(axis=0)
+    rotation = random_rotation(rng)
+    return (new_coordinates - centre) @ rotation.T + centre + rng.normal(scale=5.0, size=3)
+
+
+def synthesise_chain(
+    n_residues: int, template_path: str = TEMPLATE_PATH
+) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+    """
+    Build a chain of the given length from the nucleotides of a template structure.
+    The nucleotides follow helical segments of `SEGMENT_SIZE` nucleotides, placed on a grid so
+    long chains stay compact.
+    :param n_residues: number of nucleotides of the chain
+    :param template_path: the .pdb file whose nucleotides are copied
+    :return: the coordinates, the residue names, the atom names and the residue indexes
+    """
+    t_coordinates, t_residue_names, t_atom_names, t_residue_indexes = read_pdb_atoms(template_path)
+    n_template = int(t_residue_indexes.max()) + 1
+    n_segments = math.ceil(n_residues / SEGMENT_SIZE)
+    grid_size = math.ceil(math.sqrt(n_segments))
+    coordinates, residue_names, atom_names, residue_indexes = [], [], [], []
+    for residue_index in range(n_residues):
+        mask = t_residue_indexes == residue_index % n_template
+        atoms = t_coordinates[mask] - t_coordinates[mask].mean(axis=0)
+        segment, position = divmod(residue_index, SEGMENT_SIZE)
+        if segment % 2 == 1:
+            position = SEGMENT_SIZE - 1 - position
+        angle = math.radians(HELIX_TWIST * position)
+        rotation = np.array(
+            [
+                [math.cos(angle), -math.sin(angle), 0.0],
+                [math.sin(angle), math.cos(angle), 0.0],
+                [0.0, 0.0, 1.0],
+            ]
+        )
+        centre = np.array(
+            [
+                (segment % grid_size) * SEGMENT_SPACING + HELIX_RADIUS * math.cos(angle),
+                (segment // grid_size) * SEGMENT_SPACING + HELIX_RADIUS * math.sin(angle),
+                position * HELIX_RISE,
+            ]
+        )
+        coordinates.append(atoms @ rotation.T + centre)
+        residue_names.extend(np.array(t_residue_names)[mask].tolist())
+        atom_names.extend(np.array(t_atom_names)[mask].tolist())
+        residue_indexes.extend([residue_index] * int(mask.sum()))
+    return (
+        np.concatenate(coordinates),
+        residue_names,
+        atom_names,
+        np.array(residue_indexes, dtype=np.int64),
+    )
+
+
+def generate_decoy_set(
+    out_dir: str,
+    n_decoys: int,
+    n_residues: Optional[int] = None,
+    noise: Tuple[float, float] = (0.5, 6.0),
+    seed: int = 0,
+    template_path: str = TEMPLATE_PATH,
+) -> Tuple[str, List[str]]:
+    """
+    Write a native structure and its decoys. The files already written are kept, so a decoy
+    set is only generated once.
+    :param out_dir: directory where to write the native (`native.pdb`) and the decoys
+            (`decoys/decoy_<index>.pdb`)
+    :param n_decoys: number of decoys
+    :param n_residues: number of nucleotides of a synthetic chain. If None, the template
+            structure is the native.
+    :param noise: minimum and maximum standard deviation (in Angstrom) of the perturbations.
+            Each decoy has its own noise, so the decoys have a range of qualities.
+    :param seed: seed of the random generator
+    :param template_path: the .pdb file used as native, or whose nucleotides are copied
+    :return: the path to the native structure and the paths to the decoys
+    """
+    native_path = os.path.join(out_dir, "native.pdb")
+    decoy_dir = os.path.join(out_dir, "decoys")
+    decoy_paths = [os.path.join(decoy_dir, f"decoy_{index}.pdb") for index in range(n_decoys)]
+    if os.path.exists(native_path) and all(os.path.exists(path) for path in decoy_paths):
+        return native_path, decoy_paths
+    if n_residues is None:
+        structure = read_pdb_atoms(template_path)
+    else:
+        structure = synthesise_chain(n_residues, template_path)
+    coordinates, residue_names, atom_names, residue_indexes = structure
+    write_pdb(native_path, coordinates, residue_names, atom_names, residue_indexes)
+    rng = np.random.default_rng(seed)
+    for decoy_path in decoy_paths:
+        decoy = perturb(coordinates, residue_indexes, rng.uniform(*noise), rng)
+        write_pdb(decoy_path, decoy, residue_names, atom_names, residue_indexes)
+    return native_path, decoy_paths
@@ -0,0 +1,95 @@
+"""
+Instant stand-ins of the external binaries, used to measure the time spent by the framework
+around the tools. Each script prints an output in the format of the real tool, with constant
+scores, so the same parsers are used.
+"""
+
+import os
+import stat
+from typing import Dict
+
+FAKE_TOOLS: Dict[str, str] = {
+    "TMscore": """#!/bin/sh
+echo "TM-score    = 0.6000  (d0= 3.20)"
+echo "GDT-TS-score= 0.7500 %(d<1)=0.5000 %(d<2)=0.7500 %(d<4)=0.8750 %(d<8)=0.8750"
+echo "GDT-HA-score= 0.5000 %(d<0.5)=0.2500 %(d<1)=0.5000 %(d<2)=0.7500 %(d<4)=0.8750"
+""",
+    # Either `USalign -mol RNA pred native` or `USalign -mol RNA -outfmt 2 -dir1 dir list native`
+    "USalign": """#!/bin/sh
+if [ "$4" = "2" ]; then
+    echo "#PDBchain1	PDBchain2	TM1	TM2	RMSD	ID1	ID2	IDali	L1	L2	Lali"
+    while read -r name; do
+        echo "$6$name:A	$8:A	0.5000	0.6000	2.00	0.9	0.9	0.9	20	20	20"
+    done < "$7"
+else
+    echo "TM-score= 0.5000 (normalized by length of Structure_1: L=20, d0=0.90)"
+    echo "TM-score= 0.6000 (normalized by length of Structure_2: L=20, d0=0.90)"
+fi
+""",
+    "DFIRE_RNA": """#!/bin/sh
+for path in "$@"; do echo "$path -123.456"; done
+""",
+    "rsRNASP": """#!/bin/sh
+echo "-123.456"
+""",
+    # `voronota-cadscore --input-target native --input-model pred... --cache-dir dir`
+    "voronota-cadscore": """#!/bin/sh
+native=$2
+shift 3
+for path in "$@"; do
+    case "$path" in --*) break ;; esac
+    echo "$native $path query residue 0.6000 100 100"
+done
+""",
+    # `ost compare-structures -r native -m pred -o out.json --metric`
+    "ost": """#!/bin/sh
+echo '{"tm_score": 0.6, "lddt": 0.7, "qs_global": 0.8}' > "$7"
+""",
+    "mcq-local": """#!/bin/sh
+echo "12.345"
+""",
+    "mcq-lcs": """#!/bin/sh
+echo "Coverage: 80.0%"
+echo "Number of residues: 20"
+""",
+}
+# Keys of the BIN_PATHS section of the config for each fake tool
+BIN_PATHS_KEYS = {
+    "ZHANG_GROUP": "TMscore",
+    "ZHANG_GROUP_US": "USalign",
+    "DFIRE": "DFIRE_RNA",
+    "rsRNASP": "rsRNASP",
+    "VORONOTA": "voronota-cadscore",
+    "OST": "ost",
+    "MCQ4STRUCTURES": "mcq-local",
+}
+# Scores computed with the fake tools
+FAKE_SCORES = [
+    "GDT-TS",
+    "GDT-HA",
+    "TM-SCORE (TMSCORE)",
+    "TM-SCORE",
+    "DFIRE",
+    "rsRNASP",
+    "CAD",
+    "lDDT",
+    "TM-SCORE (OST)",
+    "QS-SCORE",
+    "MCQ",
+    "LCS-TA",
+]
+
+
+def write_fake_tools(bin_dir: str) -> Dict[str, str]:
+    """
+    Write the fake binaries.
+    :param bin_dir: directory where to write the binaries
+    :return: the BIN_PATHS section of the config that uses them
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, content in FAKE_TOOLS.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return {key: os.path.join(bin_dir, name) for key, name in BIN_PATHS_KEYS.items()}
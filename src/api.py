@@ -0,0 +1,199 @@
+"""
+Python API to score structures in memory, without the result tables, logs and normalised
+copies of ScoreCLI.
+The structures can be paths, .pdb or mmCIF contents, Bio.PDB objects, or atoms given as
+arrays (the coordinates, residue names, atom names and residue indexes, as returned by
+`read_pdb_atoms`). The scores with `memory_support` read the atoms directly; the other ones
+receive .pdb files written in a temporary directory, on tmpfs when it is available. Only the
+experimental NumPy potentials (e.g. `DFIRE (NUMPY)`) have `memory_support` for now.
+
+The structures are not normalised (ScoreCLI normalises them with RNA_Assessment when
+`normalise` is set, the default of the CLI), so the scores can differ from the ones of ScoreCLI
+on the same inputs. Normalise the structures before, or use ScoreCLI, to get the same scores.
+
+Example:
+    scorer = Scorer("RMSD,TM-SCORE")
+    score_df = scorer.score({"model_1": pdb_content, "model_2": bio_structure}, native_path)
+"""
+
+import io
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.rnadvisor_cli import ScoreCLI
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.score_abstract.score_abstract_potential import (
+    format_pdb_atoms,
+    parse_pdb_atoms,
+    read_pdb_atoms,
+)
+from src.utils import convert_cif_to_pdb
+
+# Directory of the temporary .pdb files: tmpfs if available, so the files stay in memory
+TMPFS_DIR = "/dev/shm"
+
+
+def get_tmp_dir() -> Optional[str]:
+    """Return the directory of the temporary files (None for the default of the system)."""
+    return TMPFS_DIR if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK) else None
+
+
+class InputStructure:
+    def __init__(self, structure: Any):
+        """
+        Structure given to the API, converted to atoms or to a .pdb file only when needed.
+        :param structure: a path to a .pdb or .cif file, the content of a .pdb or mmCIF file,
+                a Bio.PDB structure (or model, chain), or a tuple with the coordinates, residue
+                names, atom names and residue indexes
+        """
+        self.path: Optional[str] = None
+        self.content: Optional[str] = None
+        self.atoms: Optional[Tuple] = None
+        if isinstance(structure, (tuple, list)):
+            self.atoms = tuple(structure)
+        elif hasattr(structure, "get_atoms"):
+            self.content = self.entity_to_pdb(structure)
+        elif not isinstance(structure, str):
+            raise TypeError(f"UNKNOWN TYPE OF STRUCTURE : {type(structure)}")
+        elif "\n" not in structure and os.path.isfile(structure):
+            if structure.endswith(".pdb"):
+                self.path = structure
+            else:
+                with open(structure, "r") as f:
+                    self.content = self.to_pdb(f.read())
+        else:
+            self.content = self.to_pdb(structure)
+
+    @staticmethod
+    def entity_to_pdb(entity: Any) -> str:
+        """Return the .pdb content of a Bio.PDB structure, model or chain."""
+        from Bio.PDB import PDBIO
+
+        pdb_io, out = PDBIO(), io.StringIO()
+        pdb_io.set_structure(entity)
+        pdb_io.save(out)
+        return out.getvalue()
+
+    @staticmethod
+    def to_pdb(content: str) -> str:
+        """Return the .pdb content of a .pdb or mmCIF content."""
+        if not (content.lstrip().startswith("data_") or "_atom_site." in content):
+            return content
+        out = io.StringIO()
+        convert_cif_to_pdb(io.StringIO(content), out)  # type: ignore
+        return out.getvalue()
+
+    def get_atoms(self) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+        """Return the coordinates, residue names, atom names and residue indexes."""
+        if self.atoms is None:
+            if self.content is not None:
+                self.atoms = parse_pdb_atoms(io.StringIO(self.content))
+            else:
+                self.atoms = read_pdb_atoms(self.path)  # type: ignore
+        return self.atoms  # type: ignore
+
+    def get_path(self, tmp_dir: str, name: str) -> str:
+        """
+        Return a .pdb file of the structure, written in the temporary directory if needed.
+        :param tmp_dir: the temporary directory
+        :param name: name of the file, without extension
+        """
+        if self.path is None:
+            content = self.content
+            if content is None:
+                content = format_pdb_atoms(*self.atoms)  # type: ignore
+            self.path = os.path.join(tmp_dir, f"{name}.pdb")
+            with open(self.path, "w") as f:
+                f.write(content)
+        return self.path
+
+
+class Scorer:
+    def __init__(
+        self,
+        all_scores: Union[str, List[str], List[ScoreAbstract]] = "ALL",
+        bin_paths: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        tmp_dir: Optional[str] = None,
+    ):
+        """
+        Scores kept in memory between calls, so the models and tools are loaded once.
+        :param all_scores: names of the scores (like `--all_scores`), or score instances
+        :param bin_paths: paths to the binaries given to the score classes (the keys are the
+                ones returned by `ScoreCLI.get_bin_paths`)
+        :param params: parameters of the scores (like `--params`)
+        :param tmp_dir: directory of the temporary .pdb files. Default to tmpfs if available.
+        """
+        if isinstance(all_scores, list) and all(
+            isinstance(score_fn, ScoreAbstract) for score_fn in all_scores
+        ):
+            score_fns = all_scores
+        else:
+            score_fns = ScoreCLI.convert_cli_scores(all_scores, bin_paths)  # type: ignore
+        self.all_scores = ScoreCLI.init_scores(score_fns)  # type: ignore
+        self.params = {} if params is None else params
+        self.tmp_dir = get_tmp_dir() if tmp_dir is None else tmp_dir
+
+    def score(
+        self,
+        predictions: Union[List, Dict[str, Any]],
+        native: Any = None,
+    ) -> pd.DataFrame:
+        """
+        Compute the scores of the predictions.
+        :param predictions: the structures, either as a list or as a dictionary with the name
+                of each structure
+        :param native: the native structure. Only the energies can be computed without it.
+        :return: the scores, with one row per prediction (named `pred_<index>` if the
+                predictions are a list)
+        """
+        if not isinstance(predictions, dict):
+            predictions = {f"pred_{index}": pred for index, pred in enumerate(predictions)}
+        inputs = {name: InputStructure(pred) for name, pred in predictions.items()}
+        native_input = InputStructure(native) if native is not None else None
+        rows: Dict[str, Dict] = {name: {} for name in inputs}
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir) as tmp_dir:
+            for score_fn in self.all_scores:
+                try:
+                    scores = self._compute_score(score_fn, inputs, native_input, tmp_dir)
+                except Exception as e:
+                    # A failing score does not lose the scores of the other ones
+                    logger.error(f"Error with {score_fn.__class__.__name__} : {e!r}")
+                    continue
+                for name, c_scores in scores.items():
+                    rows[name].update(c_scores)
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def score_records(self, predictions: Union[List, Dict[str, Any]], native: Any = None):
+        """Compute the scores of the predictions, as a NumPy structured array."""
+        return self.score(predictions, native).to_records(index_dtypes="U64")
+
+    def _compute_score(
+        self,
+        score_fn: ScoreAbstract,
+        inputs: Dict[str, InputStructure],
+        native_input: Optional[InputStructure],
+        tmp_dir: str,
+    ) -> Dict:
+        """
+        Compute a score from the atoms in memory if it supports it, from .pdb files otherwise.
+        :return: the scores of each prediction name
+        """
+        if score_fn.memory_support:
+            atoms = {name: structure.get_atoms() for name, structure in inputs.items()}
+            native_atoms = native_input.get_atoms() if native_input is not None else None
+            return score_fn.compute_atoms(atoms, native_atoms, **self.params)[0]
+        paths = {
+            name: structure.get_path(tmp_dir, f"pred_{index}")
+            for index, (name, structure) in enumerate(inputs.items())
+        }
+        native_path = native_input.get_path(tmp_dir, "native") if native_input is not None else ""
+        # The same file can be given under several names: it is scored once
+        unique_paths = list(dict.fromkeys(paths.values()))
+        scores, _ = score_fn.compute(unique_paths, native_path, **self.params)
+        return {name: scores[path] for name, path in paths.items() if path in scores}
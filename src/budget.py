@@ -0,0 +1,143 @@
+"""
+Time budget of a run with a hard wall-clock limit. The (metric, prediction) cells that can end
+before the deadline are planned with the cost model, in the order of priority of the metrics
+(the order of `ALL_SCORES`), and the metrics with a faster backend switch to it when they do
+not fit (with the columns of the faster backend). The cells that are not computed before the
+deadline are skipped, and the results are saved before the deadline.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.scheduler import CostModel, predict_makespan
+
+# Part of the budget kept to save the results before the deadline
+SAVE_MARGIN_RATIO = 0.05
+# Bounds (in seconds) of the time kept to save the results
+MIN_SAVE_MARGIN, MAX_SAVE_MARGIN = 2.0, 60.0
+# Name of the faster backend of the score classes, in `CONVERT_NAME_TO_SCORING_CLASS`. These
+# backends are experimental (their parity with the binaries is not checked without the tools),
+# so their scores keep their own columns (e.g. `DFIRE (NUMPY)`).
+FAST_BACKENDS = {
+    "ScoreDfire": "DFIRE (NUMPY)",
+    "ScoreRsRNASP": "rsRNASP (NUMPY)",
+    "ScoreCGRNASP": "CGRNASP (NUMPY)",
+}
+# Name of the column with the metrics skipped for each prediction
+SKIPPED_COLUMN = "SKIPPED"
+
+
+class TimeBudget:
+    def __init__(self, budget: float, start: Optional[float] = None):
+        """
+        Deadline of a run.
+        :param budget: wall-clock time (in seconds) of the run
+        :param start: time when the run started. Default to now.
+        """
+        self.budget = float(budget)
+        self.start = time.time() if start is None else start
+        margin = min(max(SAVE_MARGIN_RATIO * self.budget, MIN_SAVE_MARGIN), MAX_SAVE_MARGIN)
+        # The results are saved before the end of the budget
+        self.deadline = self.start + max(0.0, self.budget - margin)
+
+    def get_remaining(self) -> float:
+        """Return the time (in seconds) before the deadline."""
+        return max(0.0, self.deadline - time.time())
+
+    def is_expired(self) -> bool:
+        """Whether the deadline is reached."""
+        return time.time() >= self.deadline
+
+    def start_watchdog(self, callback) -> threading.Timer:
+        """
+        Call the function at the deadline, in another thread, unless the returned timer is
+        cancelled before.
+        """
+        timer = threading.Timer(self.get_remaining(), callback)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+def fit_tasks(costs: List[float], nb_workers: int, remaining: float) -> int:
+    """
+    Return the number of tasks, from the cheapest, that end within the remaining time.
+    :param costs: predicted time of each task, sorted from the cheapest
+    :param nb_workers: number of tasks running at the same time
+    :param remaining: time (in seconds) available
+    """
+    low, high = 0, len(costs)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if predict_makespan(costs[:middle][::-1], nb_workers) <= remaining:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def plan_metric(
+    cost_model: CostModel,
+    metric: str,
+    nb_workers: int,
+    sizes: Dict[str, int],
+    remaining: float,
+) -> Tuple[List[str], float]:
+    """
+    Plan the predictions of a metric that can be computed in the remaining time. The cheapest
+    predictions are kept, so the most cells are computed.
+    :param cost_model: the cost model
+    :param metric: name of the score class
+    :param nb_workers: number of tasks of the metric running at the same time
+    :param sizes: the number of atoms of each prediction path
+    :param remaining: time (in seconds) available for the metric and the next ones
+    :return: the predictions planned, from the cheapest, and their predicted time. A metric
+            never seen by the cost model is planned on all the predictions, with a time of 0,
+            and only stopped by the deadline.
+    """
+    pred_paths = sorted(sizes, key=lambda path: sizes[path])
+    if not cost_model.has_metric(metric):
+        return pred_paths, 0.0
+    costs = [cost_model.predict(metric, sizes[path]) for path in pred_paths]
+    nb_tasks = fit_tasks(costs, nb_workers, remaining)  # type: ignore
+    predicted = predict_makespan(costs[:nb_tasks][::-1], nb_workers)  # type: ignore
+    return pred_paths[:nb_tasks], predicted
+
+
+def get_skipped(
+    computed: Dict[Any, List[str]],
+    pred_paths: List[str],
+    names: Dict[Any, str],
+    replaced: Optional[Dict[Any, str]] = None,
+) -> Dict[str, str]:
+    """
+    Return the metrics that were not computed for each prediction.
+    :param computed: the predictions computed by each metric (by key of the metric)
+    :param pred_paths: all the predictions
+    :param names: the name of each metric, by key
+    :param replaced: the name of the faster backend of the replaced metrics, by key. The
+            predictions computed by it get a note.
+    :return: the names of the skipped metrics, then the notes of the replaced metrics
+            (separated by a comma, empty if none) for each prediction name
+    """
+    replaced = {} if replaced is None else replaced
+    computed_sets = {key: set(paths) for key, paths in computed.items()}
+    skipped, nb_skipped = {}, 0
+    for path in pred_paths:
+        metrics = [names[key] for key in names if path not in computed_sets.get(key, set())]
+        notes = [
+            f"{names[key]} REPLACED BY {fast_name}"
+            for key, fast_name in replaced.items()
+            if path in computed_sets.get(key, set())
+        ]
+        skipped[os.path.basename(path)] = ",".join(metrics + notes)
+        nb_skipped += len(metrics)
+    logger.info(
+        f"TIME BUDGET : {len(pred_paths) * len(names) - nb_skipped} CELLS COMPUTED, "
+        f"{nb_skipped} SKIPPED"
+    )
+    return skipped
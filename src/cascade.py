@@ -0,0 +1,136 @@
+"""
+Cascade of scores: the cheap scores are computed on all the predictions, and the expensive
+ones only on the best predictions of the previous stages.
+
+A cascade is a list of stages, each one with:
+    SCORES     names of the scores of the stage (like `ALL_SCORES`)
+    KEEP       (optional) predictions kept for the next stages: a number of predictions, a
+               fraction (e.g. 0.2) or a percentage (e.g. "20%"). Not used for the last stage.
+    SORT_BY    (optional) score used to select the predictions. Default to the first score
+               of the stage.
+    ORDER      (optional) `DESC` to keep the highest values of SORT_BY, `ASC` the lowest ones.
+               Default to the direction of the score (see HIGHER_IS_BETTER).
+"""
+
+import ast
+import math
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Prefixes (in upper case) of the scores where a higher value is better. For the other ones
+# (RMSD, energies, MCQ...), a lower value is better.
+HIGHER_IS_BETTER = (
+    "INF",
+    "TM-SCORE",
+    "GDT",
+    "CAD",
+    "LDDT",
+    "QS-SCORE",
+    "LCS-TA-COVERAGE",
+    "LCS-TA-RESIDUES",
+    "BARNABA-ESCORE",
+)
+# Values of the ORDER of a stage
+ORDERS = ("ASC", "DESC")
+
+
+def is_higher_better(score_name: str) -> bool:
+    """Whether a higher value of the score means a better prediction."""
+    return score_name.upper().startswith(HIGHER_IS_BETTER)
+
+
+class CascadeStage:
+    def __init__(
+        self,
+        scores: List[str],
+        keep: Optional[Union[int, float, str]] = None,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None,
+    ):
+        """
+        Stage of a cascade.
+        :param scores: names of the scores of the stage
+        :param keep: number, fraction or percentage of the predictions kept for the next
+                stages. None to keep them all.
+        :param sort_by: score used to select the predictions. Default to the first score
+                computed by the stage.
+        :param order: `DESC` to keep the highest values, `ASC` the lowest ones. Default to the
+                direction of the score.
+        """
+        self.scores = scores.split(",") if isinstance(scores, str) else scores
+        self.keep = keep
+        self.sort_by = sort_by
+        if order is not None and order.upper() not in ORDERS:
+            raise ValueError(f"ORDER OF A STAGE SHOULD BE ONE OF {ORDERS} : {order}")
+        self.order = order.upper() if order is not None else None
+
+    def get_nb_kept(self, nb_predictions: int) -> int:
+        """Return the number of predictions kept among `nb_predictions`."""
+        if self.keep is None:
+            return nb_predictions
+        keep = self.keep
+        if isinstance(keep, str):
+            keep = float(keep.rstrip("%")) / 100 if keep.endswith("%") else float(keep)
+        if keep < 1:
+            return min(nb_predictions, math.ceil(keep * nb_predictions))
+        return min(nb_predictions, int(keep))
+
+    def select(self, scores: Dict[str, Dict]) -> List[str]:
+        """
+        Select the best predictions of the stage.
+        :param scores: the scores of the stage for each prediction
+        :return: the predictions kept, from the best. The predictions without the score are
+                kept last.
+        """
+        score_df = pd.DataFrame.from_dict(scores, orient="index")
+        if len(score_df) == 0:
+            return []
+        sort_by = self.sort_by if self.sort_by is not None else score_df.columns[0]
+        # The names of the outputs can differ in case from the names of the scores
+        columns = {column.upper(): column for column in score_df.columns}
+        if sort_by.upper() not in columns:
+            raise ValueError(f"SCORE {sort_by} NOT COMPUTED BY THE STAGE {self.scores}")
+        sort_by = columns[sort_by.upper()]
+        values = pd.to_numeric(score_df[sort_by], errors="coerce")
+        ascending = not is_higher_better(sort_by) if self.order is None else self.order == "ASC"
+        values = values.sort_values(ascending=ascending, na_position="last")
+        return list(values.index[: self.get_nb_kept(len(values))])
+
+
+def read_cascade(cascade: Optional[Union[str, List[Dict]]]) -> Optional[List[CascadeStage]]:
+    """
+    Read the stages of a cascade.
+    :param cascade: the list of stages, as a list of dictionaries or its string (from the
+            command line)
+    :return: the stages, or None if there is no cascade
+    """
+    if cascade is None:
+        return None
+    values: List[Dict] = ast.literal_eval(cascade) if isinstance(cascade, str) else cascade
+    stages = []
+    for value in values:
+        stage = {key.upper(): option for key, option in value.items()}
+        stages.append(
+            CascadeStage(
+                stage["SCORES"], stage.get("KEEP"), stage.get("SORT_BY"), stage.get("ORDER")
+            )
+        )
+    return stages
+
+
+def fill_filtered(scores: Dict[str, Dict], times: Dict[str, Dict], filtered: List[str]) -> None:
+    """
+    Add NaN scores and times for the predictions filtered by the previous stages, so the
+    tables have a row for every prediction.
+    :param scores: the scores of a metric, updated in place
+    :param times: the times of a metric, updated in place
+    :param filtered: the predictions filtered by the previous stages
+    """
+    score_names: List[str] = []
+    for c_scores in scores.values():
+        score_names.extend(name for name in c_scores if name not in score_names)
+    for path in filtered:
+        scores[path] = {name: np.nan for name in score_names}
+        times[path] = {name: np.nan for name in score_names}
@@ -0,0 +1,54 @@
+"""
+Context of a prediction, shared by the scores computed in the decoy-major order. Every score
+of a prediction is computed in a row, and the data read from its file (the atoms, the
+structures with their annotations, a superposition...) are computed by the first score that
+needs them, reused by the next ones and released after the last one. The native structure
+has its own context, kept for all the predictions.
+
+The scores opt in with `context_support` and `compute_context`. They should not modify the
+data of the context, as the other scores read them.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+from src.tracing import TRACER
+
+
+class DecoyContext:
+    def __init__(self, path: str, native: Optional["DecoyContext"] = None):
+        """
+        Data of a structure shared by the scores.
+        :param path: path to the .pdb file of the structure (normalised if asked)
+        :param native: the context of the native structure, None for the native itself
+        """
+        self.path = path
+        self.native = native
+        self._data: Dict[str, Any] = {}
+
+    def get(self, key: str, compute_fn: Callable[[], Any]) -> Any:
+        """
+        Return the data of the context, computed the first time it is asked.
+        :param key: name of the data, shared by the scores that use the same data
+        :param compute_fn: function that computes the data
+        """
+        if key not in self._data:
+            self._data[key] = compute_fn()
+        return self._data[key]
+
+    def set(self, key: str, value: Any):
+        """Add data already computed, like the atoms parsed by the pipeline."""
+        self._data[key] = value
+
+    def get_atoms(self) -> Tuple:
+        """Return the coordinates, residue names, atom names and residue indexes."""
+
+        def read_atoms() -> Tuple:
+            with TRACER.span("parse", "context"):
+                return read_pdb_atoms(self.path)
+
+        return self.get("atoms", read_atoms)
+
+    def release(self):
+        """Remove the data of the context, once its last score is computed."""
+        self._data.clear()
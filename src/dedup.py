@@ -0,0 +1,145 @@
+"""
+Deduplication of the predictions: the predictions with the same atoms and coordinates are
+only scored once, and their scores are copied to the duplicates.
+Two predictions have the same atoms when their chains, residue numbers, residue names and atom
+names are the same.
+Optionally, the predictions within an RMSD tolerance of an already kept prediction (with the
+same atoms) are also considered as duplicates.
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.score_abstract.score_abstract_potential import parse_pdb_atoms
+from src.tracing import TRACER
+
+# Precision of the coordinates of a .pdb file, used to compare the coordinates
+COORDINATES_DECIMALS = 3
+
+
+def get_superposed_rmsd(coordinates: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Return the RMSD between two sets of coordinates after the optimal superposition (Kabsch).
+    :param coordinates: array of shape (n_atoms, 3)
+    :param reference: array of shape (n_atoms, 3), with the same atoms
+    """
+    centred, centred_ref = coordinates - coordinates.mean(0), reference - reference.mean(0)
+    u, s, vt = np.linalg.svd(centred.T @ centred_ref)
+    # Correction of the reflection
+    s[-1] *= np.sign(np.linalg.det(u @ vt))
+    squared = (centred**2).sum() + (centred_ref**2).sum() - 2 * s.sum()
+    return float(np.sqrt(max(squared, 0.0) / max(len(coordinates), 1)))
+
+
+def get_residue_keys(lines: List[str]) -> List[str]:
+    """
+    Return the chain and residue number of each atom of the first model of a .pdb file.
+    :param lines: the lines of a .pdb file
+    """
+    residue_keys = []
+    for line in lines:
+        if line.startswith("ENDMDL"):
+            break
+        if line.startswith(("ATOM", "HETATM")):
+            residue_keys.append(line[21:27])
+    return residue_keys
+
+
+def hash_atoms(
+    residue_names: List[str],
+    atom_names: List[str],
+    residue_keys: List[str],
+    residue_indexes: np.ndarray,
+) -> str:
+    """
+    Return the hash of the atoms of a structure, without their coordinates.
+    :param residue_names: the residue name of each atom
+    :param atom_names: the name of each atom
+    :param residue_keys: the chain and residue number of each atom
+    :param residue_indexes: the index of the residue of each atom
+    """
+    atoms = [
+        f"{key}|{index}|{residue}|{atom}"
+        for key, index, residue, atom in zip(
+            residue_keys, residue_indexes.tolist(), residue_names, atom_names
+        )
+    ]
+    return hashlib.sha1(" ".join(atoms).encode()).hexdigest()
+
+
+def hash_structure(coordinates: np.ndarray, atoms_hash: str) -> str:
+    """Return the hash of the atoms and coordinates of a structure."""
+    content = np.round(coordinates, COORDINATES_DECIMALS).astype(np.float64).tobytes()
+    return hashlib.sha1(atoms_hash.encode() + content).hexdigest()
+
+
+def group_duplicates(
+    pred_paths: List[str], rmsd_tolerance: Optional[float] = None
+) -> Dict[str, List[str]]:
+    """
+    Group the predictions that are duplicates.
+    :param pred_paths: paths to the .pdb predictions
+    :param rmsd_tolerance: RMSD (in Angstrom) under which two predictions with the same atoms
+            are duplicates. None to only group the predictions with the same coordinates.
+    :return: the first prediction of each group, with the other predictions of the group
+    """
+    groups: Dict[str, List[str]] = {}
+    hashes: Dict[str, str] = {}
+    # Coordinates of the kept predictions, by hash of the atoms
+    kept: Dict[str, List[Tuple[str, np.ndarray]]] = {}
+    for pred_path in pred_paths:
+        with TRACER.span("parse", "dedup"):
+            with open(pred_path, "r") as f:
+                lines = f.readlines()
+            coordinates, residue_names, atom_names, residue_indexes = parse_pdb_atoms(lines)
+        residue_keys = get_residue_keys(lines)
+        atoms_hash = hash_atoms(residue_names, atom_names, residue_keys, residue_indexes)
+        structure_hash = hash_structure(coordinates, atoms_hash)
+        if structure_hash in hashes:
+            groups[hashes[structure_hash]].append(pred_path)
+            continue
+        representative = None
+        if rmsd_tolerance is not None:
+            for kept_path, kept_coordinates in kept.get(atoms_hash, []):
+                if get_superposed_rmsd(coordinates, kept_coordinates) <= rmsd_tolerance:
+                    representative = kept_path
+                    break
+        if representative is not None:
+            groups[representative].append(pred_path)
+            hashes[structure_hash] = representative
+            continue
+        groups[pred_path], hashes[structure_hash] = [], pred_path
+        if rmsd_tolerance is not None:
+            kept.setdefault(atoms_hash, []).append((pred_path, coordinates))
+    nb_unique = len(groups)
+    ratio = 1 - nb_unique / len(pred_paths) if len(pred_paths) > 0 else 0.0
+    logger.info(
+        f"DEDUPLICATION : {nb_unique} UNIQUE PREDICTIONS OUT OF {len(pred_paths)} "
+        f"({round(100 * ratio, 1)}% DUPLICATES)"
+    )
+    return groups
+
+
+def fan_out(
+    scores: Dict[str, Dict], times: Dict[str, Dict], duplicates: Dict[str, List[str]]
+) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Copy the scores of each computed prediction to its duplicates. The duplicates were not
+    computed, so their time is 0 (or NaN if the prediction was not computed either).
+    :param scores: the scores of each computed prediction
+    :param times: the times of each computed prediction
+    :param duplicates: the duplicates of each computed prediction
+    :return: the scores and times of all the predictions
+    """
+    all_scores, all_times = dict(scores), dict(times)
+    for path, c_scores in scores.items():
+        for duplicate in duplicates.get(path, []):
+            all_scores[duplicate] = dict(c_scores)
+            all_times[duplicate] = {
+                name: np.nan if np.isnan(value) else 0.0
+                for name, value in times.get(path, {}).items()
+            }
+    return all_scores, all_times
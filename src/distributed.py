@@ -0,0 +1,448 @@
+"""
+Distributed scoring on several nodes that share a filesystem.
+The coordinator splits the run in (target, chunk of predictions, metric) tasks, written in a
+work queue. The workers of any node claim the tasks with a lease, compute them with the score
+classes and write the partial results. The coordinator merges them in the same tables as
+`ScoreCLI.compute_scores`.
+
+The queue is a directory:
+    tasks/<task_id>.json     tasks waiting for a worker
+    leases/<task_id>.json    tasks claimed by a worker. The modification time of the file is
+                             the last heartbeat of the worker.
+    done/<task_id>.json      scores and times of the finished tasks
+    submitted                written once the coordinator has submitted all the tasks
+A task is claimed by an atomic rename from `tasks` to `leases`. A lease without heartbeat for
+`lease_timeout` seconds (the worker died) is moved back to `tasks`.
+
+Example:
+    python -m src.distributed coordinator --config_path config.yaml --queue_dir /shared/queue
+    python -m src.distributed worker --config_path config.yaml --queue_dir /shared/queue
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from src.tool_runner import RUNNER
+from src.cascade import fill_filtered
+from src.rnadvisor_cli import ScoreCLI
+from src.score_abstract.score_abstract import ScoreAbstract
+
+# Number of predictions of a task
+CHUNK_SIZE = 50
+# Time (in seconds) without heartbeat before a lease is given to another worker
+LEASE_TIMEOUT = 600.0
+# Time (in seconds) between two looks at the queue when there is no task to claim
+POLL_INTERVAL = 2.0
+
+
+def write_json(path: str, content: Any):
+    """Write a .json file atomically, so the other nodes never read a partial file."""
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f, default=lambda value: value.item())
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str) -> Optional[Dict]:
+    """Read a .json file, or return None if another node moved it."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def get_task_id(
+    target: str, index: int, native_path: str, pred_paths: List[str], metric: str
+) -> str:
+    """
+    Return the identifier of a task. It is unique for the target, the native and the chunk of
+    predictions, so the tasks of several targets (or of a target with other predictions) can
+    share a queue, and the metric is last, so the workers filter the tasks by their name.
+    :param target: name of the target (`model_name` of the run)
+    :param index: index of the chunk, so the tasks are claimed in the order of submission
+    :param native_path: path to the native structure
+    :param pred_paths: paths to the predictions of the chunk
+    :param metric: name of the score class
+    """
+    digest = hashlib.sha1("\n".join([native_path] + pred_paths).encode()).hexdigest()[:12]
+    target = re.sub(r"[^A-Za-z0-9.-]", "-", target)
+    return f"{target}_{index:06d}_{digest}_{metric}"
+
+
+def get_task_metric(task_id: str) -> str:
+    """Return the name of the score class of a task, from its identifier."""
+    return task_id.rsplit("_", 1)[-1]
+
+
+class FileLeaseQueue:
+    def __init__(self, queue_dir: str, lease_timeout: float = LEASE_TIMEOUT):
+        """
+        Work queue on a shared filesystem.
+        :param queue_dir: directory of the queue, shared by all the nodes
+        :param lease_timeout: time (in seconds) without heartbeat before a lease is reclaimed
+        """
+        self.lease_timeout = lease_timeout
+        self.submitted_path = os.path.join(queue_dir, "submitted")
+        self.dirs = {name: os.path.join(queue_dir, name) for name in ["tasks", "leases", "done"]}
+        for dir_path in self.dirs.values():
+            os.makedirs(dir_path, exist_ok=True)
+
+    def _path(self, state: str, task_id: str) -> str:
+        return os.path.join(self.dirs[state], f"{task_id}.json")
+
+    def _list(self, state: str) -> List[str]:
+        """Return the identifiers of the tasks in the given state, in the order of submission."""
+        return sorted(
+            name[: -len(".json")]
+            for name in os.listdir(self.dirs[state])
+            if name.endswith(".json")
+        )
+
+    def submit(self, tasks: List[Dict]) -> int:
+        """
+        Add tasks to the queue. The tasks already in the queue are kept, so the coordinator can
+        be restarted without computing the finished tasks again.
+        :param tasks: tasks with a unique `id`
+        :return: the number of new tasks
+        """
+        known = set(self._list("tasks")) | set(self._list("leases")) | set(self._list("done"))
+        new_tasks = [task for task in tasks if task["id"] not in known]
+        for task in new_tasks:
+            write_json(self._path("tasks", task["id"]), task)
+        write_json(self.submitted_path, {"nb_tasks": len(tasks)})
+        return len(new_tasks)
+
+    def is_submitted(self) -> bool:
+        """Whether the coordinator has submitted the tasks. The workers can start before."""
+        return os.path.exists(self.submitted_path)
+
+    def reclaim(self) -> int:
+        """
+        Move the leases of the dead workers back to the tasks.
+        :return: the number of reclaimed tasks
+        """
+        nb_reclaimed, now = 0, time.time()
+        for task_id in self._list("leases"):
+            path = self._path("leases", task_id)
+            try:
+                if now - os.path.getmtime(path) < self.lease_timeout:
+                    continue
+                os.rename(path, self._path("tasks", task_id))
+            except FileNotFoundError:
+                # The task ended, or another node reclaimed it
+                continue
+            logger.warning(f"LEASE OF {task_id} EXPIRED, TASK RECLAIMED")
+            nb_reclaimed += 1
+        return nb_reclaimed
+
+    def claim(self, metrics: Optional[Set[str]] = None) -> Optional[Dict]:
+        """
+        Claim the first task available.
+        :param metrics: names of the score classes that the worker can compute. None for all.
+        :return: the task, or None if there is no task to claim
+        """
+        self.reclaim()
+        for task_id in self._list("tasks"):
+            if metrics is not None and get_task_metric(task_id) not in metrics:
+                continue
+            path, lease_path = self._path("tasks", task_id), self._path("leases", task_id)
+            try:
+                os.rename(path, lease_path)
+                os.utime(lease_path)
+            except FileNotFoundError:
+                # Claimed by another worker
+                continue
+            if os.path.exists(self._path("done", task_id)):
+                # Reclaimed while its worker was finishing it
+                self.release(task_id, done=True)
+                continue
+            task = read_json(lease_path)
+            if task is not None:
+                return task
+        return None
+
+    def heartbeat(self, task_id: str):
+        """Renew the lease of a task."""
+        try:
+            os.utime(self._path("leases", task_id))
+        except FileNotFoundError:
+            pass
+
+    def release(self, task_id: str, done: bool = False):
+        """
+        Give a task back to the queue, or drop its lease once it is done.
+        :param task_id: identifier of the task
+        :param done: whether the task is finished
+        """
+        lease_path = self._path("leases", task_id)
+        try:
+            if done:
+                os.remove(lease_path)
+            else:
+                os.rename(lease_path, self._path("tasks", task_id))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, task_id: str, result: Dict):
+        """Store the result of a task and drop its lease."""
+        write_json(self._path("done", task_id), result)
+        self.release(task_id, done=True)
+
+    def get_pending(self, metrics: Optional[Set[str]] = None) -> Tuple[int, int]:
+        """
+        Return the number of tasks waiting and claimed.
+        :param metrics: only count the tasks of these score classes. None for all.
+        """
+        return tuple(  # type: ignore
+            sum(
+                metrics is None or get_task_metric(task_id) in metrics
+                for task_id in self._list(state)
+            )
+            for state in ["tasks", "leases"]
+        )
+
+    def get_results(self) -> Iterator[Dict]:
+        """Iterate over the results of the finished tasks, in the order of submission."""
+        for task_id in self._list("done"):
+            result = read_json(self._path("done", task_id))
+            if result is not None:
+                yield result
+
+    @contextmanager
+    def lease(self, task_id: str):
+        """Renew the lease of a task in the background while it is computed."""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.lease_timeout / 4):
+                self.heartbeat(task_id)
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def get_tasks(score_cli: ScoreCLI, chunk_size: int = CHUNK_SIZE) -> List[Dict]:
+    """
+    Split the run of a ScoreCLI in tasks. The predictions are already ordered by cost, so the
+    longest tasks are claimed first.
+    :param score_cli: the ScoreCLI of the coordinator (predictions and native already
+            normalised)
+    :param chunk_size: number of predictions of a task
+    :return: the tasks, with the absolute paths so the workers of all the nodes can read them
+    """
+    if score_cli.traj_source is not None:
+        raise NotImplementedError("TRAJECTORIES ARE NOT SUPPORTED IN DISTRIBUTED MODE")
+    pred_paths = [os.path.abspath(path) for path in score_cli.pred_path]
+    chunks = [pred_paths[i : i + chunk_size] for i in range(0, len(pred_paths), chunk_size)]
+    native_path = os.path.abspath(score_cli.native_path)
+    return [
+        {
+            "id": get_task_id(
+                score_cli.model_name, index, native_path, chunk, score_fn.__class__.__name__
+            ),
+            "target": score_cli.model_name,
+            "metric": score_fn.__class__.__name__,
+            "pred_paths": chunk,
+            "native_path": native_path,
+        }
+        for index, chunk in enumerate(chunks)
+        for score_fn in score_cli.all_scores
+    ]
+
+
+def compute_task(score_fn: ScoreAbstract, task: Dict, hp_params: Dict) -> Dict:
+    """
+    Compute a task. Any error of the score is stored in the result, so a task that always fails
+    is done once instead of killing every worker that claims it.
+    :return: the result of the task, with the scores and times of each prediction, and the
+            error if the score failed
+    """
+    error = None
+    try:
+        scores, times = score_fn.compute(task["pred_paths"], task["native_path"], **hp_params)
+    except Exception as e:
+        logger.error(f"Error with {task['metric']} on {task['id']} : {e!r}")
+        scores, times, error = {}, {}, repr(e)
+    return {
+        "id": task["id"],
+        "target": task["target"],
+        "metric": task["metric"],
+        "pred_paths": task["pred_paths"],
+        "scores": scores,
+        "times": times,
+        "error": error,
+    }
+
+
+def run_worker(
+    queue: FileLeaseQueue,
+    all_scores: List[ScoreAbstract],
+    hp_params: Dict,
+    wait: bool = True,
+    poll_interval: float = POLL_INTERVAL,
+) -> int:
+    """
+    Claim and compute tasks until the queue is empty.
+    :param queue: the work queue
+    :param all_scores: the score classes available on this node
+    :param hp_params: parameters of the scores
+    :param wait: whether to wait for the coordinator to submit the tasks, and for the tasks
+            claimed by other workers in case their lease expires. Otherwise, stop as soon as
+            there is no task to claim.
+    :param poll_interval: time (in seconds) between two looks at the queue
+    :return: the number of tasks computed
+    """
+    scores = {score_fn.__class__.__name__: score_fn for score_fn in all_scores}
+    metrics, nb_tasks = set(scores), 0
+    while True:
+        task = queue.claim(metrics)
+        if task is None:
+            if not wait or (queue.is_submitted() and queue.get_pending(metrics) == (0, 0)):
+                break
+            time.sleep(poll_interval)
+            continue
+        with queue.lease(task["id"]):
+            result = compute_task(scores[task["metric"]], task, hp_params)
+        queue.complete(task["id"], result)
+        nb_tasks += 1
+        logger.debug(f"TASK {task['id']} DONE")
+    logger.info(f"WORKER DONE : {nb_tasks} TASKS")
+    return nb_tasks
+
+
+def merge_results(
+    score_cli: ScoreCLI, queue: FileLeaseQueue, mean_max_min: bool = False
+) -> List[Tuple[str, Dict, Dict]]:
+    """
+    Gather the results of the tasks by metric, in the order of the score classes, and save
+    them in the tables of the ScoreCLI.
+    :return: the name of the score class, the scores and the times of each metric
+    """
+    merged: Dict[str, Tuple[Dict, Dict]] = {
+        score_fn.__class__.__name__: ({}, {}) for score_fn in score_cli.all_scores
+    }
+    pred_paths: Dict[str, List[str]] = {metric: [] for metric in merged}
+    for result in queue.get_results():
+        if result["target"] != score_cli.model_name or result["metric"] not in merged:
+            continue
+        if result.get("error") is not None:
+            logger.warning(f"TASK {result['id']} FAILED : {result['error']}")
+        scores, times = merged[result["metric"]]
+        scores.update(result["scores"])
+        times.update(result["times"])
+        pred_paths[result["metric"]].extend(result.get("pred_paths", []))
+    for metric, (scores, times) in merged.items():
+        # The predictions of the failed tasks have NaN scores
+        fill_filtered(scores, times, [path for path in pred_paths[metric] if path not in scores])
+    results = [(metric, scores, times) for metric, (scores, times) in merged.items() if scores]
+    score_cli.save_results(results, mean_max_min=mean_max_min)
+    return results
+
+
+def run_coordinator(
+    score_cli: ScoreCLI,
+    queue: FileLeaseQueue,
+    chunk_size: int = CHUNK_SIZE,
+    work: bool = True,
+    poll_interval: float = POLL_INTERVAL,
+) -> List[Tuple[str, Dict, Dict]]:
+    """
+    Submit the tasks of a run, compute tasks as a worker, wait for the other workers and merge
+    the results.
+    :param score_cli: the ScoreCLI of the run
+    :param queue: the work queue
+    :param chunk_size: number of predictions of a task
+    :param work: whether the coordinator also computes tasks
+    :param poll_interval: time (in seconds) between two looks at the queue
+    :return: the name of the score class, the scores and the times of each metric
+    """
+    score_cli._schedule()
+    nb_new = queue.submit(get_tasks(score_cli, chunk_size))
+    logger.info(f"{nb_new} TASKS SUBMITTED")
+    if work:
+        run_worker(queue, score_cli.all_scores, score_cli.hp_params, False, poll_interval)
+    metrics = {score_fn.__class__.__name__ for score_fn in score_cli.all_scores}
+    while True:
+        queue.reclaim()
+        nb_waiting, nb_claimed = queue.get_pending(metrics)
+        if nb_waiting + nb_claimed == 0:
+            break
+        logger.debug(f"WAITING FOR {nb_waiting} TASKS AND {nb_claimed} CLAIMED TASKS")
+        time.sleep(poll_interval)
+    return merge_results(score_cli, queue)
+
+
+def init_worker(config_path: str) -> Tuple[List[ScoreAbstract], Dict]:
+    """
+    Initialise the scores of a worker from the config of the run. The predictions are given by
+    the tasks, so they are not read.
+    :return: the scores available on this node and their parameters
+    """
+    config = ScoreCLI.convert_cli_args(config_path)
+    RUNNER.set_max_processes(config["max_processes"])
+    RUNNER.set_resources(config["max_cpus"], config["max_memory"])
+    all_scores = ScoreCLI.init_scores(config["all_scores"])
+    hp_params = config["hp_params"]
+    return all_scores, hp_params if isinstance(hp_params, dict) else ast.literal_eval(hp_params)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("role", choices=["coordinator", "worker"], help="Role of the node.")
+    parser.add_argument(
+        "--config_path", type=str, required=True, help="Path to the config.yaml of the run."
+    )
+    parser.add_argument(
+        "--queue_dir", type=str, required=True, help="Directory of the queue, on a shared disk."
+    )
+    parser.add_argument(
+        "--chunk_size", type=int, default=CHUNK_SIZE, help="Number of predictions of a task."
+    )
+    parser.add_argument(
+        "--lease_timeout",
+        type=float,
+        default=LEASE_TIMEOUT,
+        help="Time (in seconds) without heartbeat before the task of a worker is reclaimed.",
+    )
+    parser.add_argument(
+        "--poll_interval",
+        type=float,
+        default=POLL_INTERVAL,
+        help="Time (in seconds) between two looks at the queue.",
+    )
+    parser.add_argument(
+        "--no_work",
+        action="store_true",
+        help="The coordinator only submits the tasks and merges the results.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    work_queue = FileLeaseQueue(args.queue_dir, args.lease_timeout)
+    if args.role == "coordinator":
+        score_cli = ScoreCLI(**ScoreCLI.convert_cli_args(args.config_path))
+        run_coordinator(
+            score_cli, work_queue, args.chunk_size, not args.no_work, args.poll_interval
+        )
+    else:
+        worker_scores, worker_params = init_worker(args.config_path)
+        run_worker(work_queue, worker_scores, worker_params, True, args.poll_interval)
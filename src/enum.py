@@ -6,21 +6,28 @@ from typing import Dict
 
 from src.score_abstract.barnaba.score_barnaba import ScoreBarnaba
 from src.score_abstract.dfire.score_dfire import ScoreDfire
+from src.score_abstract.dfire.score_dfire_numpy import ScoreDfireNumpy
 from src.score_abstract.mcq4structures.score_mcq import ScoreMCQ
 from src.score_abstract.openstructure.qs_score import QSScore
 from src.score_abstract.openstructure.score_lddt import ScorelDDT
 from src.score_abstract.openstructure.tm_score import TMScore
 from src.score_abstract.rasp.score_rasp import ScoreRASP
 from src.score_abstract.rs_rnasp.score_rs_rnasp import ScoreRsRNASP
+from src.score_abstract.rs_rnasp.score_rs_rnasp_numpy import ScoreRsRNASPNumpy
 from src.score_abstract.score_rna_assessment.score_clash import ScoreClash
 from src.score_abstract.score_rna_assessment.score_di import ScoreDI
 from src.score_abstract.score_rna_assessment.score_inf import ScoreINF
 from src.score_abstract.score_rna_assessment.score_p_value import ScorePValue
 from src.score_abstract.score_rna_assessment.score_rmsd import ScoreRMSD
 from src.score_abstract.score_voronota.score_cad import ScoreCAD
-from src.score_abstract.score_zhanggroup.tm_gdt_scores import GdtScores
+from src.score_abstract.score_zhanggroup.tm_gdt_scores import (
+    GdtHaScores,
+    GdtScores,
+    TMScoreZhang,
+)
 from src.score_abstract.mcq4structures.score_mcq_lcs import ScoreMCQLCS
 from src.score_abstract.cgrnasp.score_cgrnasp import ScoreCGRNASP
+from src.score_abstract.cgrnasp.score_cgrnasp_numpy import ScoreCGRNASPNumpy
 from src.score_abstract.tb_mcq.score_tb_mcq import ScoreTBMCQ
 from src.score_abstract.score_zhanggroup.tm_score_us import TMScoreUS
 
@@ -31,18 +38,23 @@ CONVERT_NAME_TO_SCORING_CLASS: Dict = {
     "DI": ScoreDI,
     "MCQ": ScoreMCQ,
     "GDT-TS": GdtScores,
+    "GDT-HA": GdtHaScores,
+    "TM-SCORE (TMSCORE)": TMScoreZhang,
     "CAD": ScoreCAD,
     "RASP": ScoreRASP,
     "CLASH": ScoreClash,
     "BARNABA": ScoreBarnaba,
     "DFIRE": ScoreDfire,
     "rsRNASP": ScoreRsRNASP,
+    "DFIRE (NUMPY)": ScoreDfireNumpy,
+    "rsRNASP (NUMPY)": ScoreRsRNASPNumpy,
     "lDDT": ScorelDDT,
     "TM-SCORE (OST)": TMScore,
     "TM-SCORE": TMScoreUS,
     "QS-SCORE": QSScore,
     "LCS-TA": ScoreMCQLCS,
     "CGRNASP": ScoreCGRNASP,
+    "CGRNASP (NUMPY)": ScoreCGRNASPNumpy,
     "TB-MCQ": ScoreTBMCQ,
 }
 LIST_ALL_METRICS = [
@@ -61,5 +73,16 @@ LIST_ALL_METRICS = [
     "LCS-TA",
 ]
 LIST_ALL_ENERGIES = ["BARNABA", "DFIRE", "rsRNASP", "RASP", "CGRNASP", "TB-MCQ"]
+# Scores only computed when they are asked by name: they are not in `ALL`.
+# GDT-HA and TM-SCORE (TMSCORE) are kept out to leave the columns of `ALL` unchanged.
+OPT_IN_SCORES = [
+    "DFIRE (NUMPY)",
+    "rsRNASP (NUMPY)",
+    "CGRNASP (NUMPY)",
+    "GDT-HA",
+    "TM-SCORE (TMSCORE)",
+]
+LIST_ALL_SCORES = [name for name in CONVERT_NAME_TO_SCORING_CLASS if name not in OPT_IN_SCORES]
+# The baRNAba scores are batched over the decoys, so they stay in the quick scenario
 DECOYS_LIMITED = ["DFIRE", "BARNABA"]
 DISTINCT_METRICS = ["DI", "GDT-TS", "MCQ"]
@@ -0,0 +1,173 @@
+"""
+Scoring of several targets in one process. The score classes (with their loaded models and
+resolved tools) are built once and shared by all the targets, which are computed one after
+the other.
+
+The manifest is a .csv or .yaml file with one entry per target:
+    target           name of the target (default to the name of the native structure)
+    native_path      path to the native structure
+    pred_path        directory of the predictions, or path to a prediction or a trajectory
+    topology_path    (optional) topology of the trajectory
+    params           (optional) parameters of the scores for this target, added to `PARAMS`
+
+Example:
+    python -m src.manifest --manifest_path targets.csv --out_dir results --config_path config.yaml
+"""
+
+import argparse
+import ast
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from src.rnadvisor_cli import ScoreCLI
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.utils import read_yaml_to_dict
+
+# Name of the consolidated table of all the targets, in the output directory
+LONG_TABLE_NAME = "scores_long.csv"
+
+
+def read_manifest(manifest_path: str) -> List[Dict]:
+    """
+    Read the targets of a manifest.
+    :param manifest_path: a .csv file with a row per target, or a .yaml file with a list of
+            targets (either at the root or under `TARGETS`)
+    :return: the targets, with their name, native, predictions and parameters
+    """
+    if manifest_path.endswith((".yaml", ".yml")):
+        content = read_yaml_to_dict(manifest_path)
+        targets = content.get("TARGETS", []) if isinstance(content, dict) else content
+    else:
+        targets = pd.read_csv(manifest_path, dtype=str).to_dict("records")
+    manifest = []
+    for target in targets:
+        target = {key.lower(): value for key, value in target.items() if not pd.isna(value)}
+        if "native_path" not in target or "pred_path" not in target:
+            raise ValueError(f"MANIFEST ENTRY WITHOUT native_path OR pred_path : {target}")
+        params = target.get("params", {})
+        manifest.append(
+            {
+                "target": target.get(
+                    "target", os.path.splitext(os.path.basename(target["native_path"]))[0]
+                ),
+                "native_path": target["native_path"],
+                "pred_path": target["pred_path"],
+                "topology_path": target.get("topology_path", None),
+                "params": ast.literal_eval(params) if isinstance(params, str) else params,
+            }
+        )
+    names = [target["target"] for target in manifest]
+    if len(set(names)) != len(names):
+        raise ValueError("TARGET NAMES OF THE MANIFEST ARE NOT UNIQUE")
+    return manifest
+
+
+def to_long_format(score_df: pd.DataFrame, target: str) -> pd.DataFrame:
+    """
+    Convert the scores of a target to one row per (prediction, metric).
+    :param score_df: the scores, with one row per prediction
+    :param target: name of the target
+    :return: a dataframe with the columns `target`, `decoy`, `metric` and `value`
+    """
+    long_df = score_df.rename_axis("decoy").reset_index()
+    long_df = long_df.melt(id_vars="decoy", var_name="metric", value_name="value")
+    long_df.insert(0, "target", target)
+    return long_df
+
+
+def run_manifest(
+    manifest_path: str,
+    out_dir: str,
+    all_scores: List[ScoreAbstract],
+    config: Optional[Dict] = None,
+) -> pd.DataFrame:
+    """
+    Compute the scores of all the targets, with the same score instances.
+    :param manifest_path: path to the manifest
+    :param out_dir: directory where the tables of each target (`<target>/results.csv`,
+            `<target>/times.csv`) and the consolidated table are written
+    :param all_scores: the score instances shared by all the targets
+    :param config: the other parameters of ScoreCLI (normalisation, sort, processes...),
+            used for all the targets
+    :return: the scores of all the targets in long format
+    """
+    config = {} if config is None else config
+    manifest = read_manifest(manifest_path)
+    base_params = config.get("hp_params", {})
+    base_params = ast.literal_eval(base_params) if isinstance(base_params, str) else base_params
+    all_scores = ScoreCLI.init_scores(all_scores)
+    long_dfs = []
+    for index, target in enumerate(manifest):
+        target_dir = os.path.join(out_dir, target["target"])
+        os.makedirs(target_dir, exist_ok=True)
+        target_config = {
+            **config,
+            "pred_path": target["pred_path"],
+            "native_path": target["native_path"],
+            "topology_path": target["topology_path"],
+            "result_path": os.path.join(target_dir, "results.csv"),
+            "time_path": os.path.join(target_dir, "times.csv"),
+            "log_path": os.path.join(target_dir, "out.log"),
+            "hp_params": {**base_params, **target["params"]},
+            "all_scores": all_scores,
+        }
+        try:
+            score_cli = ScoreCLI(**target_config)
+            score_df = score_cli.compute_scores()
+        except FileNotFoundError as e:
+            logger.error(f"TARGET {target['target']} SKIPPED : {e}")
+            continue
+        logger.info(f"TARGET {index + 1}/{len(manifest)} DONE : {target['target']}")
+        long_dfs.append(to_long_format(score_df, target["target"]))
+    long_df = pd.concat(long_dfs, ignore_index=True) if len(long_dfs) > 0 else pd.DataFrame()
+    long_path = os.path.join(out_dir, LONG_TABLE_NAME)
+    long_df.to_csv(long_path, index=False)
+    logger.success(f"SCORES OF {len(long_dfs)} TARGETS SAVED AT {long_path}")
+    return long_df
+
+
+def get_config(config_path: Optional[str], all_scores: str = "ALL") -> Dict:
+    """
+    Return the parameters of ScoreCLI shared by all the targets. The paths of the config
+    (predictions, native and outputs) are replaced by the ones of each target.
+    :param config_path: path to the config.yaml of the run
+    :param all_scores: scores to compute, separated by a comma (only used without config_path)
+    """
+    if config_path is None:
+        return ScoreCLI.convert_cli_args_scores(all_scores)
+    config = ScoreCLI.convert_cli_args(config_path)
+    for key in ["pred_path", "native_path", "result_path", "time_path", "log_path"]:
+        config.pop(key, None)
+    return config
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--manifest_path", type=str, required=True, help="Path to the .csv or .yaml manifest."
+    )
+    parser.add_argument(
+        "--out_dir", type=str, required=True, help="Directory where to store the tables."
+    )
+    parser.add_argument(
+        "--config_path",
+        type=str,
+        default=None,
+        help="Path to the config.yaml with the scores and parameters used for all the targets.",
+    )
+    parser.add_argument(
+        "--all_scores",
+        type=str,
+        default="ALL",
+        help="Scores to compute, separated by a comma (only used without config_path).",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    run_config = get_config(args.config_path, args.all_scores)
+    run_manifest(args.manifest_path, args.out_dir, run_config.pop("all_scores"), run_config)
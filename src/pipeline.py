@@ -0,0 +1,148 @@
+"""
+Pipeline of the ingestion of the predictions. The discovery of the files and each stage
+(conversion from .cif, normalisation, parsing) run in their own thread on different
+predictions, linked by bounded queues, while the predictions already processed are scored.
+A stage waits when its output queue is full (back-pressure), so the predictions are not read
+much faster than they are scored, and the first results do not wait for all the inputs.
+"""
+
+import os
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Maximum number of predictions waiting between two stages
+QUEUE_SIZE = 32
+# Maximum number of predictions scored together
+BATCH_SIZE = 16
+# Time (in seconds) between two checks of the stop of the pipeline by a waiting thread
+WAIT_INTERVAL = 0.1
+
+# Marker of the end of a queue
+_END = object()
+
+
+def iter_pred_dir(pred_dir: str) -> Iterator[str]:
+    """Yield the paths of the .pdb and .cif files of a directory, while it is read."""
+    with os.scandir(pred_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith((".pdb", ".cif")):
+                yield entry.path
+
+
+class Pipeline:
+    def __init__(
+        self,
+        source: Iterable,
+        stages: List[Tuple[str, Callable[[Any], Any]]],
+        queue_size: int = QUEUE_SIZE,
+    ):
+        """
+        Pipeline of stages applied to the items of a source.
+        :param source: the items (e.g. the paths of the predictions), iterated in a thread
+        :param stages: the name and the function of each stage, applied to each item in the
+                thread of the stage. An item is dropped if the function returns None.
+        :param queue_size: maximum number of items waiting between two stages
+        """
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+
+    def _fail(self, error: BaseException):
+        """Stop all the stages after the error of one of them."""
+        if self.error is None:
+            self.error = error
+        self._stop.set()
+
+    def _put(self, out_queue: queue.Queue, item: Any) -> bool:
+        """Wait for a free place in the queue, unless the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=WAIT_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, in_queue: queue.Queue) -> Any:
+        """Wait for the next item of the queue, or the end if the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                return in_queue.get(timeout=WAIT_INTERVAL)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _run_source(self, out_queue: queue.Queue):
+        try:
+            for item in self.source:
+                if not self._put(out_queue, item):
+                    return None
+        except Exception as e:
+            self._fail(e)
+        self._put(out_queue, _END)
+
+    def _run_stage(self, function: Callable, in_queue: queue.Queue, out_queue: queue.Queue):
+        while True:
+            item = self._get(in_queue)
+            if item is _END:
+                break
+            try:
+                item = function(item)
+            except Exception as e:
+                self._fail(e)
+                break
+            if item is not None and not self._put(out_queue, item):
+                return None
+        self._put(out_queue, _END)
+
+    def _start(self) -> queue.Queue:
+        """Start the threads of the source and the stages, and return the last queue."""
+        self._stop.clear()
+        self.error = None
+        out_queue: queue.Queue = queue.Queue(self.queue_size)
+        threads = [threading.Thread(target=self._run_source, args=(out_queue,), name="source")]
+        for name, function in self.stages:
+            in_queue, out_queue = out_queue, queue.Queue(self.queue_size)
+            threads.append(
+                threading.Thread(
+                    target=self._run_stage, args=(function, in_queue, out_queue), name=name
+                )
+            )
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        return out_queue
+
+    def iter_batches(self, batch_size: int = BATCH_SIZE) -> Iterator[List]:
+        """
+        Run the pipeline and yield the processed items by batches. A batch is yielded as soon
+        as no other item is ready, so the first items do not wait for a full batch, and the
+        next batches grow while the previous ones are consumed.
+        :param batch_size: maximum number of items of a batch
+        :return: the batches of processed items, in the order of the source
+        """
+        out_queue = self._start()
+        try:
+            ended = False
+            while not ended:
+                item = self._get(out_queue)
+                if item is _END:
+                    break
+                batch = [item]
+                while len(batch) < batch_size:
+                    try:
+                        item = out_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _END:
+                        ended = True
+                        break
+                    batch.append(item)
+                yield batch
+        finally:
+            self._stop.set()
+        if self.error is not None:
+            raise self.error
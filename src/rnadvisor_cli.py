@@ -4,8 +4,10 @@ import argparse
 import ast
 import os.path
 import sys
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -17,10 +19,30 @@ from src.enum import (
     CONVERT_NAME_TO_SCORING_CLASS,
     LIST_ALL_METRICS,
     LIST_ALL_ENERGIES,
+    LIST_ALL_SCORES,
     DECOYS_LIMITED,
     DISTINCT_METRICS,
 )
 from src.score_abstract.score_abstract import ScoreAbstract
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+from src.tool_runner import RUNNER
+from src.budget import (
+    FAST_BACKENDS,
+    SKIPPED_COLUMN,
+    TimeBudget,
+    get_skipped,
+    plan_metric,
+)
+from src.cascade import CascadeStage, fill_filtered, read_cascade
+from src.decoy_context import DecoyContext
+from src.dedup import fan_out, group_duplicates
+from src.pipeline import BATCH_SIZE, Pipeline, iter_pred_dir
+from src.watch import DirectoryWatcher
+from src.tools import ToolNotFoundError
+from src.structure_store import SharedScorer
+from src.scheduler import CostModel, get_costs_path, get_nb_atoms, order_by_cost, predict_run_time
+from src.tracing import TRACER
+from src.trajectory import TrajectorySource
 from src.utils import read_yaml_to_dict, convert_cif_to_pdb
 
 
@@ -37,6 +59,22 @@ class ScoreCLI:
         verbose: bool = False,
         log_path: Optional[str] = "out.log",
         hp_params: str = "{}",
+        topology_path: Optional[str] = None,
+        max_processes: Optional[Union[int, Dict]] = None,
+        max_cpus: Optional[int] = None,
+        max_memory: Optional[Union[int, str]] = None,
+        trace_path: Optional[str] = None,
+        cost_paths: Optional[Union[List[str], str]] = None,
+        cascade: Optional[Union[str, List[Dict]]] = None,
+        dedup: bool = False,
+        dedup_rmsd: Optional[float] = None,
+        watch: bool = False,
+        watch_timeout: Optional[float] = None,
+        pipeline: bool = False,
+        pipeline_batch: int = BATCH_SIZE,
+        nb_workers: int = 1,
+        decoy_major: bool = False,
+        time_budget: Optional[float] = None,
         *args,
         **kwargs,
     ):
@@ -53,17 +91,158 @@ class ScoreCLI:
         :param verbose: whether to print the logs or not
         :param log_path: path where are stored the different logs
         :param hp_params: parameters to add to the computation of the different scoring functions/metrics
+        :param topology_path: path to the topology of the trajectory given in pred_path.
+                Default to the native structure. Not used for multi-model .pdb files.
+        :param max_processes: maximum number of external binaries running at the same time.
+                Either a number for all the tools, or a dictionary with a number per tool.
+        :param max_cpus: number of CPU threads shared by the external binaries. Each tool
+                declares the threads of one process. Default to the number of CPUs.
+        :param max_memory: memory (in MB, or with a unit like `16G`) shared by the external
+                binaries. Each tool declares the memory of one process. Default to the
+                physical memory.
+        :param trace_path: path to a .json file where to store the trace of the run (the time
+                spent in each stage). A Chrome trace is stored next to it.
+        :param cost_paths: time tables of previous runs, used to learn the time of each metric
+                and to order the predictions from the longest. Default to `time_path`.
+        :param cascade: stages of scores, where each stage only scores the best predictions
+                of the previous one (see `src.cascade`). None to compute all the scores on
+                all the predictions.
+        :param dedup: whether to only score once the predictions with the same atoms and
+                coordinates (after normalisation). The scores are copied to the duplicates.
+        :param dedup_rmsd: RMSD (in Angstrom) under which two predictions with the same atoms
+                are also duplicates. It enables the deduplication.
+        :param watch: whether to score the predictions while they are written in the
+                directory `pred_path`, until the sentinel file `DONE` is written in it. It can
+                not be used with a cascade, a deduplication or a time budget.
+        :param watch_timeout: time (in seconds) without new prediction before the end of the
+                watch mode. None to only stop with the sentinel file.
+        :param pipeline: whether to convert, normalise and parse the next predictions of the
+                directory `pred_path` while the current ones are scored. It can not be used
+                with a cascade, a deduplication or a time budget.
+        :param pipeline_batch: maximum number of predictions scored together by the pipeline
+                and the watch mode
+        :param nb_workers: number of processes computing the scores with in-memory support
+                (only the NumPy potentials). The structures are parsed once and shared with the
+                processes through shared memory. 1 to compute them in this process.
+        :param decoy_major: whether to compute the scores with context support prediction by
+                prediction, sharing the parsed data of each prediction (see
+                `src.decoy_context`). It can not be used with a cascade, a time budget or a
+                trajectory.
+        :param time_budget: wall-clock time (in seconds) of the run. The cells (metric,
+                prediction) that can end in time are planned from the first score of
+                `all_scores`, and the results are saved before the deadline (see
+                `src.budget`). It can not be used with a cascade or a trajectory. None for no
+                limit.
         """
+        self._check_modes(
+            watch,
+            pipeline,
+            cascade is not None,
+            dedup or dedup_rmsd is not None,
+            time_budget,
+            decoy_major,
+        )
+        self.time_budget = TimeBudget(time_budget) if time_budget is not None else None
         self._init_logger(verbose, log_path)
+        RUNNER.set_max_processes(max_processes)
+        RUNNER.set_resources(max_cpus, max_memory)
+        self.trace_path = trace_path
+        TRACER.reset(keep_events=trace_path is not None)
         self.normalise = normalise
-        self.pred_path, self.model_name = self._init_pred_path(pred_path)
+        self.watch_dir, self.watch_timeout = (pred_path if watch else None), watch_timeout
+        self.traj_source = (
+            None if watch else self._init_traj_source(pred_path, topology_path, native_path)
+        )
+        for option, is_used in [
+            ("TIME BUDGET", time_budget is not None),
+            ("DECOY MAJOR", decoy_major),
+        ]:
+            if is_used and self.traj_source is not None:
+                raise ValueError(f"{option} NOT COMPATIBLE WITH A TRAJECTORY")
+        self._frame_paths: Optional[Dict[str, str]] = None
+        self.pipeline_dir = self._init_pipeline_dir(pred_path, pipeline and not watch)
+        self.pipeline_batch = pipeline_batch
+        self._native_atoms: Optional[Tuple] = None
+        self.pred_path: List[str] = []
+        if watch or self.pipeline_dir is not None:
+            # The predictions are read while they are scored
+            os.makedirs(pred_path, exist_ok=True)
+            self.model_name = os.path.basename(pred_path)
+        elif self.traj_source is None:
+            self.pred_path, self.model_name = self._init_pred_path(pred_path)
+        else:
+            self.model_name = os.path.basename(pred_path)
+        # Order of the rows of the tables, as the predictions are reordered by `_schedule`
+        self.input_order = [os.path.basename(path) for path in self.pred_path]
         self.native_path = self._init_native_path(native_path)
+        self.duplicates: Dict[str, List[str]] = {}
+        if dedup or dedup_rmsd is not None:
+            if self.traj_source is None:
+                self.duplicates = group_duplicates(self.pred_path, dedup_rmsd)
+                self.pred_path = list(self.duplicates)
+            else:
+                logger.warning("DEDUPLICATION NOT USED WITH A TRAJECTORY")
         self.result_path = self._init_result_path(result_path)
         self.all_scores = self.init_scores(all_scores)
         self.sort_by = sort_by
         self.time_path = time_path
         self.log_path = log_path
         self.hp_params = self._init_hp_params(hp_params)
+        self.cost_model = self._init_cost_model(cost_paths)
+        self.cascade = read_cascade(cascade)
+        self.shared_scorer = self._init_shared_scorer(nb_workers)
+        self.decoy_major = decoy_major
+
+    def _init_shared_scorer(self, nb_workers: int) -> Optional[SharedScorer]:
+        """
+        Start the worker processes of the scores with `memory_support`. Only the experimental
+        NumPy potentials support it for now, so the workers are not used without them.
+        :param nb_workers: number of worker processes
+        """
+        if nb_workers <= 1:
+            return None
+        if not any(score_fn.memory_support for score_fn in self.all_scores):
+            logger.warning("NB_WORKERS NOT USED : ONLY THE NUMPY POTENTIALS USE THE WORKERS")
+            return None
+        return SharedScorer(nb_workers)
+
+    @staticmethod
+    def _check_modes(
+        watch: bool,
+        pipeline: bool,
+        cascade: bool,
+        dedup: bool,
+        time_budget: Optional[float],
+        decoy_major: bool = False,
+    ):
+        """
+        Raise an error if the options of the run can not be used together. The watch and
+        pipeline modes score the predictions while they are read, so they can not use the
+        options that need all the predictions first. The cascade and the time budget choose
+        the predictions of each score, so they can not compute the predictions one by one.
+        :param watch: whether the watch mode is asked
+        :param pipeline: whether the pipeline is asked
+        :param cascade: whether a cascade is given
+        :param dedup: whether the deduplication is asked
+        :param time_budget: the time budget of the run
+        :param decoy_major: whether the scores are computed prediction by prediction
+        """
+        if time_budget is not None and cascade:
+            raise ValueError("TIME BUDGET NOT COMPATIBLE WITH A CASCADE")
+        if decoy_major and (cascade or time_budget is not None):
+            mode = "A CASCADE" if cascade else "A TIME BUDGET"
+            raise ValueError(f"DECOY MAJOR NOT COMPATIBLE WITH {mode}")
+        options = {
+            "CASCADE": cascade,
+            "DEDUPLICATION": dedup,
+            "TIME_BUDGET": time_budget is not None,
+        }
+        incompatible = [name for name, is_used in options.items() if is_used]
+        if len(incompatible) == 0:
+            return None
+        for mode, is_used in [("WATCH", watch), ("PIPELINE", pipeline)]:
+            if is_used:
+                raise ValueError(f"{mode} MODE NOT COMPATIBLE WITH : {', '.join(incompatible)}")
 
     def _init_hp_params(self, hp_params: Union[Dict, str]) -> Dict:
         """
@@ -77,6 +256,19 @@ class ScoreCLI:
             dict_params = hp_params
         return dict_params
 
+    def _init_cost_model(self, cost_paths: Optional[Union[List[str], str]]) -> CostModel:
+        """
+        Learn the time of each metric from the previous runs.
+        :param cost_paths: time tables of previous runs, separated by a comma if it comes from
+                the command line. Default to `time_path`.
+        """
+        if cost_paths is None:
+            cost_paths = [self.time_path] if self.time_path is not None else []
+        elif isinstance(cost_paths, str):
+            cost_paths = cost_paths.split(",")
+        names = {name: cls.__name__ for name, cls in CONVERT_NAME_TO_SCORING_CLASS.items()}
+        return CostModel.from_time_paths(cost_paths, self.pred_path, names)
+
     def _init_logger(self, verbose: bool, log_path: Optional[str]):
         """
         Initialise the logger parameters.
@@ -101,7 +293,8 @@ class ScoreCLI:
         os.makedirs(dirname, exist_ok=True)
         if type(input_path) is str:
             new_path = os.path.join(dirname, "normalized_" + os.path.basename(input_path))
-            output = self.normalize_structure(input_path, new_path)
+            with TRACER.span("normalise", os.path.basename(input_path)):
+                output = self.normalize_structure(input_path, new_path)
             new_path = new_path if output else input_path
             return new_path
         else:
@@ -124,7 +317,23 @@ class ScoreCLI:
         """
         if all_scores is None:
             raise NotImplementedError("NO SCORES TO OUTPUT")
-        return all_scores
+        return [score for score in all_scores if ScoreCLI._check_tools(score)]
+
+    @staticmethod
+    def _check_tools(score_fn: ScoreAbstract) -> bool:
+        """
+        Check once that the binaries of a score can be executed.
+        :param score_fn: the score to check
+        :return: False if a binary is missing, so the whole metric is skipped
+        """
+        if not hasattr(score_fn, "check_tools"):
+            return True
+        try:
+            score_fn.check_tools()
+        except ToolNotFoundError as e:
+            logger.error(f"{score_fn.__class__.__name__} SKIPPED : {e}")
+            return False
+        return True
 
     def _init_result_path(self, result_path: Optional[str]) -> Optional[str]:
         """
@@ -195,6 +404,35 @@ class ScoreCLI:
             new_paths.append(new_path)
         return new_paths
 
+    def _init_traj_source(
+        self, pred_path: str, topology_path: Optional[str], native_path: str
+    ) -> Optional[TrajectorySource]:
+        """
+        Initialise the source of frames if the predictions are a multi-model .pdb file or a
+        trajectory.
+        :param pred_path: directory to .pdb files, path to a .pdb file or to a trajectory
+        :param topology_path: path to the topology of the trajectory. Default to the native.
+        :param native_path: path to the native structure
+        :return: a TrajectorySource if the predictions are frames, None otherwise.
+        """
+        if pred_path is None or not TrajectorySource.is_trajectory(pred_path):
+            return None
+        topology_path = native_path if topology_path is None else topology_path
+        logger.info(f"PREDICTIONS READ AS FRAMES OF {pred_path}")
+        return TrajectorySource(pred_path, topology_path)
+
+    def _init_pipeline_dir(self, pred_path: Optional[str], pipeline: bool) -> Optional[str]:
+        """
+        Return the directory of the predictions read by the pipeline, or None without pipeline.
+        :param pred_path: directory to .pdb files or path to a .pdb file
+        :param pipeline: whether the pipeline is asked
+        """
+        if not pipeline or self.traj_source is not None:
+            return None
+        if pred_path is None or not os.path.isdir(pred_path):
+            return None
+        return pred_path
+
     def _init_pred_path(self, pred_path: str) -> Tuple[List[str], str]:
         """
         Initialise the path for the different predictions.
@@ -276,6 +514,75 @@ class ScoreCLI:
             default=True,
             help="If you want to remove the normalisation process on the .pdb files.",
         )
+        parser.add_argument(
+            "--dedup",
+            dest="dedup",
+            action="store_true",
+            default=False,
+            help="Only score once the predictions with the same coordinates.",
+        )
+        parser.add_argument(
+            "--dedup_rmsd",
+            dest="dedup_rmsd",
+            default=None,
+            type=float,
+            help="RMSD (in Angstrom) under which two predictions are duplicates "
+            "(enables the deduplication).",
+        )
+        parser.add_argument(
+            "--watch",
+            dest="watch",
+            action="store_true",
+            default=False,
+            help="Score the predictions while they are written in pred_path, until a DONE "
+            "file is written in it.",
+        )
+        parser.add_argument(
+            "--watch_timeout",
+            dest="watch_timeout",
+            default=None,
+            type=float,
+            help="Time (in seconds) without new prediction before the end of the watch mode.",
+        )
+        parser.add_argument(
+            "--pipeline",
+            dest="pipeline",
+            action="store_true",
+            default=False,
+            help="Convert, normalise and parse the next predictions while the current ones "
+            "are scored.",
+        )
+        parser.add_argument(
+            "--pipeline_batch",
+            dest="pipeline_batch",
+            default=BATCH_SIZE,
+            type=int,
+            help="Maximum number of predictions scored together by the pipeline.",
+        )
+        parser.add_argument(
+            "--nb_workers",
+            dest="nb_workers",
+            default=1,
+            type=int,
+            help="Number of processes computing the NumPy potentials, that share the parsed "
+            "structures through shared memory.",
+        )
+        parser.add_argument(
+            "--decoy_major",
+            dest="decoy_major",
+            action="store_true",
+            default=False,
+            help="Compute the Python scores prediction by prediction, sharing the parsed "
+            "structures of each prediction between the scores.",
+        )
+        parser.add_argument(
+            "--time_budget",
+            dest="time_budget",
+            default=None,
+            type=float,
+            help="Wall-clock time (in seconds) of the run. The scores that can end in time are "
+            "computed (the first scores first), and the results are saved before the deadline.",
+        )
         parser.add_argument(
             "--config_path",
             dest="config_path",
@@ -318,19 +625,81 @@ class ScoreCLI:
             type=str,
             help="Parameters for the different metrics/scoring functions",
         )
+        parser.add_argument(
+            "--topology_path",
+            dest="topology_path",
+            default=None,
+            type=str,
+            help="Path to the topology of the trajectory given in pred_path "
+            "(default to the native structure).",
+        )
+        parser.add_argument(
+            "--max_processes",
+            dest="max_processes",
+            default=None,
+            type=int,
+            help="Maximum number of external binaries running at the same time for each tool "
+            "(default to the number of CPUs).",
+        )
+        parser.add_argument(
+            "--max_cpus",
+            dest="max_cpus",
+            default=None,
+            type=int,
+            help="Number of CPU threads shared by the external binaries "
+            "(default to the number of CPUs).",
+        )
+        parser.add_argument(
+            "--max_memory",
+            dest="max_memory",
+            default=None,
+            type=str,
+            help="Memory shared by the external binaries, in MB or with a unit like 16G "
+            "(default to the physical memory).",
+        )
+        parser.add_argument(
+            "--trace_path",
+            dest="trace_path",
+            default=None,
+            type=str,
+            help="Path to a .json file where to store the time spent in each stage of the run "
+            "(a Chrome trace is stored next to it).",
+        )
+        parser.add_argument(
+            "--cascade",
+            dest="cascade",
+            default=None,
+            type=str,
+            help="Stages of scores, where each stage only scores the best predictions of the "
+            "previous one. For example: "
+            "[{'SCORES': ['CLASH', 'RMSD'], 'KEEP': '20%%', 'SORT_BY': 'RMSD'}, "
+            "{'SCORES': ['CAD']}]",
+        )
+        parser.add_argument(
+            "--cost_paths",
+            dest="cost_paths",
+            default=None,
+            type=str,
+            help="Time tables of previous runs separated by a comma, used to predict the time "
+            "of each metric and to start with the longest tasks (default to time_path).",
+        )
         return parser.parse_args()
 
     @staticmethod
-    def convert_cli_scores(all_scores: Optional[Union[str, List]]) -> List[ScoreAbstract]:
+    def convert_cli_scores(
+        all_scores: Optional[Union[str, List]], bin_paths: Optional[Dict] = None
+    ) -> List[ScoreAbstract]:
         """
         Convert command line arguments to a list of score instances
         :param all_scores: "ALL", "METRICS", "ENERGIES", or specific scores separated by a comma
+        :param bin_paths: paths to the binaries given to the score classes (see `get_bin_paths`)
         :return: List of instantiate scores
         """
+        bin_paths = {key: value for key, value in (bin_paths or {}).items() if value is not None}
         all_scores_class = []
         all_scores = "ALL" if all_scores is None else all_scores
         score_conversion = {
-            "ALL": list(CONVERT_NAME_TO_SCORING_CLASS.keys()),
+            "ALL": LIST_ALL_SCORES,
             "METRICS": LIST_ALL_METRICS,
             "ENERGIES": LIST_ALL_ENERGIES,
             "FULL_DECOYS": LIST_ALL_ENERGIES,
@@ -362,7 +731,7 @@ class ScoreCLI:
         for score_n in all_scores_split:
             if score_n in CONVERT_NAME_TO_SCORING_CLASS:
                 all_scores_class.append(
-                    CONVERT_NAME_TO_SCORING_CLASS.get(score_n)()  # type: ignore
+                    CONVERT_NAME_TO_SCORING_CLASS.get(score_n)(**bin_paths)  # type: ignore
                 )
         return all_scores_class
 
@@ -373,10 +742,24 @@ class ScoreCLI:
         :param all_scores: names of the scores to use separated by a comma. It can also be `ALL`.
         :return: dictionary with the parameters to initialise the class.
         """
+        if kwargs.get("cascade") is not None:
+            all_scores = ",".join(ScoreCLI.get_cascade_scores(kwargs["cascade"]))
         all_scores_class = ScoreCLI.convert_cli_scores(all_scores)
         arguments = {**kwargs, **{"all_scores": all_scores_class}}
         return arguments
 
+    @staticmethod
+    def get_cascade_scores(cascade: Union[str, List[Dict]]) -> List[str]:
+        """
+        Return the names of the scores of all the stages of a cascade.
+        :param cascade: the stages of the cascade
+        :return: the names of the scores, in the order of the stages
+        """
+        all_scores: List[str] = []
+        for stage in read_cascade(cascade):  # type: ignore
+            all_scores.extend(name for name in stage.scores if name not in all_scores)
+        return all_scores
+
     @staticmethod
     def get_bin_paths(yaml_content: Dict) -> Dict:
         """
@@ -399,6 +782,14 @@ class ScoreCLI:
         rasp_bin_path = bin_paths.get("RASP", None)
         # Path to the rsRNASP binary file
         rs_rnasp_bin_path = bin_paths.get("rsRNASP", None)
+        # Path to the US-align binary file
+        zhang_bin_path_us = bin_paths.get("ZHANG_GROUP_US", None)
+        # Path to the directory of the cgRNASP binaries
+        cgrnasp_bin_path = bin_paths.get("CGRNASP", None)
+        # Path to the voronota-cadscore binary file
+        cad_bin_path = bin_paths.get("VORONOTA", None)
+        # Path to the ost binary file of OpenStructure
+        ost_bin_path = bin_paths.get("OST", None)
         return {
             "mc_annotate_bin": mc_annotate_bin,
             "zhang_bin_path": zhang_bin_path,
@@ -406,6 +797,10 @@ class ScoreCLI:
             "mcq_bin_path": mcq_bin_path,
             "rasp_bin_path": rasp_bin_path,
             "rs_rnasp_bin_path": rs_rnasp_bin_path,
+            "zhang_bin_path_us": zhang_bin_path_us,
+            "cgrnasp_bin_path": cgrnasp_bin_path,
+            "cad_bin_path": cad_bin_path,
+            "ost_bin_path": ost_bin_path,
         }
 
     @staticmethod
@@ -431,9 +826,24 @@ class ScoreCLI:
             score_hp.get("PARAMS", {}),
         )
         normalise, sort_by = score_hp.get("NORMALISATION", True), score_hp.get("SORT_BY", None)
+        topology_path = score_hp.get("TOPOLOGY_PATH", None)
+        max_processes = score_hp.get("MAX_PROCESSES", None)
+        max_cpus, max_memory = score_hp.get("MAX_CPUS", None), score_hp.get("MAX_MEMORY", None)
+        trace_path = score_hp.get("TRACE_PATH", None)
+        cost_paths = score_hp.get("COST_PATHS", None)
+        cascade = score_hp.get("CASCADE", None)
+        dedup, dedup_rmsd = score_hp.get("DEDUPLICATION", False), score_hp.get("DEDUP_RMSD", None)
+        watch, watch_timeout = score_hp.get("WATCH", False), score_hp.get("WATCH_TIMEOUT", None)
+        pipeline = score_hp.get("PIPELINE", False)
+        pipeline_batch = score_hp.get("PIPELINE_BATCH", BATCH_SIZE)
+        nb_workers = score_hp.get("NB_WORKERS", 1)
+        decoy_major = score_hp.get("DECOY_MAJOR", False)
+        time_budget = score_hp.get("TIME_BUDGET", None)
         all_scores = score_hp.get("ALL_SCORES", None)
+        if cascade is not None:
+            all_scores = ScoreCLI.get_cascade_scores(cascade)
         bin_paths = ScoreCLI.get_bin_paths(yaml_content)
-        all_scores = ScoreCLI.convert_cli_scores(all_scores)
+        all_scores = ScoreCLI.convert_cli_scores(all_scores, bin_paths)
         config = {
             "pred_path": pred_path,
             "native_path": native_path,
@@ -445,6 +855,22 @@ class ScoreCLI:
             "verbose": verbose,
             "log_path": log_path,
             "hp_params": hp_params,
+            "topology_path": topology_path,
+            "max_processes": max_processes,
+            "max_cpus": max_cpus,
+            "max_memory": max_memory,
+            "trace_path": trace_path,
+            "cost_paths": cost_paths,
+            "cascade": cascade,
+            "dedup": dedup,
+            "dedup_rmsd": dedup_rmsd,
+            "watch": watch,
+            "watch_timeout": watch_timeout,
+            "pipeline": pipeline,
+            "pipeline_batch": pipeline_batch,
+            "nb_workers": nb_workers,
+            "decoy_major": decoy_major,
+            "time_budget": time_budget,
         }
         config = {**bin_paths, **config}
         return config
@@ -462,19 +888,343 @@ class ScoreCLI:
                 c_times += value
         logger.debug(f"TIME SPEND FOR {names} : {round(c_times, 5)} seconds")
 
-    def compute_scores(self, mean_max_min: bool = False):
+    def compute_scores(self, mean_max_min: bool = False) -> pd.DataFrame:
         """Compute all the scores and store them in the log file.
         Args:
             :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :return: the scores, with one row per prediction
         """
-        all_scores, all_names, all_times = {}, [], {}  # type: ignore
+        try:
+            return self._compute_scores(mean_max_min)
+        finally:
+            if self.shared_scorer is not None:
+                self.shared_scorer.close()
+            if self.traj_source is not None:
+                self.traj_source.cleanup()
+                self._frame_paths = None
+
+    def _compute_scores(self, mean_max_min: bool = False) -> pd.DataFrame:
+        """
+        Compute all the scores with the mode of the run (watch, pipeline, cascade or all the
+        scores on all the predictions) and save them.
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :return: the scores, with one row per prediction
+        """
+        if self.watch_dir is not None:
+            return self._compute_watch(mean_max_min)
+        if self.pipeline_dir is not None:
+            return self._compute_stream(iter_pred_dir(self.pipeline_dir), mean_max_min)
+        self._schedule()
+        if self.time_budget is not None:
+            return self._compute_budget(mean_max_min)
+        if self.cascade is not None and self.traj_source is None:
+            return self.save_results(*self._compute_cascade(self.cascade), mean_max_min)
+        if self.decoy_major:
+            results = self._compute_decoy_major(self.pred_path)
+            return self.save_results(results, mean_max_min=mean_max_min)
+        results = []
         for score_fn in tqdm(self.all_scores):
             try:
-                score, times = score_fn.compute(self.pred_path, self.native_path, **self.hp_params)
-            except TypeError:
+                score, times = self._compute_score(score_fn)
+            except (TypeError, ToolNotFoundError):
                 logger.error(f"Error with {score_fn.__class__.__name__}")
                 continue
             self.log_current_time(times)
+            results.append((score_fn.__class__.__name__, score, times))
+        return self.save_results(results, mean_max_min=mean_max_min)
+
+    def _compute_watch(self, mean_max_min: bool = False) -> pd.DataFrame:
+        """
+        Score the predictions while they are written in the directory, until the sentinel
+        file is written or no prediction arrives for `watch_timeout` seconds.
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :return: the scores, with one row per prediction
+        """
+        watcher = DirectoryWatcher(self.watch_dir)  # type: ignore
+        logger.info(f"WATCHING {self.watch_dir}")
+        return self._compute_stream(watcher.iter_paths(self.watch_timeout), mean_max_min)
+
+    def _compute_stream(self, pred_paths: Iterable[str], mean_max_min: bool = False):
+        """
+        Score the predictions by batches, while the next ones are converted, normalised and
+        parsed by the pipeline. The rows of each batch are appended to the result table, and
+        the full tables are saved at the end.
+        :param pred_paths: the paths of the predictions, as they are discovered
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :return: the scores, with one row per prediction
+        """
+        pipeline = Pipeline(pred_paths, self._get_ingest_stages())
+        merged: Dict[str, Tuple[Dict, Dict]] = {
+            score_fn.__class__.__name__: ({}, {}) for score_fn in self.all_scores
+        }
+        columns, start = None, time.time()
+        for batch in pipeline.iter_batches(self.pipeline_batch):
+            paths = [path for path, _ in batch]
+            structures = {path: atoms for path, atoms in batch if atoms is not None}
+            self.pred_path.extend(paths)
+            if self.decoy_major:
+                results = self._compute_decoy_major(paths, structures)
+            else:
+                results = self._compute_metric_major(paths, structures)
+            for metric, score, times in results:
+                merged[metric][0].update(score)
+                merged[metric][1].update(times)
+            columns = self._append_results(results, columns)
+            if len(self.pred_path) == len(paths):
+                logger.info(f"FIRST RESULTS AFTER {round(time.time() - start, 3)} seconds")
+            logger.info(f"{len(self.pred_path)} PREDICTIONS SCORED")
+        results = [(metric, scores, times) for metric, (scores, times) in merged.items() if scores]
+        return self.save_results(results, mean_max_min=mean_max_min)
+
+    def _compute_metric_major(
+        self, pred_paths: List[str], structures: Dict[str, Tuple]
+    ) -> List[Tuple[str, Dict, Dict]]:
+        """
+        Compute each score for all the predictions, one score after the other.
+        :param pred_paths: the predictions to score
+        :param structures: the atoms of the parsed predictions, by path
+        :return: the name of the score class, the scores and the times of each metric
+        """
+        results = []
+        for score_fn in self.all_scores:
+            metric = score_fn.__class__.__name__
+            try:
+                score, times = self._compute_batch(score_fn, pred_paths, structures)
+            except (TypeError, ToolNotFoundError):
+                logger.error(f"Error with {metric}")
+                continue
+            results.append((metric, score, times))
+        return results
+
+    def _compute_decoy_major(
+        self, pred_paths: List[str], structures: Optional[Dict[str, Tuple]] = None
+    ) -> List[Tuple[str, Dict, Dict]]:
+        """
+        Compute the scores with context support prediction by prediction: the context of a
+        prediction (atoms, structures with annotations...) is shared by its scores and
+        released after the last one. The other scores, like the external binaries, are
+        computed for all the predictions, one score after the other.
+        :param pred_paths: the predictions to score
+        :param structures: the atoms of the parsed predictions, by path
+        :return: the name of the score class, the scores and the times of each metric
+        """
+        structures = {} if structures is None else structures
+        context_fns = [
+            score_fn
+            for score_fn in self.all_scores
+            if score_fn.context_support
+            and not (self.shared_scorer is not None and score_fn.memory_support)
+        ]
+        context_results: Dict[int, Tuple[Dict, Dict]] = {id(fn): ({}, {}) for fn in context_fns}
+        native = DecoyContext(self.native_path)
+        for pred_path in tqdm(pred_paths):
+            if not ScoreAbstract.check_pdb_file(pred_path):
+                logger.warning(f"FILE {pred_path} EITHER DOESN'T EXIST OR ISN'T A .pdb FILE")
+                continue
+            context = DecoyContext(pred_path, native)
+            if pred_path in structures:
+                context.set("atoms", structures[pred_path])
+            for score_fn in context_fns:
+                if id(score_fn) not in context_results:
+                    continue
+                metric = score_fn.__class__.__name__
+                try:
+                    with TRACER.span("compute", metric, nb_predictions=1):
+                        score, times = score_fn.compute_context(context, **self.hp_params)
+                except (TypeError, ToolNotFoundError):
+                    logger.error(f"Error with {metric}")
+                    # The score is not computed for the next predictions either
+                    del context_results[id(score_fn)]
+                    continue
+                context_results[id(score_fn)][0][pred_path] = score
+                context_results[id(score_fn)][1][pred_path] = times
+            context.release()
+        native.release()
+        results = []
+        for score_fn in self.all_scores:
+            metric = score_fn.__class__.__name__
+            if id(score_fn) in context_results:
+                score, times = context_results[id(score_fn)]
+            elif score_fn in context_fns:
+                continue
+            else:
+                try:
+                    score, times = self._compute_batch(score_fn, pred_paths, structures)
+                except (TypeError, ToolNotFoundError):
+                    logger.error(f"Error with {metric}")
+                    continue
+            if len(times) > 0:
+                self.log_current_time(times)
+            results.append((metric, score, times))
+        return results
+
+    def _get_ingest_stages(self) -> List[Tuple[str, Callable]]:
+        """Return the stages of the pipeline applied to each path of a prediction."""
+        stages: List[Tuple[str, Callable]] = [
+            ("convert", lambda path: self._convert_pred_paths_cif_pdb([path])[0])
+        ]
+        if self.normalise:
+            stages.append(("normalise", self._normalise))
+        stages.append(("parse", self._parse_pred_path))
+        return stages
+
+    def _parse_pred_path(self, pred_path: str) -> Tuple[str, Optional[Tuple]]:
+        """
+        Read the atoms of a prediction, for the scores that compute them in memory.
+        :return: the path of the prediction and its atoms, or None if they are not needed
+        """
+        if not any(score_fn.memory_support for score_fn in self.all_scores):
+            return pred_path, None
+        try:
+            with TRACER.span("parse", "pipeline"):
+                return pred_path, read_pdb_atoms(pred_path)
+        except (OSError, ValueError):
+            # The scores will read the file themselves
+            return pred_path, None
+
+    def _compute_batch(
+        self, score_fn: ScoreAbstract, pred_paths: List[str], structures: Dict[str, Tuple]
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute a score for a batch of predictions, from the atoms already parsed if the score
+        supports it.
+        :param score_fn: the score to compute
+        :param pred_paths: the predictions to score
+        :param structures: the atoms of the parsed predictions, by path
+        :return: dictionaries with the scores and times for each prediction
+        """
+        if self.shared_scorer is not None and score_fn.memory_support:
+            return self._compute_shared(score_fn, pred_paths, structures)
+        if not score_fn.memory_support or len(structures) < len(pred_paths):
+            return self._compute_score(score_fn, pred_paths)
+        if self._native_atoms is None and self.native_path and os.path.exists(self.native_path):
+            self._native_atoms = read_pdb_atoms(self.native_path)
+        with TRACER.span("compute", score_fn.__class__.__name__, nb_predictions=len(pred_paths)):
+            return score_fn.compute_atoms(structures, self._native_atoms, **self.hp_params)
+
+    def _append_results(
+        self, results: List[Tuple[str, Dict, Dict]], columns: Optional[List[str]]
+    ) -> Optional[List[str]]:
+        """
+        Append the scores of a batch to the result table.
+        :param results: the name of the score class, the scores and the times of each metric
+        :param columns: the columns of the result table, or None if it is not written yet
+        :return: the columns of the result table
+        """
+        score_df = self.get_tables(results)[0]
+        if self.result_path is None or len(score_df) == 0:
+            return columns
+        if columns is None:
+            score_df.to_csv(self.result_path)
+            return list(score_df.columns)
+        score_df.reindex(columns=columns).to_csv(self.result_path, mode="a", header=False)
+        return columns
+
+    def _compute_cascade(
+        self, cascade: List[CascadeStage]
+    ) -> Tuple[List[Tuple[str, Dict, Dict]], Dict[str, int]]:
+        """
+        Compute the stages of a cascade. Each stage only scores the predictions kept by the
+        previous ones, and the other predictions get NaN.
+        :param cascade: the stages
+        :return: the name of the score class, the scores and the times of each metric, and the
+                last stage computed for each prediction
+        """
+        results, stages = [], {}
+        computed: Set[int] = set()
+        pred_paths = list(self.pred_path)
+        for index, stage in enumerate(cascade):
+            classes = [CONVERT_NAME_TO_SCORING_CLASS.get(name) for name in stage.scores]
+            # A score given in several stages is only computed by the first one
+            score_fns = [
+                fn for fn in self.all_scores if type(fn) in classes and id(fn) not in computed
+            ]
+            computed.update(id(fn) for fn in score_fns)
+            kept = set(pred_paths)
+            filtered = [path for path in self.pred_path if path not in kept]
+            stage_scores: Dict = {path: {} for path in pred_paths}
+            for score_fn in tqdm(score_fns):
+                try:
+                    score, times = self._compute_score(score_fn, pred_paths)
+                except (TypeError, ToolNotFoundError):
+                    logger.error(f"Error with {score_fn.__class__.__name__}")
+                    continue
+                self.log_current_time(times)
+                for path, c_scores in score.items():
+                    stage_scores.setdefault(path, {}).update(c_scores)
+                fill_filtered(score, times, filtered)
+                results.append((score_fn.__class__.__name__, score, times))
+            stages.update({os.path.basename(path): index + 1 for path in pred_paths})
+            if index == len(cascade) - 1:
+                break
+            try:
+                selected = set(stage.select(stage_scores))
+            except ValueError as e:
+                logger.error(f"ALL THE PREDICTIONS KEPT : {e}")
+                continue
+            pred_paths = [path for path in pred_paths if path in selected]
+            logger.info(f"CASCADE STAGE {index + 1} : {len(pred_paths)} PREDICTIONS KEPT")
+        return results, stages
+
+    def save_results(
+        self,
+        results: List[Tuple[str, Dict, Dict]],
+        stages: Optional[Dict[str, int]] = None,
+        mean_max_min: bool = False,
+        skipped: Optional[Dict[str, str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Gather the scores of each metric in tables, and save them with the time of each metric.
+        :param results: the name of the score class, the scores and the times of each metric
+        :param stages: the last stage of the cascade computed for each prediction, added as
+                the `CASCADE-STAGE` column. None without cascade.
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :param skipped: the metrics skipped by the time budget for each prediction, added as
+                the `SKIPPED` column. None without time budget.
+        :return: the scores, with one row per prediction
+        """
+        score_df, times_df, all_costs = self.get_tables(results, stages, mean_max_min, skipped)
+        with TRACER.span("io", "save_scores"):
+            self._save_scores(score_df, self.result_path, "Results")
+            self._save_scores(times_df, self.time_path, "Times")
+            if self.time_path is not None and len(all_costs) > 0:
+                pd.DataFrame(all_costs).to_csv(get_costs_path(self.time_path), index=False)
+        self._save_trace()
+        if self.log_path is not None:
+            logger.success(f"LOG PATH SAVED AT : {self.log_path}")
+        return score_df
+
+    def get_tables(
+        self,
+        results: List[Tuple[str, Dict, Dict]],
+        stages: Optional[Dict[str, int]] = None,
+        mean_max_min: bool = False,
+        skipped: Optional[Dict[str, str]] = None,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, List[Dict]]:
+        """
+        Gather the scores of each metric in tables.
+        :param results: the name of the score class, the scores and the times of each metric
+        :param stages: the last stage of the cascade computed for each prediction
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :param skipped: the metrics skipped by the time budget for each prediction
+        :return: the scores and the times, with one row per prediction, and the costs of each
+                task
+        """
+        if len(self.duplicates) > 0:
+            results = [
+                (metric, *fan_out(score, times, self.duplicates))
+                for metric, score, times in results
+            ]
+            all_columns: List[Optional[Dict[str, Any]]] = [stages, skipped]
+            for path, duplicates in self.duplicates.items():
+                for duplicate in duplicates:
+                    for columns in all_columns:
+                        if columns is not None and os.path.basename(path) in columns:
+                            columns[os.path.basename(duplicate)] = columns[os.path.basename(path)]
+        all_scores, all_names, all_times = {}, [], {}  # type: ignore
+        all_costs: List[Dict] = []
+        for metric, score, times in results:
+            all_costs.extend(self._get_costs(metric, times))
             for path, c_scores in score.items():
                 name = os.path.basename(path)
                 for n_score, c_score in c_scores.items():
@@ -495,15 +1245,278 @@ class ScoreCLI:
         if mean_max_min:
             mean_max_min_scores = self._compute_mean_max_min(all_scores)
             all_scores = {**all_scores, **mean_max_min_scores}
-        score_df = pd.DataFrame(all_scores, index=all_names).T
+        score_df = self._restore_order(pd.DataFrame(all_scores, index=all_names).T)
+        if stages is not None:
+            score_df["CASCADE-STAGE"] = pd.Series(stages)
+        if skipped is not None:
+            score_df[SKIPPED_COLUMN] = pd.Series(skipped)
         if self.sort_by in list(score_df.columns):
             logger.info(f"RESULTS SORTED BY {self.sort_by}")
             score_df.sort_values(by=[self.sort_by], inplace=True)
         times_df = pd.DataFrame(all_times, index=list(all_scores.keys()))
-        self._save_scores(score_df, self.result_path, "Results")
-        self._save_scores(times_df, self.time_path, "Times")
-        if self.log_path is not None:
-            logger.success(f"LOG PATH SAVED AT : {self.log_path}")
+        return score_df, self._restore_order(times_df), all_costs
+
+    def _restore_order(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Put the rows back in the order of the input predictions, changed by `_schedule`.
+        The other rows (e.g. the mean, max and min) stay after them.
+        :param df: dataframe with one row per prediction name
+        :return: the reordered dataframe
+        """
+        rows = [name for name in self.input_order if name in df.index]
+        kept = set(rows)
+        return df.loc[rows + [name for name in df.index if name not in kept]]
+
+    def _schedule(self):
+        """
+        Order the predictions so the longest tasks start first, and log the predicted time of
+        the run. The frames of a trajectory all have the same size and keep their order.
+        """
+        if self.traj_source is not None:
+            return None
+        metrics = [
+            (score_fn.__class__.__name__, self._get_concurrency(score_fn))
+            for score_fn in self.all_scores
+        ]
+        self.pred_path = order_by_cost(
+            self.pred_path, self.cost_model, [metric for metric, _ in metrics]
+        )
+        predict_run_time(self.cost_model, metrics, self.pred_path)
+
+    @staticmethod
+    def _get_concurrency(score_fn: ScoreAbstract) -> int:
+        """Return the number of tasks of a score running at the same time."""
+        return score_fn.get_concurrency() if hasattr(score_fn, "get_concurrency") else 1
+
+    def _compute_budget(self, mean_max_min: bool = False) -> pd.DataFrame:
+        """
+        Compute the cells (metric, prediction) planned within the time budget, from the first
+        score. The cells computed before the deadline are saved at the deadline, even if tasks
+        are still running, and the skipped cells are listed in the `SKIPPED` column.
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :return: the scores, with one row per prediction
+        """
+        plan, replaced = self._plan_budget()
+        computed: Dict[int, Tuple[Dict, Dict]] = {id(fn): ({}, {}) for fn in self.all_scores}
+        lock = threading.Lock()
+        saved: List[pd.DataFrame] = []
+
+        def flush(expired: bool = True):
+            with lock:
+                if len(saved) > 0:
+                    # The results are not written again after the deadline
+                    return None
+                if expired:
+                    logger.warning("TIME BUDGET EXPIRED : SAVING THE COMPUTED SCORES")
+                saved.append(self._save_budget(computed, replaced, mean_max_min))
+
+        watchdog = self.time_budget.start_watchdog(flush)  # type: ignore
+        try:
+            for score_fn in tqdm(self.all_scores):
+                # Chunks of full batches, so the multi-file tools are still run by batch
+                step = self._get_concurrency(score_fn) * getattr(score_fn, "batch_size", 1)
+                pred_paths = plan[id(score_fn)]
+                for index in range(0, len(pred_paths), step):
+                    if self.time_budget.is_expired():  # type: ignore
+                        break
+                    try:
+                        score, times = self._compute_score(
+                            score_fn, pred_paths[index : index + step]
+                        )
+                    except (TypeError, ToolNotFoundError):
+                        logger.error(f"Error with {score_fn.__class__.__name__}")
+                        break
+                    with lock:
+                        computed[id(score_fn)][0].update(score)
+                        computed[id(score_fn)][1].update(times)
+        finally:
+            watchdog.cancel()
+        flush(expired=False)
+        return saved[0]
+
+    def _plan_budget(self) -> Tuple[Dict[int, List[str]], Dict[int, str]]:
+        """
+        Plan the predictions of each score within the time budget, in the order of the scores.
+        A score that does not fit switches to its faster backend if it computes more cells.
+        :return: the predictions planned for each score instance (by id), from the cheapest,
+                and the name of the original score of the faster backends (by id)
+        """
+        remaining = self.time_budget.get_remaining()  # type: ignore
+        sizes = {path: get_nb_atoms(path) for path in self.pred_path}
+        plan: Dict[int, List[str]] = {}
+        replaced: Dict[int, str] = {}
+        for index, score_fn in enumerate(self.all_scores):
+            metric = score_fn.__class__.__name__
+            pred_paths, predicted = plan_metric(
+                self.cost_model, metric, self._get_concurrency(score_fn), sizes, remaining
+            )
+            fast_fn = self._get_fast_backend(score_fn) if len(pred_paths) < len(sizes) else None
+            if fast_fn is not None:
+                fast_paths, fast_predicted = plan_metric(
+                    self.cost_model,
+                    fast_fn.__class__.__name__,
+                    self._get_concurrency(fast_fn),
+                    sizes,
+                    remaining,
+                )
+                if len(fast_paths) > len(pred_paths):
+                    logger.info(f"TIME BUDGET : {metric} REPLACED BY {fast_fn.__class__.__name__}")
+                    self.all_scores[index] = score_fn = fast_fn
+                    replaced[id(fast_fn)] = metric
+                    pred_paths, predicted = fast_paths, fast_predicted
+            plan[id(score_fn)] = pred_paths
+            remaining = max(0.0, remaining - predicted)
+            logger.info(
+                f"TIME BUDGET : {score_fn.__class__.__name__} PLANNED ON {len(pred_paths)}"
+                f"/{len(sizes)} PREDICTIONS"
+            )
+        return plan, replaced
+
+    @staticmethod
+    def _get_fast_backend(score_fn: ScoreAbstract) -> Optional[ScoreAbstract]:
+        """Return the faster backend of a score if its files are available, None otherwise."""
+        name = FAST_BACKENDS.get(score_fn.__class__.__name__)
+        if name is None:
+            return None
+        fast_fn = CONVERT_NAME_TO_SCORING_CLASS[name]()  # type: ignore
+        if not all(os.path.exists(path) for path in fast_fn.get_table_paths()):
+            return None
+        return fast_fn
+
+    def _save_budget(
+        self,
+        computed: Dict[int, Tuple[Dict, Dict]],
+        replaced: Dict[int, str],
+        mean_max_min: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Save the cells computed within the time budget. The skipped cells are NaN.
+        :param computed: the scores and times computed for each score instance (by id)
+        :param replaced: the name of the original score of the faster backends (by id)
+        :param mean_max_min: whether to compute the min, max and mean for the different scores
+        :return: the scores, with one row per prediction
+        """
+        results, done, names = [], {}, {}
+        fast_names = {}
+        for score_fn in self.all_scores:
+            key, metric = id(score_fn), score_fn.__class__.__name__
+            scores, times = dict(computed[key][0]), dict(computed[key][1])
+            done[key], names[key] = list(scores), replaced.get(key, metric)
+            if key in replaced:
+                fast_names[key] = metric
+            if len(scores) == 0:
+                continue
+            fill_filtered(scores, times, [path for path in self.pred_path if path not in scores])
+            results.append((metric, scores, times))
+        skipped = get_skipped(done, self.pred_path, names, fast_names)
+        return self.save_results(results, mean_max_min=mean_max_min, skipped=skipped)
+
+    def _get_costs(self, metric: str, times: Dict) -> List[Dict]:
+        """
+        Return the time of each task of a metric, used to learn the cost model of the next runs.
+        The scores computed together share the same time, so the maximum is used.
+        :param metric: name of the score class that was computed
+        :param times: the times of each prediction path
+        :return: the metric, the number of atoms and the time of each task
+        """
+        if self.traj_source is not None:
+            return []
+        return [
+            {
+                "metric": metric,
+                "n_atoms": get_nb_atoms(path),
+                "time": max(c_times.values()),
+            }
+            for path, c_times in times.items()
+            if len(c_times) > 0
+        ]
+
+    def _compute_score(
+        self, score_fn: ScoreAbstract, pred_paths: Optional[List[str]] = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute a score for all the predictions.
+        If the predictions are frames of a trajectory, the scores that support it read the
+        frames directly. The other ones use single-frame .pdb files, written the first time
+        they are needed.
+        :param score_fn: the score to compute
+        :param pred_paths: the predictions to score. Default to all of them.
+        :return: dictionaries with the scores and times for each prediction
+        """
+        if self.traj_source is None:
+            pred_paths = self.pred_path if pred_paths is None else pred_paths
+            if self.shared_scorer is not None and score_fn.memory_support:
+                return self._compute_shared(score_fn, pred_paths)
+            return score_fn.compute(pred_paths, self.native_path, **self.hp_params)
+        scores: Dict = {}
+        times: Dict = {}
+        if score_fn.traj_support:
+            for names, chunk in self.traj_source.iter_chunks():
+                with TRACER.span("compute", score_fn.__class__.__name__, nb_frames=len(names)):
+                    c_scores, c_times = score_fn.compute_traj(
+                        chunk, self.native_path, names, **self.hp_params
+                    )
+                scores.update(c_scores)
+                times.update(c_times)
+            return scores, times
+        frame_paths = self._get_frame_paths()
+        c_scores, c_times = score_fn.compute(
+            list(frame_paths.values()), self.native_path, **self.hp_params
+        )
+        for name, path in frame_paths.items():
+            if path in c_scores:
+                scores[name], times[name] = c_scores[path], c_times[path]
+        return scores, times
+
+    def _compute_shared(
+        self,
+        score_fn: ScoreAbstract,
+        pred_paths: List[str],
+        structures: Optional[Dict[str, Tuple]] = None,
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute a score with in-memory support in the worker processes. The predictions stay
+        in shared memory until the last score with in-memory support is computed.
+        :param score_fn: the score to compute
+        :param pred_paths: the predictions to score
+        :param structures: the atoms of the predictions already parsed, by path
+        :return: dictionaries with the scores and times for each prediction
+        """
+        pred_paths = [path for path in pred_paths if score_fn.check_pdb_file(path)]
+        self.shared_scorer.add(pred_paths, structures)  # type: ignore
+        scores, times = self.shared_scorer.compute(  # type: ignore
+            score_fn, pred_paths, self.native_path, **self.hp_params
+        )
+        memory_scores = [fn for fn in self.all_scores if fn.memory_support]
+        if score_fn is memory_scores[-1]:
+            self.shared_scorer.release(pred_paths)  # type: ignore
+        return scores, times
+
+    def _get_frame_paths(self) -> Dict[str, str]:
+        """
+        Return the single-frame .pdb files of the trajectory (normalised if needed).
+        :return: dictionary with the frame name and the associated .pdb path
+        """
+        if self._frame_paths is None:
+            frame_paths = self.traj_source.get_frame_paths()  # type: ignore
+            if self.normalise:
+                frame_paths = {
+                    name: self._normalise_frame(path) for name, path in frame_paths.items()
+                }
+            self._frame_paths = frame_paths
+        return self._frame_paths
+
+    def _normalise_frame(self, frame_path: str) -> str:
+        """
+        Normalise a single-frame .pdb file next to it, in the directory of the frames of the run.
+        :param frame_path: path to the .pdb file of a frame
+        :return: the path of the normalised frame (or the frame itself if it failed)
+        """
+        dirname, basename = os.path.split(frame_path)
+        new_path = os.path.join(dirname, "normalized_" + basename)
+        with TRACER.span("normalise", basename):
+            output = self.normalize_structure(frame_path, new_path)
+        return new_path if output else frame_path
 
     def _compute_mean_max_min(self, all_scores: Dict) -> Dict:
         """
@@ -520,6 +1533,30 @@ class ScoreCLI:
         new_scores = {"Min": score_min, "Max": score_max, "Mean": score_mean}
         return new_scores
 
+    def _save_trace(self):
+        """
+        Log the stages where the run spent the most time, and save the trace if asked, with
+        the summary by stage next to it (`<trace_path>_stages.csv`).
+        The time table (`time_path`) is measured separately, per prediction and per score,
+        while the spans of the batched scores time the whole batches.
+        """
+        summary = TRACER.get_summary()
+        for stats in summary[:10]:
+            logger.debug(
+                f"TRACE {stats['stage'].upper()} {stats['name']} : {stats['count']} spans, "
+                f"wall {round(stats['wall'], 3)}s, cpu {round(stats['cpu'], 3)}s, "
+                f"child cpu {round(stats['child_cpu'], 3)}s"
+            )
+        if self.trace_path is None:
+            return None
+        TRACER.save_json(self.trace_path)
+        if len(summary) > 0:
+            stages_path = os.path.splitext(self.trace_path)[0] + "_stages.csv"
+            pd.DataFrame(summary).set_index(["stage", "name"]).to_csv(stages_path)
+        chrome_path = os.path.splitext(self.trace_path)[0] + ".chrome.json"
+        TRACER.save_chrome_trace(chrome_path)
+        logger.success(f"TRACE SAVED AT {self.trace_path} AND {chrome_path}")
+
     def _save_scores(
         self, score_df: pd.DataFrame, result_path: Optional[str] = None, name: str = "Results"
     ):
@@ -0,0 +1,226 @@
+"""
+Cost model of the (metric, prediction) tasks, learnt from the costs of previous runs, or from
+their time tables when the costs were not saved.
+It orders the predictions so the longest predicted tasks start first, and predicts the time of
+a run.
+"""
+
+import heapq
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Average number of bytes of an ATOM line of a .pdb file, used to estimate the number of atoms
+# of a prediction without reading it
+ATOM_LINE_BYTES = 81
+# Bounds of the exponent of the cost as a function of the number of atoms
+MIN_EXPONENT, MAX_EXPONENT = 0.0, 3.0
+# Exponent used when all the previous predictions of a metric had the same size
+DEFAULT_EXPONENT = 1.0
+
+
+def get_nb_atoms(pred_path: str) -> int:
+    """Estimate the number of atoms of a .pdb file from its size."""
+    try:
+        return max(1, os.path.getsize(pred_path) // ATOM_LINE_BYTES)
+    except OSError:
+        return 1
+
+
+def get_costs_path(time_path: str) -> str:
+    """Return the path of the costs of each task, stored next to the time table."""
+    return os.path.splitext(time_path)[0] + "_costs.csv"
+
+
+def get_metric(column: str, names: Dict[str, str]) -> Optional[str]:
+    """
+    Return the score class of a column of a time table: the class of the longest score name
+    that is the column itself or its prefix (e.g. `INF` for `INF-WC`).
+    :param column: name of the column
+    :param names: name of the score class of each score name
+    :return: the name of the score class, or None if no score matches
+    """
+    column = column.upper()
+    matches = [
+        name
+        for name in names
+        if column == name.upper() or column.startswith((f"{name.upper()}-", f"{name.upper()}@"))
+    ]
+    return names[max(matches, key=len)] if len(matches) > 0 else None
+
+
+def read_time_table(time_path: str, pred_paths: List[str], names: Dict[str, str]) -> pd.DataFrame:
+    """
+    Rebuild the costs of a previous run from its time table, for the predictions of the current
+    run with the same name. The number of atoms is read from the current predictions, and the
+    time of a task is the maximum over the columns of the metric.
+    :param time_path: path to the time table of a previous run
+    :param pred_paths: paths to the predictions of the current run
+    :param names: name of the score class of each score name
+    :return: dataframe with the columns `metric`, `n_atoms` and `time`
+    """
+    paths = {os.path.basename(pred_path): pred_path for pred_path in pred_paths}
+    times_df = pd.read_csv(time_path, index_col=0)
+    costs: List[Dict] = []
+    for name, c_times in times_df.iterrows():
+        if name not in paths:
+            continue
+        metric_times: Dict[str, float] = {}
+        for column, c_time in c_times.items():
+            metric = get_metric(str(column), names)
+            if metric is not None and not pd.isna(c_time):
+                metric_times[metric] = max(metric_times.get(metric, 0.0), float(c_time))
+        n_atoms = get_nb_atoms(paths[name])
+        costs.extend(
+            {"metric": metric, "n_atoms": n_atoms, "time": c_time}
+            for metric, c_time in metric_times.items()
+        )
+    return pd.DataFrame(costs, columns=["metric", "n_atoms", "time"])
+
+
+class CostModel:
+    def __init__(self, costs: Optional[pd.DataFrame] = None):
+        """
+        Model of the time of each metric as `a * n_atoms ^ b`, fitted in log space on the
+        costs of previous runs.
+        :param costs: dataframe with the columns `metric` (name of the score class), `n_atoms`
+                and `time` (in seconds), one row per task
+        """
+        self.params: Dict[str, Tuple[float, float]] = {}
+        if costs is not None:
+            self.fit(costs)
+
+    @staticmethod
+    def from_time_paths(
+        time_paths: List[str],
+        pred_paths: Optional[List[str]] = None,
+        names: Optional[Dict[str, str]] = None,
+    ) -> "CostModel":
+        """
+        Learn the model from the costs stored next to the time tables of previous runs.
+        Without costs, the model is learnt from the time table itself, with the number of atoms
+        of the predictions of the current run. The other tables are skipped.
+        :param time_paths: paths to the time tables (`time_path`) of previous runs
+        :param pred_paths: paths to the predictions of the current run
+        :param names: name of the score class of each score name, to read the time tables
+        """
+        all_costs = []
+        for time_path in time_paths:
+            costs_path = get_costs_path(time_path)
+            if os.path.exists(costs_path):
+                all_costs.append(pd.read_csv(costs_path))
+            elif os.path.exists(time_path) and pred_paths is not None and names is not None:
+                logger.debug(f"NO COSTS FOR {time_path} : COSTS READ FROM THE TIME TABLE")
+                all_costs.append(read_time_table(time_path, pred_paths, names))
+        all_costs = [costs for costs in all_costs if len(costs) > 0]
+        if len(all_costs) == 0:
+            return CostModel()
+        return CostModel(pd.concat(all_costs, ignore_index=True))
+
+    def fit(self, costs: pd.DataFrame):
+        """
+        Fit the parameters of each metric.
+        :param costs: dataframe with the columns `metric`, `n_atoms` and `time`
+        """
+        for metric, c_costs in costs.groupby("metric"):
+            c_costs = c_costs[(c_costs["time"] > 0) & (c_costs["n_atoms"] > 0)]
+            if len(c_costs) == 0:
+                # The metric reuses the computations of another one (e.g. GDT-HA)
+                self.params[metric] = (-np.inf, 0.0)
+                continue
+            log_atoms, log_times = np.log(c_costs["n_atoms"]), np.log(c_costs["time"])
+            if log_atoms.nunique() > 1:
+                exponent, _ = np.polyfit(log_atoms, log_times, 1)
+                exponent = float(np.clip(exponent, MIN_EXPONENT, MAX_EXPONENT))
+            else:
+                exponent = DEFAULT_EXPONENT
+            self.params[metric] = (float(np.mean(log_times - exponent * log_atoms)), exponent)
+
+    def has_metric(self, metric: str) -> bool:
+        """Whether the metric was seen in the previous runs."""
+        return metric in self.params
+
+    def predict(self, metric: str, n_atoms: int) -> Optional[float]:
+        """
+        Predict the time of a task.
+        :param metric: name of the score class
+        :param n_atoms: number of atoms of the prediction
+        :return: the time (in seconds), or None if the metric was never seen
+        """
+        if metric not in self.params:
+            return None
+        log_scale, exponent = self.params[metric]
+        return float(np.exp(log_scale + exponent * np.log(max(n_atoms, 1))))
+
+
+def order_by_cost(
+    pred_paths: List[str],
+    cost_model: Optional[CostModel] = None,
+    metrics: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Order the predictions from the longest to the shortest predicted time, summed over the
+    metrics known by the cost model, so the longest tasks are submitted first and the parallel
+    runs don't end with a straggler. Without a known metric, the predictions are ordered from
+    the largest to the smallest, as the cost of every metric grows with the number of atoms.
+    :param pred_paths: paths to the predictions
+    :param cost_model: the cost model learnt from the previous runs
+    :param metrics: names of the score classes of the run
+    :return: the sorted paths
+    """
+    sizes = {pred_path: get_nb_atoms(pred_path) for pred_path in pred_paths}
+    if cost_model is None or metrics is None:
+        return sorted(pred_paths, key=lambda path: sizes[path], reverse=True)
+    model: CostModel = cost_model
+    known = [metric for metric in metrics if model.has_metric(metric)]
+
+    def get_cost(pred_path: str) -> Tuple[float, int]:
+        costs = [model.predict(metric, sizes[pred_path]) or 0.0 for metric in known]
+        return sum(costs), sizes[pred_path]
+
+    return sorted(pred_paths, key=get_cost, reverse=True)
+
+
+def predict_makespan(costs: List[float], nb_workers: int) -> float:
+    """
+    Predict the time to run the tasks with the given number of workers, when the longest
+    tasks start first.
+    :param costs: time of each task, sorted from the longest
+    :param nb_workers: number of tasks running at the same time
+    :return: the time when the last task ends
+    """
+    workers = [0.0] * max(1, min(nb_workers, len(costs)))
+    for cost in costs:
+        heapq.heappush(workers, heapq.heappop(workers) + cost)
+    return max(workers) if len(costs) > 0 else 0.0
+
+
+def predict_run_time(
+    cost_model: CostModel, metrics: List[Tuple[str, int]], pred_paths: List[str]
+) -> Tuple[float, Dict[str, float]]:
+    """
+    Predict the time of a run and log it. The metrics are computed one after the other.
+    :param cost_model: the cost model
+    :param metrics: name of each score class and its number of tasks running at the same time
+    :param pred_paths: paths to the predictions, sorted by `order_by_cost`
+    :return: the predicted time and the predicted time of each metric (only the known metrics)
+    """
+    sizes = [get_nb_atoms(pred_path) for pred_path in pred_paths]
+    metric_times = {}
+    for metric, nb_workers in metrics:
+        if cost_model.has_metric(metric):
+            costs = [cost_model.predict(metric, size) for size in sizes]
+            metric_times[metric] = predict_makespan(costs, nb_workers)  # type: ignore
+    unknown = [metric for metric, _ in metrics if metric not in metric_times]
+    total = sum(metric_times.values())
+    if len(metric_times) > 0:
+        logger.info(
+            f"PREDICTED TIME : {round(total, 1)} seconds"
+            + (f" (WITHOUT {', '.join(unknown)})" if len(unknown) > 0 else "")
+        )
+    for metric, metric_time in metric_times.items():
+        logger.debug(f"PREDICTED TIME FOR {metric} : {round(metric_time, 3)} seconds")
+    return total, metric_times
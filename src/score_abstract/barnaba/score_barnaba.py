@@ -10,19 +10,39 @@ Bottaro, Sandro, Francesco Di Palma, and Giovanni Bussi.
 Nucleic acids research 42.21 (2014): 13306-13314.
 """
 
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 import lib.barnaba.barnaba as bb
+import mdtraj as md
 import numpy as np
-from lib.barnaba.barnaba import escore
+from lib.barnaba.barnaba import calc_mats, escore, nucleic
+from loguru import logger
 
 from src.score_abstract.score_abstract import ScoreAbstract
 from src.utils import fn_time
 
 
 class ScoreBarnaba(ScoreAbstract):
+    traj_support = True
+
     def __init__(self, *args, **kwargs):
         super(ScoreBarnaba, self).__init__(*args, **kwargs)
+        self._native_cache: Dict = {}
+
+    def get_native(self, native_path: str) -> Tuple[md.Trajectory, escore.Escore, float]:
+        """
+        Load the native structure and fit the eScore on it. It is done once per native.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: the native trajectory, the fitted eScore and the time to fit the eScore (0 if
+                it was fitted by a previous call)
+        """
+        if native_path in self._native_cache:
+            native_traj, e_score_fit = self._native_cache[native_path]
+            return native_traj, e_score_fit, 0.0
+        e_score_fit, fit_time = fn_time(escore.Escore, [native_path])
+        native_traj = md.load(native_path)
+        self._native_cache[native_path] = (native_traj, e_score_fit)
+        return native_traj, e_score_fit, fit_time
 
     @staticmethod
     def compute_rmsd(
@@ -93,3 +113,145 @@ class ScoreBarnaba(ScoreAbstract):
             "BARNABA-eSCORE": e_score_time,
         }
         return scores, times
+
+    @staticmethod
+    def group_by_topology(pred_paths: List[str]) -> Tuple[Dict, List[str]]:
+        """
+        Load the predictions and group together the ones that share the same topology.
+        :param pred_paths: the paths to the .pdb files of the predictions.
+        :return: a dictionary with the topology key and the list of (path, trajectory) that share
+            it, and the list of paths that couldn't be loaded by mdtraj.
+        """
+        groups: Dict = {}
+        not_loaded = []
+        for pred_path in pred_paths:
+            try:
+                traj = md.load(pred_path)
+            except Exception as e:
+                logger.debug(f"MDTRAJ CAN'T LOAD {pred_path} : {e}")
+                not_loaded.append(pred_path)
+                continue
+            key = tuple((atom.residue.name, atom.name) for atom in traj.topology.atoms)
+            groups.setdefault(key, []).append((pred_path, traj))
+        return groups, not_loaded
+
+    @staticmethod
+    def stack_frames(trajs: List[md.Trajectory]) -> md.Trajectory:
+        """
+        Stack the first frame of trajectories with the same topology into one trajectory.
+        :param trajs: list of mdtraj trajectories that share the same topology
+        :return: a trajectory with one frame per input trajectory
+        """
+        xyz = np.concatenate([traj.xyz[:1] for traj in trajs], axis=0)
+        return md.Trajectory(xyz, trajs[0].topology)
+
+    @staticmethod
+    def compute_escore_traj(e_score_fit: escore.Escore, traj: md.Trajectory) -> np.ndarray:
+        """
+        Compute the eScore for all the frames of a trajectory, with an already fitted eScore.
+        It reproduces `Escore.score` without reloading the structures from a file.
+        :param e_score_fit: eScore fitted on the native structure
+        :param traj: the trajectory with the predictions as frames
+        :return: the eScore of each frame
+        """
+        nn = nucleic.Nucleic(traj.topology, modified=False)
+        scores = []
+        for frame in range(traj.n_frames):
+            coords = traj.xyz[frame, nn.indeces_lcs]
+            mat = calc_mats.calc_scoremat(coords, e_score_fit.cutoff + 0.2)
+            scores.append(np.sum(e_score_fit.kernel(10.0 * mat)))
+        return np.asarray(scores)
+
+    def _compute_traj(
+        self, traj: md.Trajectory, native_traj: md.Trajectory, e_score_fit: escore.Escore
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the RMSD, eRMSD and eScore for all the frames of a trajectory.
+        :param traj: the trajectory with the predictions as frames
+        :param native_traj: the native structure loaded with mdtraj
+        :param e_score_fit: eScore fitted on the native structure
+        :return: dictionaries with the array of scores and the total time for each score
+        """
+        nan_scores = np.full(traj.n_frames, np.nan)
+        try:
+            ermsd, ermsd_time = fn_time(bb.ermsd_traj, native_traj, traj)
+        except AssertionError:
+            ermsd, ermsd_time = nan_scores, 0
+        e_score, e_score_time = fn_time(self.compute_escore_traj, e_score_fit, traj)
+        try:
+            # `rmsd_traj` superposes the trajectory in place: it should be the last one
+            rmsd, rmsd_time = fn_time(bb.rmsd_traj, native_traj, traj)
+        except AssertionError:
+            rmsd, rmsd_time = nan_scores, 0
+        scores = {"BARNABA-RMSD": rmsd, "BARNABA-eRMSD": ermsd, "BARNABA-eSCORE": e_score}
+        times = {
+            "BARNABA-RMSD": rmsd_time,
+            "BARNABA-eRMSD": ermsd_time,
+            "BARNABA-eSCORE": e_score_time,
+        }
+        return scores, times
+
+    def _compute_batch(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the baRNAba scores for all the predictions.
+        The predictions with the same topology are stacked as frames of one trajectory, and
+        scored against a native loaded and fitted once. The other ones are scored one by one.
+        :param pred_paths: the paths to the .pdb files of the predictions.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: dictionaries with the scores and times for each prediction path
+        """
+        groups, single_paths = self.group_by_topology(pred_paths)
+        batch_groups = [group for group in groups.values() if len(group) > 1]
+        single_paths += [group[0][0] for group in groups.values() if len(group) == 1]
+        scores, times = super(ScoreBarnaba, self)._compute_batch(
+            single_paths, native_path, *args, **kwargs
+        )
+        if len(batch_groups) == 0:
+            return scores, times
+        native_traj, e_score_fit, fit_time = self.get_native(native_path)
+        for group in batch_groups:
+            paths = [path for path, _ in group]
+            traj = self.stack_frames([c_traj for _, c_traj in group])
+            c_scores, c_times = self._compute_traj(traj, native_traj, e_score_fit)
+            c_times["BARNABA-eSCORE"] += fit_time / len(batch_groups)
+            self._add_frame_scores(scores, times, paths, c_scores, c_times)
+        return scores, times
+
+    def compute_traj(
+        self, traj: md.Trajectory, native_path: str, names: List[str], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the baRNAba scores for each frame of a trajectory.
+        :param traj: a mdtraj trajectory where each frame is a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :param names: the name of each frame, used as key of the outputs.
+        :return: dictionaries with the scores and times for each frame name
+        """
+        native_traj, e_score_fit, fit_time = self.get_native(native_path)
+        c_scores, c_times = self._compute_traj(traj, native_traj, e_score_fit)
+        c_times["BARNABA-eSCORE"] += fit_time
+        scores: Dict = {}
+        times: Dict = {}
+        self._add_frame_scores(scores, times, names, c_scores, c_times)
+        return scores, times
+
+    @staticmethod
+    def _add_frame_scores(
+        scores: Dict, times: Dict, names: List[str], c_scores: Dict, c_times: Dict
+    ):
+        """
+        Split the scores computed over the frames of a trajectory into one entry per frame.
+        The time of each score is shared equally between the frames.
+        :param scores: dictionary where to add the scores of each frame
+        :param times: dictionary where to add the times of each frame
+        :param names: the name of each frame
+        :param c_scores: dictionary with an array of scores (one per frame) for each score
+        :param c_times: dictionary with the total time for each score
+        """
+        for index, name in enumerate(names):
+            scores[name] = {
+                score_n: round(float(values[index]), 3) for score_n, values in c_scores.items()
+            }
+            times[name] = {score_n: value / len(names) for score_n, value in c_times.items()}
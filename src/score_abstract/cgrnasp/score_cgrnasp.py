@@ -14,26 +14,74 @@ for RNA structure evaluation.
 NAR Genom Bioinform. 5(1): lqad016.
 """
 
-from typing import Optional, Tuple, Dict
-from src.score_abstract.score_abstract import ScoreAbstract
-from src.utils import fn_time
 import os
-import subprocess
+import re
+from typing import Dict, List, Optional
 
+import numpy as np
 
-class ScoreCGRNASP(ScoreAbstract):
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN, find_float
+
+CGRNASP_BIN_PATH = os.path.join("lib", "cgRNASP", "bin")
+# The score is the last value of the output
+CGRNASP_PATTERN = re.compile(rf"({FLOAT_PATTERN})\s*$")
+
+# Name of the score and the associated binary file
+CGRNASP_BINARIES = {
+    "cgRNASP": "cgRNASP_bin",
+    "cgRNASP-C": "cgRNASP-C_bin",
+    "cgRNASP-PC": "cgRNASP-PC_bin",
+}
+
+
+class ScoreCGRNASP(ScoreAbstractBinary):
     """
     Class that implements the cgRNASP code.
     """
 
+    tool_name = "cgRNASP"
+    memory_per_task = 256
+
     def __init__(self, cgrnasp_bin_path: Optional[str] = None, *args, **kwargs):
         super(ScoreCGRNASP, self).__init__(*args, **kwargs)
         self.cgrnasp_bin_path = (
-            cgrnasp_bin_path
-            if cgrnasp_bin_path is not None
-            else os.path.join("lib", "cgRNASP", "bin")
+            cgrnasp_bin_path if cgrnasp_bin_path is not None else CGRNASP_BIN_PATH
         )
 
+    @staticmethod
+    def get_cgrnasp_command(
+        pred_path: str, score_name: str, cgrnasp_bin_path: Optional[str] = None
+    ) -> List[str]:
+        """
+        Return the command to compute one of the cgRNASP scores.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param score_name: either cgRNASP, cgRNASP-C or cgRNASP-PC
+        :param cgrnasp_bin_path: the binary path to the cgRNASP file
+        :return: the binary and its arguments
+        """
+        cgrnasp_bin_path = cgrnasp_bin_path if cgrnasp_bin_path is not None else CGRNASP_BIN_PATH
+        return [os.path.join(cgrnasp_bin_path, CGRNASP_BINARIES[score_name]), pred_path]
+
+    @staticmethod
+    def parse_cgrnasp(output: str) -> float:
+        """
+        Convert the output of one of the cgRNASP binaries to the score.
+        :param output: the standard output of the binary
+        :return: the cgRNASP score
+        """
+        cgrnasp = find_float(output, CGRNASP_PATTERN)
+        return round(cgrnasp, 3) if cgrnasp is not None else np.nan
+
+    @staticmethod
+    def _compute_one(pred_path: str, score_name: str, cgrnasp_bin_path: Optional[str]) -> float:
+        """
+        Run one of the cgRNASP binaries and return the score.
+        """
+        command = ScoreCGRNASP.get_cgrnasp_command(pred_path, score_name, cgrnasp_bin_path)
+        return ScoreCGRNASP.parse_cgrnasp(run_command(command, ScoreCGRNASP.tool_name))
+
     @staticmethod
     def compute_cgrnasp(pred_path: str, cgrnasp_bin_path: Optional[str] = None) -> float:
         """
@@ -42,16 +90,7 @@ class ScoreCGRNASP(ScoreAbstract):
         :param cgrnasp_bin_path: the binary path to the cgRNASP file
         :return: the cgRNASP score
         """
-        cgrnasp_bin_path = (
-            cgrnasp_bin_path
-            if cgrnasp_bin_path is not None
-            else os.path.join("lib", "cgRNASP", "bin")
-        )
-        bin_path = os.path.join(cgrnasp_bin_path, "cgRNASP_bin")
-        command = f"{bin_path} {pred_path}"
-        output = subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL)
-        cgrnasp = output.decode().replace("\n", "").split()[-1]
-        return round(float(cgrnasp), 3)
+        return ScoreCGRNASP._compute_one(pred_path, "cgRNASP", cgrnasp_bin_path)
 
     @staticmethod
     def compute_cgrnasp_c(pred_path: str, cgrnasp_bin_path: Optional[str] = None) -> float:
@@ -61,16 +100,7 @@ class ScoreCGRNASP(ScoreAbstract):
         :param cgrnasp_bin_path: the binary path to the cgRNASP file
         :return: the cgRNASP-C score
         """
-        cgrnasp_bin_path = (
-            cgrnasp_bin_path
-            if cgrnasp_bin_path is not None
-            else os.path.join("lib", "cgRNASP", "bin")
-        )
-        bin_path = os.path.join(cgrnasp_bin_path, "cgRNASP-C_bin")
-        command = f"{bin_path} {pred_path}"
-        output = subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL)
-        cgrnasp_c = output.decode().replace("\n", "").split()[-1]
-        return round(float(cgrnasp_c), 3)
+        return ScoreCGRNASP._compute_one(pred_path, "cgRNASP-C", cgrnasp_bin_path)
 
     @staticmethod
     def compute_cgrnasp_pc(pred_path: str, cgrnasp_bin_path: Optional[str] = None) -> float:
@@ -80,32 +110,27 @@ class ScoreCGRNASP(ScoreAbstract):
         :param cgrnasp_bin_path: the binary path to the cgRNASP file
         :return: the cgRNASP-PC score
         """
-        cgrnasp_bin_path = (
-            cgrnasp_bin_path
-            if cgrnasp_bin_path is not None
-            else os.path.join("lib", "cgRNASP", "bin")
-        )
-        bin_path = os.path.join(cgrnasp_bin_path, "cgRNASP-PC_bin")
-        command = f"{bin_path} {pred_path}"
-        output = subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL)
-        cgrnasp_pc = output.decode().replace("\n", "").split()[-1]
-        return round(float(cgrnasp_pc), 3)
+        return ScoreCGRNASP._compute_one(pred_path, "cgRNASP-PC", cgrnasp_bin_path)
+
+    def get_binaries(self) -> List[str]:
+        return [
+            os.path.join(self.cgrnasp_bin_path, binary) for binary in CGRNASP_BINARIES.values()
+        ]
 
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
         """
-        Compute the cgRNASP, cgRNASP-C and cgRNASP-PC scores.
+        Return the commands for the cgRNASP, cgRNASP-C and cgRNASP-PC scores.
+        Each variant is a separate binary, so each one reads the structure and extracts the
+        beads again. Only the experimental `CGRNASP (NUMPY)` backend shares this work.
         """
-        cgrnasp, cgrnasp_time = fn_time(self.compute_cgrnasp, pred_path, self.cgrnasp_bin_path)
-        cgrnasp_c, cgrnasp_c_time = fn_time(
-            self.compute_cgrnasp_c, pred_path, self.cgrnasp_bin_path
-        )
-        cgrnasp_pc, cgrnasp_pc_time = fn_time(
-            self.compute_cgrnasp_pc, pred_path, self.cgrnasp_bin_path
-        )
-        scores = {"cgRNASP": cgrnasp, "cgRNASP-C": cgrnasp_c, "cgRNASP-PC": cgrnasp_pc}
-        times = {
-            "cgRNASP": cgrnasp_time,
-            "cgRNASP-C": cgrnasp_c_time,
-            "cgRNASP-PC": cgrnasp_pc_time,
+        return {
+            score_name: self.get_cgrnasp_command(pred_path, score_name, self.cgrnasp_bin_path)
+            for score_name in CGRNASP_BINARIES
         }
-        return scores, times
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        return {name: self.parse_cgrnasp(output)}
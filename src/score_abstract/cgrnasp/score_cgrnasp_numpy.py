@@ -0,0 +1,88 @@
+"""
+Class that computes cgRNASP, cgRNASP-C and cgRNASP-PC in Python, from the energy tables of cgRNASP.
+The three variants use coarse-grained beads of the same structure: the beads are extracted once
+and the three energies are computed from one shared neighbour list.
+Experimental and opt-in: the layout of the tables, the bead types, the bins and the residue
+separations are assumed from rsRNASP, until tests/unit/scores/test_cgrnasp.py checks the three
+energies against the binaries.
+"""
+
+import os
+from functools import partial
+from typing import Dict, List, Optional
+
+from src.score_abstract.score_abstract_potential import (
+    PairPotential,
+    ScoreAbstractPotential,
+    merge_class_tables,
+)
+
+CGRNASP_TABLES_DIR = os.path.join("lib", "cgRNASP", "energy")
+# Name of each variant and the directory of its tables (one table per residue separation range)
+CGRNASP_VARIANTS = {
+    "cgRNASP": "cgRNASP",
+    "cgRNASP-C": "cgRNASP-C",
+    "cgRNASP-PC": "cgRNASP-PC",
+}
+CGRNASP_TABLE_NAMES = ["short_ranged.txt", "long_ranged.txt"]
+# Width of the distance bins (in Angstrom) of the short-ranged and long-ranged tables
+CGRNASP_BIN_WIDTHS = [0.3, 0.6]
+# Residue separation where each table starts to be used
+CGRNASP_SEPARATION_EDGES = [1, 5]
+
+
+class ScoreCGRNASPNumpy(ScoreAbstractPotential):
+    def __init__(
+        self,
+        cgrnasp_tables_dir: Optional[str] = None,
+        cgrnasp_bin_widths: Optional[List[float]] = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        :param cgrnasp_tables_dir: directory with a sub-directory of tables for each variant
+        :param cgrnasp_bin_widths: width of the distance bins of each table (in Angstrom)
+        """
+        super(ScoreCGRNASPNumpy, self).__init__(*args, **kwargs)
+        self.cgrnasp_tables_dir = (
+            cgrnasp_tables_dir if cgrnasp_tables_dir is not None else CGRNASP_TABLES_DIR
+        )
+        self.cgrnasp_bin_widths = (
+            cgrnasp_bin_widths if cgrnasp_bin_widths is not None else CGRNASP_BIN_WIDTHS
+        )
+
+    def get_variant_table_paths(self, variant: str) -> List[str]:
+        """Return the paths to the tables of one of the cgRNASP variants."""
+        return [
+            os.path.join(self.cgrnasp_tables_dir, CGRNASP_VARIANTS[variant], table_name)
+            for table_name in CGRNASP_TABLE_NAMES
+        ]
+
+    def get_table_paths(self) -> List[str]:
+        return [
+            table_path
+            for variant in CGRNASP_VARIANTS
+            for table_path in self.get_variant_table_paths(variant)
+        ]
+
+    def convert_variant(self, variant: str) -> PairPotential:
+        """Read the tables of one of the cgRNASP variants and convert them to a PairPotential."""
+        return merge_class_tables(
+            self.get_variant_table_paths(variant),
+            self.cgrnasp_bin_widths,
+            CGRNASP_SEPARATION_EDGES,
+        )
+
+    def get_potentials(self) -> Dict[str, PairPotential]:
+        """
+        Return the potentials of the three variants. The atoms without bead type in a variant
+        are ignored by its potential, so the beads don't need to be extracted per variant.
+        """
+        return {
+            f"{variant} (NUMPY)": self.load_potential(
+                variant,
+                self.get_variant_table_paths(variant),
+                partial(self.convert_variant, variant),
+            )
+            for variant in CGRNASP_VARIANTS
+        }
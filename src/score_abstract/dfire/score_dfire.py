@@ -12,28 +12,111 @@ J. Computational Biology, in press (2019).
 """
 
 import os
-import subprocess
-from typing import Dict, Optional, Tuple
+import re
+from typing import Dict, List, Optional
 
-from src.score_abstract.score_abstract import ScoreAbstract
-from src.utils import time_it
+import numpy as np
 
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN, find_float
+
+DFIRE_BIN_PATH = os.path.join("lib", "dfire", "bin", "DFIRE_RNA")
+# The energy is the last value of the output
+DFIRE_PATTERN = re.compile(rf"({FLOAT_PATTERN})\s*$")
+# With several files, DFIRE_RNA outputs one line per file with its path and its energy
+DFIRE_BATCH_PATTERN = re.compile(rf"^[ \t]*(\S+)[ \t]+.*?({FLOAT_PATTERN})[ \t]*$", re.MULTILINE)
+
+
+class ScoreDfire(ScoreAbstractBinary):
+    tool_name = "DFIRE"
+    # DFIRE_RNA loads its potential once and scores all the files given as arguments
+    batch_size = 200
+    memory_per_task = 256
 
-class ScoreDfire(ScoreAbstract):
     def __init__(self, dfire_bin_path: Optional[str] = None, *args, **kwargs):
         super(ScoreDfire, self).__init__(*args, **kwargs)
         self.dfire_bin_path = dfire_bin_path
 
-    @time_it
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+    def get_binaries(self) -> List[str]:
+        return [self.dfire_bin_path if self.dfire_bin_path is not None else DFIRE_BIN_PATH]
+
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
         """
-        Compute the dfire score
+        Return the command to compute the dfire score.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path:
-        :return: dfire score
+        :return: dictionary with the dfire command
+        """
+        return {"DFIRE": self.get_dfire_command(pred_path, self.dfire_bin_path)}
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        """
+        Return the dfire score from the output of the binary.
+        """
+        return {"DFIRE": self.parse_dfire(output)}
+
+    def get_batch_command(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> List[str]:
+        """
+        Return the command to compute the dfire score of several predictions at once.
+        """
+        return self.get_dfire_command(pred_paths[0], self.dfire_bin_path) + pred_paths[1:]
+
+    def parse_batch_output(
+        self, output: str, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Dict[str, Dict]:
+        """
+        Return the dfire score of each prediction from the output of the binary.
+        """
+        return {
+            pred_path: {"DFIRE": dfire}
+            for pred_path, dfire in self.parse_dfire_batch(output, pred_paths).items()
+        }
+
+    @staticmethod
+    def get_dfire_command(pred_path: str, dfire_bin_path: Optional[str] = None) -> List[str]:
+        """
+        Return the command to run DFIRE_RNA on a prediction.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param dfire_bin_path: the binary path to the DFIRE_RNA file
+        :return: the binary and its arguments
+        """
+        dfire_bin_path = dfire_bin_path if dfire_bin_path is not None else DFIRE_BIN_PATH
+        return [dfire_bin_path, pred_path]
+
+    @staticmethod
+    def parse_dfire(output: str) -> float:
+        """
+        Convert the output of DFIRE_RNA to the dfire score.
+        :param output: the standard output of DFIRE_RNA
+        :return: the Dfire score
+        """
+        dfire = find_float(output, DFIRE_PATTERN)
+        return round(dfire, 3) if dfire is not None else np.nan
+
+    @staticmethod
+    def parse_dfire_batch(output: str, pred_paths: List[str]) -> Dict[str, float]:
+        """
+        Convert the output of DFIRE_RNA for several files to the dfire scores.
+        The lines are matched with the paths (compared as absolute paths). A prediction without
+        a line (failed or skipped by the binary) has a NaN score.
+        :param output: the standard output of DFIRE_RNA
+        :param pred_paths: the paths given to DFIRE_RNA
+        :return: dictionary with the prediction path and its Dfire score
         """
-        dfire = self.compute_dfire(pred_path, self.dfire_bin_path)
-        return {"DFIRE": dfire}  # type: ignore
+        energies = {
+            os.path.abspath(name): round(float(dfire), 3)
+            for name, dfire in DFIRE_BATCH_PATTERN.findall(output)
+        }
+        return {
+            pred_path: energies.get(os.path.abspath(pred_path), np.nan) for pred_path in pred_paths
+        }
 
     @staticmethod
     def compute_dfire(pred_path: str, dfire_bin_path: Optional[str] = None) -> float:
@@ -43,13 +126,5 @@ class ScoreDfire(ScoreAbstract):
         :param dfire_bin_path: the binary path to the DFIRE_RNA file
         :return: the Dfire score
         """
-        dfire_bin_path = (
-            dfire_bin_path
-            if dfire_bin_path is not None
-            else os.path.join("lib", "dfire", "bin", "DFIRE_RNA")
-        )
-        command = f"{dfire_bin_path} {pred_path}"
-        output = subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL)
-        dfire = output.decode().replace("\n", "").split()[-1]
-        dfire = round(float(dfire), 3)  # type: ignore
-        return dfire  # type: ignore
+        command = ScoreDfire.get_dfire_command(pred_path, dfire_bin_path)
+        return ScoreDfire.parse_dfire(run_command(command, ScoreDfire.tool_name))
@@ -0,0 +1,52 @@
+"""
+Class that computes the DFIRE-RNA energy in Python, from the energy table of DFIRE_RNA.
+Experimental and opt-in: the path, the text format and the 0.5 A bins of the table are assumed,
+until tests/unit/scores/test_dfire.py checks them against the binary.
+It is an alternative to the binary: the table is loaded once and memory-mapped, and all the
+predictions are scored in the same process.
+"""
+
+import os
+from typing import List, Optional
+
+from src.score_abstract.score_abstract_potential import (
+    PairPotential,
+    ScoreAbstractPotential,
+    read_pair_table,
+)
+
+DFIRE_TABLE_PATH = os.path.join("lib", "dfire", "data", "dfire_rna.txt")
+# Width of the distance bins of the DFIRE-RNA table (in Angstrom)
+DFIRE_BIN_WIDTH = 0.5
+
+
+class ScoreDfireNumpy(ScoreAbstractPotential):
+    score_name = "DFIRE (NUMPY)"
+
+    def __init__(
+        self,
+        dfire_table_path: Optional[str] = None,
+        dfire_bin_width: float = DFIRE_BIN_WIDTH,
+        *args,
+        **kwargs,
+    ):
+        """
+        :param dfire_table_path: path to the text energy table of DFIRE-RNA
+        :param dfire_bin_width: width of the distance bins of the table (in Angstrom)
+        """
+        super(ScoreDfireNumpy, self).__init__(*args, **kwargs)
+        self.dfire_table_path = (
+            dfire_table_path if dfire_table_path is not None else DFIRE_TABLE_PATH
+        )
+        self.dfire_bin_width = dfire_bin_width
+
+    def get_table_paths(self) -> List[str]:
+        return [self.dfire_table_path]
+
+    def convert_table(self) -> PairPotential:
+        """
+        Convert the DFIRE-RNA table. There is one class with all the inter-residue pairs.
+        """
+        table, atom_types = read_pair_table(self.dfire_table_path)
+        cutoff = table.shape[-1] * self.dfire_bin_width
+        return PairPotential(table[None], atom_types, self.dfire_bin_width, cutoff)
@@ -10,20 +10,57 @@ https://doi.org/10.1007/s10100-013-0296-5
 """
 
 import os
-import subprocess
-from typing import Dict, Optional, Tuple
+import re
+from typing import Dict, List, Optional
 
 import numpy as np
 
-from src.score_abstract.score_abstract import ScoreAbstract
-from src.utils import time_it
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN, find_float
 
+MCQ_BIN_PATH = os.path.join("lib", "mcq4structures", "mcq-cli", "mcq-local")
+# The MCQ is the last value of the output
+MCQ_PATTERN = re.compile(rf"({FLOAT_PATTERN})\s*$")
+
+
+class ScoreMCQ(ScoreAbstractBinary):
+    tool_name = "mcq4structures"
+    # Each process starts a JVM
+    cpus_per_task = 2
+    memory_per_task = 1024
+    max_tasks = 4
 
-class ScoreMCQ(ScoreAbstract):
     def __init__(self, mcq_bin_path: Optional[str] = None, *args, **kwargs):
         super(ScoreMCQ, self).__init__(*args, **kwargs)
         self.mcq_bin_path = mcq_bin_path
 
+    @staticmethod
+    def get_mcq_command(
+        pred_path: str, native_path: str, mcq_bin_path: Optional[str] = None, mcq_mode: int = 2
+    ) -> List[str]:
+        """
+        Return the command that computes the MCQ Score with mcq-local.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :param mcq_bin_path: the binary path to the mcq-local file
+        :param mcq_mode: mode to use with the MCQ: (0: relaxed, 1: compare without violations
+            and 2: compare everything regardless of the violations)
+        :return: the binary and its arguments
+        """
+        mcq_bin_path = mcq_bin_path if mcq_bin_path is not None else MCQ_BIN_PATH
+        return [mcq_bin_path, "-r", str(mcq_mode), "-t", native_path, "-d", "tmp", pred_path]
+
+    @staticmethod
+    def parse_mcq(output: str) -> float:
+        """
+        Convert the output of mcq-local to the MCQ score.
+        :param output: the output of the MCQ command
+        :return: the MCQ Score
+        """
+        mcq_score = find_float(output, MCQ_PATTERN)
+        return mcq_score if mcq_score is not None else np.nan
+
     @staticmethod
     def compute_mcq(
         pred_path: str, native_path: str, mcq_bin_path: Optional[str] = None, mcq_mode: int = 2
@@ -37,34 +74,26 @@ class ScoreMCQ(ScoreAbstract):
             and 2: compare everything regardless of the violations)
         :return: the MCQ Score of the pred and native files
         """
-        mcq_bin_path = (
-            mcq_bin_path
-            if mcq_bin_path is not None
-            else os.path.join("lib", "mcq4structures", "mcq-cli", "mcq-local")
-        )
-        # Get the shell command that will be executed
-        command = (
-            f"{mcq_bin_path} -r {mcq_mode} -t {native_path} -d tmp {pred_path}"
-            + " | awk '{print $NF}' 2> /dev/null"
-        )
-        output = subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL)
-        try:
-            mcq_score = float(str(output.decode()).replace("\n", ""))
-        except ValueError:
-            mcq_score = np.nan
-        return mcq_score
+        command = ScoreMCQ.get_mcq_command(pred_path, native_path, mcq_bin_path, mcq_mode)
+        return ScoreMCQ.parse_mcq(run_command(command, ScoreMCQ.tool_name))
 
-    @time_it
-    def _compute(
-        self, pred_path: str, native_path: str, mcq_mode: int, *args, **kwargs
-    ) -> Tuple[Dict, Dict]:
+    def get_commands(
+        self, pred_path: str, native_path: str, mcq_mode: int = 2, *args, **kwargs
+    ) -> Dict[str, List[str]]:
         """
-        Compute the MCQ score for a given prediction and the native .pdb path.
+        Return the command to compute the MCQ score for a given prediction and the native.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path: the path to the .pdb file of the native structure.
         :param mcq_mode: mode to use with the MCQ: (0: relaxed, 1: compare without violations
             and 2: compare everythinig regardless of the violations)
-        :return: dictionary with the MCQ score for the given inputs
+        :return: dictionary with the MCQ command
         """
-        mcq_score = self.compute_mcq(pred_path, native_path, self.mcq_bin_path, mcq_mode)
-        return {"MCQ": mcq_score}  # type: ignore
+        return {"MCQ": self.get_mcq_command(pred_path, native_path, self.mcq_bin_path, mcq_mode)}
+
+    def get_binaries(self) -> List[str]:
+        return [self.mcq_bin_path if self.mcq_bin_path is not None else MCQ_BIN_PATH]
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        return {"MCQ": self.parse_mcq(output)}
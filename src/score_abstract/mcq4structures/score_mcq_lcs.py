@@ -9,20 +9,75 @@ BMC Bioinformatics, 18(1), 456. https://doi.org/10.1186/s12859-017-1867-6
 """
 
 import os
-import subprocess
-from typing import Dict, Optional, Tuple
-import time
+import re
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
-from src.score_abstract.score_abstract import ScoreAbstract
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import find_field
 
+MCQ_LCS_BIN_PATH = os.path.join("lib", "mcq4structures", "mcq-cli", "mcq-lcs")
+COVERAGE_PATTERN = re.compile(r"Coverage")
+RESIDUES_PATTERN = re.compile(r"Number of residues")
+
+
+class ScoreMCQLCS(ScoreAbstractBinary):
+    tool_name = "mcq4structures"
+    # Each process starts a JVM
+    cpus_per_task = 2
+    memory_per_task = 1024
+    max_tasks = 4
 
-class ScoreMCQLCS(ScoreAbstract):
     def __init__(self, mcq_bin_path: Optional[str] = None, *args, **kwargs):
         super(ScoreMCQLCS, self).__init__(*args, **kwargs)
         self.mcq_bin_path = mcq_bin_path
 
+    @staticmethod
+    def get_mcq_lcs_command(
+        pred_path: str,
+        native_path: str,
+        mcq_bin_path: Optional[str] = None,
+        mcq_threshold: float = 25,
+    ) -> List[str]:
+        """
+        Return the command that computes the LCS-TA metric with mcq-lcs.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :param mcq_bin_path: the binary path to the mcq-lcs file
+        :param mcq_threshold: threshold used for the computation of the longest sequence
+        :return: the binary and its arguments
+        """
+        mcq_bin_path = ScoreMCQLCS.get_mcq_lcs_bin_path(mcq_bin_path)
+        return [mcq_bin_path, "-t", native_path, pred_path, "-v", str(mcq_threshold)]
+
+    @staticmethod
+    def get_mcq_lcs_bin_path(mcq_bin_path: Optional[str] = None) -> str:
+        """
+        Return the path to the mcq-lcs binary, which is next to the mcq-local one.
+        :param mcq_bin_path: the binary path to the mcq-local or mcq-lcs file
+        """
+        if mcq_bin_path is None:
+            return MCQ_LCS_BIN_PATH
+        return mcq_bin_path.replace("mcq-local", "mcq-lcs")
+
+    @staticmethod
+    def parse_mcq_lcs(output: str) -> Tuple[float, float]:
+        """
+        Convert the output of the LCS-TA command to the coverage and number of residues.
+        :param output: the output of the LCS-TA command
+        :return: the coverage and number of residues
+        """
+        coverage = find_field(output, COVERAGE_PATTERN, 1)
+        nb_residues = find_field(output, RESIDUES_PATTERN, 3)
+        if coverage is None or nb_residues is None:
+            return np.nan, np.nan
+        try:
+            return float(coverage.rstrip("%")), float(nb_residues)
+        except ValueError:
+            return np.nan, np.nan
+
     @staticmethod
     def compute_mcq_lcs(
         pred_path: str,
@@ -40,50 +95,41 @@ class ScoreMCQLCS(ScoreAbstract):
         :param mcq_threshold: threshold used for the computation of the longest sequence
         :return: the coverage and number of residues
         """
-        mcq_bin_path = (
-            mcq_bin_path
-            if mcq_bin_path is not None
-            else os.path.join("lib", "mcq4structures", "mcq-cli", "mcq-local")
+        command = ScoreMCQLCS.get_mcq_lcs_command(
+            pred_path, native_path, mcq_bin_path, mcq_threshold
         )
-        mcq_bin_path = mcq_bin_path.replace("mcq-local", "mcq-lcs")
-        # Get the shell command that will be executed
-        command = (
-            f"{mcq_bin_path} -t {native_path} {pred_path} -v {mcq_threshold} "
-            f"> tmp/mcq_out.txt 2> /dev/null"
-        )
-        os.system(command)
-        command_cov = "cat tmp/mcq_out.txt | awk '/Coverage/ {print $2}'"
-        command_nb = "cat tmp/mcq_out.txt | awk '/Number of residues/ {print $4}'"
-        output_cov = subprocess.check_output(command_cov, shell=True, stderr=subprocess.DEVNULL)
-        output_nb = subprocess.check_output(command_nb, shell=True, stderr=subprocess.DEVNULL)
-        command_del = "rm tmp/mcq_out.txt"
-        os.system(command_del)
-        try:
-            coverage = str(output_cov.decode()).replace("\n", "")
-            lcs_coverage = float(coverage[:-1])  # Remove the "%"
-            nb_residue = float(str(output_nb.decode()).replace("\n", ""))
-        except ValueError:
-            lcs_coverage, nb_residue = np.nan, np.nan
-        return lcs_coverage, nb_residue  # type: ignore
+        return ScoreMCQLCS.parse_mcq_lcs(run_command(command, ScoreMCQLCS.tool_name))
 
-    def _compute(
+    def get_commands(
         self, pred_path: str, native_path: str, mcq_threshold: float = 25, *args, **kwargs
-    ) -> Tuple[Dict, Dict]:
+    ) -> Dict[str, List[str]]:
         """
-        Compute the LCS-TA metrics for a given prediction and the native .pdb path.
+        Return the command to compute the LCS-TA metrics for a given prediction and the native.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path: the path to the .pdb file of the native structure.
         :param mcq_threshold: threshold used for the computation of the longest sequence
-        :return: dictionary with the MCQ score for the given inputs
+        :return: dictionary with the LCS-TA command
         """
-        time_b = time.time()
-        lcs_coverage, nb_residue = self.compute_mcq_lcs(
-            pred_path, native_path, self.mcq_bin_path, mcq_threshold=mcq_threshold, *args, **kwargs
+        command = self.get_mcq_lcs_command(
+            pred_path, native_path, self.mcq_bin_path, mcq_threshold
         )
-        time_complete = time.time() - time_b
-        scores = {
+        return {"LCS-TA": command}
+
+    def get_binaries(self) -> List[str]:
+        return [self.get_mcq_lcs_bin_path(self.mcq_bin_path)]
+
+    def parse_output(
+        self,
+        name: str,
+        output: str,
+        pred_path: str,
+        native_path: str,
+        mcq_threshold: float = 25,
+        *args,
+        **kwargs,
+    ) -> Dict:
+        lcs_coverage, nb_residue = self.parse_mcq_lcs(output)
+        return {
             f"LCS-TA-COVERAGE-{mcq_threshold}": lcs_coverage,
             f"LCS-TA-RESIDUES-{mcq_threshold}": nb_residue,
         }
-        out_time = {key: time_complete for key in scores}
-        return scores, out_time
@@ -1,27 +1,73 @@
+import hashlib
 import json
-import subprocess
+import os
+from typing import Dict, List, Optional
 
 import numpy as np
 
-from src.score_abstract.score_abstract import ScoreAbstract
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
 
+OST_BIN_PATH = "ost"
 
-COMMAND = "ost compare-structures -r $NATIVE_PATH -m $PRED_PATH -o tmp/out.json"
 
-
-class AbstractOST(ScoreAbstract):
+class AbstractOST(ScoreAbstractBinary):
     """
     Class that is used to compute the scores using the OpenStructure library.
     """
 
-    def __init__(self, *args, **kwargs):
+    tool_name = "ost"
+    memory_per_task = 1024
+    # Name of the metric in the OpenStructure CLI and name of the output score
+    metric: str = ""
+    score_name: str = ""
+
+    def __init__(self, ost_bin_path: Optional[str] = None, *args, **kwargs):
+        """
+        :param ost_bin_path: path to the `ost` binary of OpenStructure
+        """
         super(AbstractOST, self).__init__(*args, **kwargs)
+        self.ost_bin_path = ost_bin_path if ost_bin_path is not None else OST_BIN_PATH
+
+    @staticmethod
+    def get_out_path(pred_path: str, native_path: str, metric: str) -> str:
+        """
+        Return the .json path where OpenStructure writes the metric.
+        Each (prediction, native, metric) has its own file, as the commands run concurrently.
+        """
+        key = hashlib.md5(f"{pred_path}_{native_path}_{metric}".encode()).hexdigest()
+        return os.path.join("tmp", "ost", f"{key}.json")
 
     @staticmethod
-    def _get_metric_from_json(metric: str) -> float:
+    def get_command(
+        pred_path: str, native_path: str, metric: str, ost_bin_path: str = OST_BIN_PATH
+    ) -> List[str]:
+        """
+        Return the OpenStructure command that computes the metric.
+        """
+        out_path = AbstractOST.get_out_path(pred_path, native_path, metric)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        return [
+            ost_bin_path,
+            "compare-structures",
+            "-r",
+            native_path,
+            "-m",
+            pred_path,
+            "-o",
+            out_path,
+            f"--{metric}",
+        ]
+
+    @staticmethod
+    def _get_metric_from_json(out_path: str, metric: str) -> float:
         """Return the metric from the json file."""
-        with open("tmp/out.json", "r") as f:
-            data = json.load(f)
+        try:
+            with open(out_path, "r") as f:
+                data = json.load(f)
+            os.remove(out_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return np.nan
         metric = metric.replace("-", "_").replace("qs_score", "qs_global")
         return data.get(metric.replace("-", "_"), np.nan)
 
@@ -30,7 +76,21 @@ class AbstractOST(ScoreAbstract):
         """
         Return the score given metric.
         """
-        command = COMMAND.replace("$NATIVE_PATH", native_path).replace("$PRED_PATH", pred_path)
-        command += f" --{metric}"
-        subprocess.run(command, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return AbstractOST._get_metric_from_json(metric)
+        run_command(AbstractOST.get_command(pred_path, native_path, metric), AbstractOST.tool_name)
+        out_path = AbstractOST.get_out_path(pred_path, native_path, metric)
+        return AbstractOST._get_metric_from_json(out_path, metric)
+
+    def get_binaries(self) -> List[str]:
+        return [self.ost_bin_path]
+
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
+        command = self.get_command(pred_path, native_path, self.metric, self.ost_bin_path)
+        return {self.metric: command}
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        out_path = self.get_out_path(pred_path, native_path, self.metric)
+        return {self.score_name: self._get_metric_from_json(out_path, self.metric)}
@@ -12,32 +12,19 @@ Source for the lDDT score:
     https://doi.org/10.1093/bioinformatics/btt473
 """
 
-from typing import Tuple, Dict
-
-
 from src.score_abstract.openstructure.abstract_ost import AbstractOST
-from src.score_abstract.score_abstract import ScoreAbstract
-from src.utils import time_it
 
 
-class ScorelDDT(ScoreAbstract):
+class ScorelDDT(AbstractOST):
+    metric = "lddt"
+    score_name = "lDDT"
+
     def __init__(self, *args, **kwargs):
         """
         Compute the lDDT score using the OpenStructure library.
         """
         super(ScorelDDT, self).__init__(*args, **kwargs)
 
-    @time_it
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
-        """
-        Compute the lDDT for a single prediction.
-        :param pred_path: the path to the .pdb file of a prediction.
-        :param native_path: the path to the .pdb file of the native structure.
-        :return: the lDDT score
-        """
-        lddt_score = self.compute_lddt(pred_path, native_path)
-        return {"lDDT": lddt_score}  # type: ignore
-
     @staticmethod
     def compute_lddt(pred_path: str, native_path: str) -> float:
         """
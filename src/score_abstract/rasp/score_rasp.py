@@ -9,23 +9,57 @@ Bioinformatics 27(8):1086-93
 """
 
 import os
-import subprocess
-import time
-from typing import Dict, List, Optional, Tuple
+import re
+from typing import Dict, List, Optional
 
+import numpy as np
 
-from src.score_abstract.score_abstract import ScoreAbstract
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN
 
+RASP_BIN_PATH = os.path.join("lib", "rasp", "bin", "rasp_fd")
+# The energy, number of contacts and normalized energy are the first three values of the output
+RASP_PATTERN = re.compile(
+    rf"^\s*({FLOAT_PATTERN})\s+({FLOAT_PATTERN})\s+({FLOAT_PATTERN})", re.MULTILINE
+)
 
-class ScoreRASP(ScoreAbstract):
+
+class ScoreRASP(ScoreAbstractBinary):
     """
     Class that implements the RASP code from the official website.
     """
 
+    tool_name = "RASP"
+    memory_per_task = 256
+
     def __init__(self, rasp_bin_path: Optional[str] = None, *args, **kwargs):
         super(ScoreRASP, self).__init__(*args, **kwargs)
         self.rasp_bin_path = rasp_bin_path
 
+    @staticmethod
+    def get_rasp_command(pred_path: str, rasp_bin_path: Optional[str] = None) -> List[str]:
+        """
+        Return the command to compute the RASP free energy.
+        :param pred_path: path to a .pdb file
+        :param rasp_bin_path: binary path to the rasp_fd file
+        :return: the binary and its arguments
+        """
+        rasp_bin_path = rasp_bin_path if rasp_bin_path is not None else RASP_BIN_PATH
+        return [rasp_bin_path, "-e", "all", "-p", pred_path]
+
+    @staticmethod
+    def parse_rasp(output: str) -> List:
+        """
+        Convert the output of rasp_fd to the RASP scores.
+        :param output: the standard output of the RASP command
+        :return: the Energy Score, the Number of Contacts and the Normalized Energy.
+        """
+        match = RASP_PATTERN.search(output)
+        if match is None:
+            return [np.nan] * 3
+        return [float(score) for score in match.groups()]
+
     @staticmethod
     def compute_rasp(pred_path: str, rasp_bin_path: Optional[str] = None) -> List:
         """
@@ -35,33 +69,23 @@ class ScoreRASP(ScoreAbstract):
         :return: the Energy Score, the Number of Contacts and the Normalized Energy.
         Refer to http://melolab.org/webrasp/howto.php for the instruction of outputs.
         """
-        rasp_bin_path = (
-            rasp_bin_path
-            if rasp_bin_path is not None
-            else os.path.join("lib", "rasp", "bin", "rasp_fd")
-        )
-        command = (
-            f"{rasp_bin_path} -e all -p {pred_path}" + """ | awk '{print $1 " " $2 " " $3}'"""
-        )
-        output = subprocess.check_output(command, shell=True, stderr=subprocess.DEVNULL)
-        rasp = output.decode().replace("\n", "").split()
-        rasp = [float(score) for score in rasp]  # type: ignore
-        return rasp
+        command = ScoreRASP.get_rasp_command(pred_path, rasp_bin_path)
+        return ScoreRASP.parse_rasp(run_command(command, ScoreRASP.tool_name))
+
+    def get_binaries(self) -> List[str]:
+        return [self.rasp_bin_path if self.rasp_bin_path is not None else RASP_BIN_PATH]
 
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
-        time_b = time.time()
-        energy_score, nb_contacts, normalized_energy = self.compute_rasp(
-            pred_path, self.rasp_bin_path
-        )
-        execution_time = time.time() - time_b
-        scores = {
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
+        return {"RASP": self.get_rasp_command(pred_path, self.rasp_bin_path)}
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        energy_score, nb_contacts, normalized_energy = self.parse_rasp(output)
+        return {
             "RASP-ENERGY": energy_score,
             "RASP-NB-CONTACTS": nb_contacts,
             "RASP-NORMALIZED-ENERGY": normalized_energy,
         }
-        times = {
-            "RASP-ENERGY": execution_time,
-            "RASP-NB-CONTACTS": execution_time,
-            "RASP-NORMALIZED-ENERGY": execution_time,
-        }
-        return scores, times
@@ -15,22 +15,55 @@ evaluation. Biophys J. 121: 142-156.
 """
 
 import os
-import subprocess
-from typing import Dict, List, Optional, Tuple
+import re
+from typing import Dict, List, Optional
 
-from src.score_abstract.score_abstract import ScoreAbstract
-from src.utils import time_it
+import numpy as np
 
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN, find_float
 
-class ScoreRsRNASP(ScoreAbstract):
+RS_RNASP_BIN_PATH = os.path.join("lib", "rs_rnasp", "rsRNASP")
+# rsRNASP only outputs the energy
+RS_RNASP_PATTERN = re.compile(rf"^\s*({FLOAT_PATTERN})\s*$")
+
+
+class ScoreRsRNASP(ScoreAbstractBinary):
     """
     Class that implements the rsRNASP code from the official github page.
     """
 
+    tool_name = "rsRNASP"
+    memory_per_task = 512
+
     def __init__(self, rs_rnasp_bin_path: Optional[str] = None, *args, **kwargs):
         super(ScoreRsRNASP, self).__init__(*args, **kwargs)
         self.rs_rnasp_bin_path = rs_rnasp_bin_path
 
+    @staticmethod
+    def get_rs_rnasp_command(pred_path: str, rs_rnasp_bin_path: Optional[str] = None) -> List[str]:
+        """
+        Return the command to compute the rsRNASP energy.
+        :param pred_path: path to a .pdb file
+        :param rs_rnasp_bin_path: binary path to the rsRNASP file
+        :return: the binary and its arguments
+        """
+        rs_rnasp_bin_path = (
+            rs_rnasp_bin_path if rs_rnasp_bin_path is not None else RS_RNASP_BIN_PATH
+        )
+        return [rs_rnasp_bin_path, pred_path]
+
+    @staticmethod
+    def parse_rs_rnasp(output: str) -> float:
+        """
+        Convert the output of rsRNASP to the rsRNASP score.
+        :param output: the standard output of rsRNASP
+        :return: the rsRNASP score
+        """
+        rs_rnasp = find_float(output, RS_RNASP_PATTERN)
+        return round(rs_rnasp, 3) if rs_rnasp is not None else np.nan
+
     @staticmethod
     def compute_rs_rnasp(pred_path: str, rs_rnasp_bin_path: Optional[str] = None) -> List:
         """
@@ -39,18 +72,22 @@ class ScoreRsRNASP(ScoreAbstract):
         :param rs_rnasp_bin_path: binary path to the rasp_fd file
         :return: the rsRNASP score
         """
-        rs_rnasp_bin_path = (
-            rs_rnasp_bin_path
-            if rs_rnasp_bin_path is not None
-            else os.path.join("lib", "rs_rnasp", "rsRNASP")
+        command = ScoreRsRNASP.get_rs_rnasp_command(pred_path, rs_rnasp_bin_path)
+        return ScoreRsRNASP.parse_rs_rnasp(  # type: ignore
+            run_command(command, ScoreRsRNASP.tool_name)
         )
-        command = f"{rs_rnasp_bin_path} {pred_path}"
-        output = subprocess.check_output(command, shell=True)
-        rs_rnasp = output.decode().replace("\n", "")
-        rs_rnasp = round(float(rs_rnasp), 3)  # type: ignore
-        return rs_rnasp  # type: ignore
-
-    @time_it
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
-        rs_rnasp = self.compute_rs_rnasp(pred_path, self.rs_rnasp_bin_path)
-        return {"rsRNASP": rs_rnasp}  # type: ignore
+
+    def get_binaries(self) -> List[str]:
+        return [
+            self.rs_rnasp_bin_path if self.rs_rnasp_bin_path is not None else RS_RNASP_BIN_PATH
+        ]
+
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
+        return {"rsRNASP": self.get_rs_rnasp_command(pred_path, self.rs_rnasp_bin_path)}
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        return {"rsRNASP": self.parse_rs_rnasp(output)}
@@ -0,0 +1,63 @@
+"""
+Class that computes the rsRNASP energy in Python, from the energy tables of rsRNASP.
+rsRNASP has a short-ranged table (small residue separations) and a long-ranged table.
+Both are merged in one memory-mapped table with a class per residue separation range.
+Experimental and opt-in: the paths and format of the tables, their bins (0.3 and 0.6 A) and the
+residue separation of the long-ranged table are assumed, until tests/unit/scores/test_rs_rnasp.py
+checks them against the binary.
+"""
+
+import os
+from typing import List, Optional
+
+from src.score_abstract.score_abstract_potential import (
+    PairPotential,
+    ScoreAbstractPotential,
+    merge_class_tables,
+)
+
+RS_RNASP_SHORT_TABLE_PATH = os.path.join("lib", "rs_rnasp", "energy", "short_ranged.txt")
+RS_RNASP_LONG_TABLE_PATH = os.path.join("lib", "rs_rnasp", "energy", "long_ranged.txt")
+# Width of the distance bins (in Angstrom) of the short-ranged and long-ranged tables
+RS_RNASP_BIN_WIDTHS = [0.3, 0.6]
+# Residue separation where each table starts to be used
+RS_RNASP_SEPARATION_EDGES = [1, 5]
+
+
+class ScoreRsRNASPNumpy(ScoreAbstractPotential):
+    score_name = "rsRNASP (NUMPY)"
+
+    def __init__(
+        self,
+        rs_rnasp_table_paths: Optional[List[str]] = None,
+        rs_rnasp_bin_widths: Optional[List[float]] = None,
+        rs_rnasp_weights: Optional[List[float]] = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        :param rs_rnasp_table_paths: paths to the short-ranged and long-ranged text tables
+        :param rs_rnasp_bin_widths: width of the distance bins of each table (in Angstrom)
+        :param rs_rnasp_weights: weight of the short-ranged and long-ranged energies
+        """
+        super(ScoreRsRNASPNumpy, self).__init__(*args, **kwargs)
+        self.rs_rnasp_table_paths = (
+            rs_rnasp_table_paths
+            if rs_rnasp_table_paths is not None
+            else [RS_RNASP_SHORT_TABLE_PATH, RS_RNASP_LONG_TABLE_PATH]
+        )
+        self.rs_rnasp_bin_widths = (
+            rs_rnasp_bin_widths if rs_rnasp_bin_widths is not None else RS_RNASP_BIN_WIDTHS
+        )
+        self.rs_rnasp_weights = rs_rnasp_weights
+
+    def get_table_paths(self) -> List[str]:
+        return self.rs_rnasp_table_paths
+
+    def convert_table(self) -> PairPotential:
+        return merge_class_tables(
+            self.rs_rnasp_table_paths,
+            self.rs_rnasp_bin_widths,
+            RS_RNASP_SEPARATION_EDGES,
+            self.rs_rnasp_weights,
+        )
@@ -2,12 +2,22 @@
 
 import os
 from abc import abstractmethod
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 
+from src.tracing import TRACER
+
 
 class ScoreAbstract:
+    # Whether the score can be computed directly from the frames of a mdtraj trajectory
+    traj_support: bool = False
+    # Whether the score can be computed from atoms in memory, without writing a .pdb file
+    memory_support: bool = False
+    # Whether the score can be computed from the context of a prediction shared with the
+    # other scores (see `src.decoy_context`)
+    context_support: bool = False
+
     def __init__(
         self,
         pred_path: Optional[List[str]] = None,
@@ -36,22 +46,74 @@ class ScoreAbstract:
         native_path = self.native_path if native_path is None else native_path
         if pred_paths is None or native_path is None:
             return {}, {}
-        scores: Dict = {}
-        times: Dict = {}
+        valid_paths = []
         for sub_path in pred_paths:
             if self.check_pdb_file(in_path=sub_path):
-                c_scores, c_times = self._compute(sub_path, native_path, *args, **kwargs)
-                for score_n, score in c_scores.items():
-                    if sub_path in scores:
-                        scores[sub_path][score_n] = score
-                        times[sub_path][score_n] = c_times[score_n]
-                    else:
-                        scores[sub_path] = {score_n: score}
-                        times[sub_path] = {score_n: c_times[score_n]}
+                valid_paths.append(sub_path)
             else:
                 logger.warning(f"FILE {sub_path} EITHER DOESN'T EXIST OR ISN'T A .pdb FILE")
+        with TRACER.span("compute", self.__class__.__name__, nb_predictions=len(valid_paths)):
+            return self._compute_batch(valid_paths, native_path, *args, **kwargs)
+
+    def _compute_batch(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the score for a list of existing .pdb predictions.
+        By default, it calls `_compute` for each prediction. Backends that can process
+        several predictions at once should override it.
+        :param pred_paths: list of paths to existing .pdb predictions.
+        :param native_path: path to the native .pdb file.
+        :return: dictionaries with the scores and times for each prediction path
+        """
+        scores: Dict = {}
+        times: Dict = {}
+        for sub_path in pred_paths:
+            c_scores, c_times = self._compute(sub_path, native_path, *args, **kwargs)
+            for score_n, score in c_scores.items():
+                if sub_path in scores:
+                    scores[sub_path][score_n] = score
+                    times[sub_path][score_n] = c_times[score_n]
+                else:
+                    scores[sub_path] = {score_n: score}
+                    times[sub_path] = {score_n: c_times[score_n]}
         return scores, times
 
+    def compute_traj(
+        self, traj: Any, native_path: str, names: List[str], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the score for each frame of a trajectory, without writing the frames to files.
+        Only available for the scores with `traj_support`.
+        :param traj: a mdtraj trajectory where each frame is a prediction.
+        :param native_path: path to the native .pdb file.
+        :param names: the name of each frame, used as key of the outputs.
+        :return: dictionaries with the scores and times for each frame name
+        """
+        raise NotImplementedError
+
+    def compute_atoms(
+        self, structures: Dict[str, Tuple], native: Optional[Tuple], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the score for predictions given as atoms in memory.
+        Only available for the scores with `memory_support`.
+        :param structures: the coordinates, residue names, atom names and residue indexes of
+                each prediction (as returned by `read_pdb_atoms`), with its name
+        :param native: the atoms of the native structure, or None
+        :return: dictionaries with the scores and times for each prediction name
+        """
+        raise NotImplementedError
+
+    def compute_context(self, context: Any, *args, **kwargs) -> Tuple[Dict, Dict]:
+        """
+        Compute the score for one prediction from its context, shared with the other scores
+        of the prediction. Only available for the scores with `context_support`.
+        :param context: the DecoyContext of the prediction, with the context of the native
+        :return: dictionaries with the scores and times for the prediction
+        """
+        raise NotImplementedError
+
     @staticmethod
     def check_pdb_file(in_path: str) -> bool:
         """
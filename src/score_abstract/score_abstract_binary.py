@@ -0,0 +1,190 @@
+"""
+Class for the scores that call an external binary for each prediction.
+The commands of all the predictions are submitted at once to the shared asynchronous runner.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from src.tool_runner import RUNNER
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.tools import check_binaries
+
+
+class ScoreAbstractBinary(ScoreAbstract):
+    # Name of the tool, used to limit the number of concurrent processes
+    tool_name: str = ""
+    # Maximum number of predictions given to one process. Tools that only take one file
+    # keep 1; tools with a multi-file input implement `get_batch_command`.
+    batch_size: int = 1
+    # Resources used by one process of the tool: CPU threads and memory (in MB). The runner
+    # only starts the processes that fit in the CPUs and memory of the node.
+    cpus_per_task: int = 1
+    memory_per_task: int = 100
+    # Default maximum number of processes of the tool, for the tools too heavy to run one per
+    # CPU. None to only use `max_processes` and the resources.
+    max_tasks: Optional[int] = None
+
+    def __init__(self, *args, **kwargs):
+        super(ScoreAbstractBinary, self).__init__(*args, **kwargs)
+
+    def get_binaries(self) -> List[str]:
+        """
+        Return the binaries used by the score (paths or names of binaries in the PATH).
+        """
+        raise NotImplementedError
+
+    def check_tools(self):
+        """
+        Check that the binaries of the score can be executed.
+        It raises a ToolNotFoundError otherwise, so the whole metric is skipped at once.
+        """
+        check_binaries(self.get_binaries())
+
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
+        """
+        Return the commands to run for one prediction.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: a dictionary with a name and the associated command (binary and arguments)
+        """
+        raise NotImplementedError
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        """
+        Convert the output of a command to scores.
+        :param name: the name of the command, as given by `get_commands`
+        :param output: the standard output of the command
+        :param pred_path: the path to the .pdb file of the prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: a dictionary with the name of the scores and their values
+        """
+        raise NotImplementedError
+
+    def get_batch_command(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> List[str]:
+        """
+        Return the command that scores several predictions with one process.
+        Only used when `batch_size` > 1.
+        :param pred_paths: the paths to the .pdb files of the predictions.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: the binary and its arguments
+        """
+        raise NotImplementedError
+
+    def parse_batch_output(
+        self, output: str, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Dict[str, Dict]:
+        """
+        Convert the output of a batch command to the scores of each prediction.
+        :param output: the standard output of the command
+        :param pred_paths: the paths to the .pdb files given to the command
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: a dictionary with the prediction path and its scores
+        """
+        raise NotImplementedError
+
+    def get_resources(self) -> Dict:
+        """Return the resources of one process, given to the runner."""
+        return {
+            "cpus": self.cpus_per_task,
+            "memory": self.memory_per_task,
+            "max_tasks": self.max_tasks,
+        }
+
+    def get_concurrency(self) -> int:
+        """Return the number of processes of the tool that can run at the same time."""
+        return RUNNER.get_concurrency(
+            self.tool_name, self.cpus_per_task, self.memory_per_task, self.max_tasks
+        )
+
+    def use_batch(self, *args, **kwargs) -> bool:
+        """
+        Whether the predictions are given by chunks to the tool (`get_batch_command`).
+        :return: True if the tool can score several predictions with the given parameters.
+        """
+        return self.batch_size > 1
+
+    def get_chunks(self, pred_paths: List[str]) -> List[List[str]]:
+        """
+        Split the predictions into chunks of at most `batch_size` paths.
+        The chunks are smaller when there are not enough predictions to use all the processes.
+        """
+        nb_processes = self.get_concurrency()
+        chunk_size = max(1, min(self.batch_size, math.ceil(len(pred_paths) / nb_processes)))
+        return [pred_paths[i : i + chunk_size] for i in range(0, len(pred_paths), chunk_size)]
+
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        """
+        Compute the scores for one prediction.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: dictionaries with the scores and the times
+        """
+        scores, times = self._compute_batch([pred_path], native_path, *args, **kwargs)
+        return scores.get(pred_path, {}), times.get(pred_path, {})
+
+    def _compute_batch(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Run the commands of all the predictions with the shared runner.
+        The time of each score is the time of the command that computed it.
+        :param pred_paths: list of paths to existing .pdb predictions.
+        :param native_path: path to the native .pdb file.
+        :return: dictionaries with the scores and times for each prediction path
+        """
+        self.check_tools()
+        if self.use_batch(*args, **kwargs) and len(pred_paths) > 1:
+            return self._compute_chunks(pred_paths, native_path, *args, **kwargs)
+        tasks = [
+            (pred_path, name, command)
+            for pred_path in pred_paths
+            for name, command in self.get_commands(pred_path, native_path, *args, **kwargs).items()
+        ]
+
+        def parser(index: int, output: str) -> Dict:
+            pred_path, name, _ = tasks[index]
+            return self.parse_output(name, output, pred_path, native_path, *args, **kwargs)
+
+        results = RUNNER.run(
+            [command for _, _, command in tasks], self.tool_name, parser, **self.get_resources()
+        )
+        scores: Dict = {}
+        times: Dict = {}
+        for (pred_path, _, _), (c_scores, execution_time) in zip(tasks, results):
+            scores.setdefault(pred_path, {}).update(c_scores)
+            times.setdefault(pred_path, {}).update({key: execution_time for key in c_scores})
+        return scores, times
+
+    def _compute_chunks(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Run one process per chunk of predictions, so the tool loads its data once per chunk.
+        The time of a chunk is divided between its predictions.
+        :param pred_paths: list of paths to existing .pdb predictions.
+        :param native_path: path to the native .pdb file.
+        :return: dictionaries with the scores and times for each prediction path
+        """
+        chunks = self.get_chunks(pred_paths)
+        commands = [
+            self.get_batch_command(chunk, native_path, *args, **kwargs) for chunk in chunks
+        ]
+
+        def parser(index: int, output: str) -> Dict:
+            return self.parse_batch_output(output, chunks[index], native_path, *args, **kwargs)
+
+        results = RUNNER.run(commands, self.tool_name, parser, **self.get_resources())
+        scores: Dict = {}
+        times: Dict = {}
+        for chunk, (c_scores, execution_time) in zip(chunks, results):
+            for pred_path in chunk:
+                scores[pred_path] = c_scores.get(pred_path, {})
+                times[pred_path] = {key: execution_time / len(chunk) for key in scores[pred_path]}
+        return scores, times
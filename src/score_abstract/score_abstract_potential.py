@@ -0,0 +1,514 @@
+"""
+Class for the knowledge-based energies computed in Python from distance-binned atom pair tables.
+Each table is converted once to a .npy file that is memory-mapped, so the worker processes share
+the same pages. The atom pairs are found with a KD-tree and the energy is a single bincount.
+A score with several potentials computes the neighbour list only once per structure.
+The potentials are experimental: the format and the binning of the tables of each tool are
+assumed, and they are only checked against the binaries by the tests of tests/unit/scores.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from scipy.spatial import cKDTree
+
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.tools import ToolNotFoundError
+from src.tracing import TRACER
+
+POTENTIALS_DIR = os.path.join("tmp", "potentials")
+
+
+class PairPotential:
+    def __init__(
+        self,
+        table: np.ndarray,
+        atom_types: List[str],
+        bin_width: float,
+        cutoff: float,
+        separation_edges: Optional[List[int]] = None,
+        class_weights: Optional[List[float]] = None,
+    ):
+        """
+        Distance-binned all-atom pair potential.
+        :param table: energies with shape (n_classes, n_types, n_types, n_bins). The classes
+                are the residue separation ranges.
+        :param atom_types: the name of each atom type, as `<residue>:<atom>` (e.g. `A:C1'`)
+        :param bin_width: width of the distance bins (in Angstrom)
+        :param cutoff: pairs further than the cutoff don't contribute to the energy
+        :param separation_edges: lower bound of the residue separation of each class. Pairs
+                with a smaller separation than the first edge are ignored. Default to [1]:
+                one class with all the pairs between different residues.
+        :param class_weights: weight of each class in the total energy. Default to 1.
+        """
+        self.table = table
+        self.atom_types = {atom_type: index for index, atom_type in enumerate(atom_types)}
+        self.bin_width = bin_width
+        self.cutoff = cutoff
+        self.separation_edges = np.array(
+            separation_edges if separation_edges is not None else [1], dtype=np.int64
+        )
+        self.class_weights = class_weights if class_weights is not None else [1.0] * table.shape[0]
+        self.weights = np.array(self.class_weights, dtype=np.float64)
+        # View of the table (not a copy), so a memory-mapped table stays shared between processes
+        self.flat_table = table.reshape(-1)
+
+    @property
+    def n_types(self) -> int:
+        return self.table.shape[1]
+
+    @property
+    def n_bins(self) -> int:
+        return self.table.shape[3]
+
+    def save(self, out_path: str):
+        """
+        Save the potential to a .npy table and a .json file with the metadata.
+        :param out_path: path to the .npy file
+        """
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        np.save(out_path, np.ascontiguousarray(self.table, dtype=np.float64))
+        metadata = {
+            "atom_types": list(self.atom_types),
+            "bin_width": self.bin_width,
+            "cutoff": self.cutoff,
+            "separation_edges": self.separation_edges.tolist(),
+            "class_weights": list(self.class_weights),
+        }
+        with open(out_path.replace(".npy", ".json"), "w") as f:
+            json.dump(metadata, f)
+
+    @staticmethod
+    def load(in_path: str, class_weights: Optional[List[float]] = None) -> "PairPotential":
+        """
+        Load a potential saved with `save`. The table is memory-mapped.
+        :param in_path: path to the .npy file
+        :param class_weights: weight of each class, it overrides the saved weights
+        """
+        with open(in_path.replace(".npy", ".json"), "r") as f:
+            metadata = json.load(f)
+        return PairPotential(
+            np.load(in_path, mmap_mode="r"),
+            metadata["atom_types"],
+            metadata["bin_width"],
+            metadata["cutoff"],
+            metadata["separation_edges"],
+            class_weights if class_weights is not None else metadata["class_weights"],
+        )
+
+    def get_type_indexes(self, residue_names: List[str], atom_names: List[str]) -> np.ndarray:
+        """
+        Return the type index of each atom, -1 for the atoms without type.
+        """
+        return np.array(
+            [
+                self.atom_types.get(f"{residue}:{atom}", -1)
+                for residue, atom in zip(residue_names, atom_names)
+            ],
+            dtype=np.int64,
+        )
+
+    def compute_energy(
+        self, coordinates: np.ndarray, type_indexes: np.ndarray, residue_indexes: np.ndarray
+    ) -> float:
+        """
+        Compute the energy of a structure.
+        :param coordinates: array of shape (n_atoms, 3) in Angstrom
+        :param type_indexes: type index of each atom (-1 to ignore the atom)
+        :param residue_indexes: index of the residue of each atom in the sequence
+        :return: the energy of the structure
+        """
+        pairs, distances = get_neighbours(coordinates, type_indexes >= 0, self.cutoff)
+        return self.compute_energy_from_pairs(pairs, distances, type_indexes, residue_indexes)
+
+    def compute_energy_from_pairs(
+        self,
+        pairs: np.ndarray,
+        distances: np.ndarray,
+        type_indexes: np.ndarray,
+        residue_indexes: np.ndarray,
+    ) -> float:
+        """
+        Compute the energy from a neighbour list, that can be shared between potentials.
+        :param pairs: array of shape (n_pairs, 2) with the atom indexes of each pair
+        :param distances: distance of each pair (in Angstrom)
+        :param type_indexes: type index of each atom (-1 to ignore the atom)
+        :param residue_indexes: index of the residue of each atom in the sequence
+        :return: the energy of the structure
+        """
+        first, second = pairs[:, 0], pairs[:, 1]
+        separation = np.abs(residue_indexes[first] - residue_indexes[second])
+        classes = np.searchsorted(self.separation_edges, separation, side="right") - 1
+        keep = (
+            (classes >= 0)
+            & (distances <= self.cutoff)
+            & (type_indexes[first] >= 0)
+            & (type_indexes[second] >= 0)
+        )
+        first, second, classes = first[keep], second[keep], classes[keep]
+        bins = np.minimum((distances[keep] / self.bin_width).astype(np.int64), self.n_bins - 1)
+        flat_index = np.ravel_multi_index(
+            (classes, type_indexes[first], type_indexes[second], bins), self.table.shape
+        )
+        # Energy of each class, weighted after the sum so the table is never modified
+        class_energies = np.bincount(
+            classes, weights=self.flat_table[flat_index], minlength=len(self.weights)
+        )
+        return float(np.dot(class_energies, self.weights))
+
+
+def get_neighbours(
+    coordinates: np.ndarray, mask: np.ndarray, cutoff: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the pairs of atoms closer than the cutoff, using a KD-tree.
+    :param coordinates: array of shape (n_atoms, 3) in Angstrom
+    :param mask: the atoms to consider
+    :param cutoff: maximum distance between the atoms of a pair
+    :return: the atom indexes of each pair, with shape (n_pairs, 2), and their distances
+    """
+    indexes = np.flatnonzero(mask)
+    pairs = cKDTree(coordinates[indexes]).query_pairs(cutoff, output_type="ndarray")
+    pairs = indexes[pairs.reshape(-1, 2)]
+    distances = np.linalg.norm(coordinates[pairs[:, 0]] - coordinates[pairs[:, 1]], axis=1)
+    return pairs, distances
+
+
+def check_tables(table_paths: List[str]):
+    """
+    Check that the energy tables exist.
+    It raises a ToolNotFoundError otherwise, so the whole metric is skipped at once.
+    :param table_paths: paths to the energy tables
+    """
+    missing = [table_path for table_path in table_paths if not os.path.isfile(table_path)]
+    if len(missing) > 0:
+        raise ToolNotFoundError(f"ENERGY TABLES NOT FOUND : {missing}")
+
+
+def read_pair_table(table_path: str) -> Tuple[np.ndarray, List[str]]:
+    """
+    Read a text table of pair energies. Each line has the two atom types followed by the
+    energy of each distance bin. An atom type is either one `<residue>:<atom>` token or two
+    tokens `<residue> <atom>`. Lines starting with `#` are ignored, and the other lines
+    raise a ValueError if they do not have this format.
+    :param table_path: path to the text table
+    :return: a symmetric table of shape (n_types, n_types, n_bins) and the atom types
+    """
+    rows: Dict[Tuple[str, str], List[float]] = {}
+    with open(table_path, "r") as f:
+        for line_index, line in enumerate(f):
+            tokens = line.split()
+            if len(tokens) == 0 or tokens[0].startswith("#"):
+                continue
+            labels = []
+            for token in tokens:
+                try:
+                    float(token)
+                    break
+                except ValueError:
+                    labels.append(token)
+            try:
+                energies = [float(token) for token in tokens[len(labels) :]]
+            except ValueError:
+                energies = []
+            if len(labels) == 4:
+                labels = [f"{labels[0]}:{labels[1]}", f"{labels[2]}:{labels[3]}"]
+            if len(labels) != 2 or len(energies) == 0:
+                raise ValueError(
+                    f"LINE {line_index + 1} OF {table_path} CAN NOT BE PARSED : {line.strip()}"
+                )
+            rows[(labels[0], labels[1])] = energies
+    atom_types = sorted({atom_type for pair in rows for atom_type in pair})
+    type_indexes = {atom_type: index for index, atom_type in enumerate(atom_types)}
+    n_bins = max(len(energies) for energies in rows.values())
+    table = np.zeros((len(atom_types), len(atom_types), n_bins), dtype=np.float64)
+    for (first, second), energies in rows.items():
+        index_1, index_2 = type_indexes[first], type_indexes[second]
+        table[index_1, index_2, : len(energies)] = energies
+        table[index_2, index_1, : len(energies)] = energies
+    return table, atom_types
+
+
+def merge_class_tables(
+    table_paths: List[str],
+    bin_widths: List[float],
+    separation_edges: List[int],
+    class_weights: Optional[List[float]] = None,
+) -> PairPotential:
+    """
+    Merge one text table per residue separation class in one potential.
+    The tables are converted to the finest bin width, so they share the same distance bins.
+    :param table_paths: path to the text table of each class
+    :param bin_widths: width of the distance bins of each table (in Angstrom)
+    :param separation_edges: residue separation where each table starts to be used
+    :param class_weights: weight of each class in the total energy
+    :return: the potential with one class per table
+    """
+    bin_width = min(bin_widths)
+    tables, all_types = [], []
+    for table_path, c_bin_width in zip(table_paths, bin_widths):
+        ratio = c_bin_width / bin_width
+        if not np.isclose(ratio, round(ratio)):
+            raise ValueError(f"BIN WIDTHS SHOULD BE MULTIPLES : {bin_widths}")
+        table, atom_types = read_pair_table(table_path)
+        tables.append((np.repeat(table, int(round(ratio)), axis=-1), atom_types))
+        all_types.extend(atom_types)
+    atom_types = sorted(set(all_types))
+    type_indexes = {atom_type: index for index, atom_type in enumerate(atom_types)}
+    n_bins = max(table.shape[-1] for table, _ in tables)
+    full_table = np.zeros((len(tables), len(atom_types), len(atom_types), n_bins))
+    for index, (table, c_types) in enumerate(tables):
+        indexes = [type_indexes[atom_type] for atom_type in c_types]
+        full_table[index][np.ix_(indexes, indexes)] = np.pad(
+            table, ((0, 0), (0, 0), (0, n_bins - table.shape[-1]))
+        )
+    return PairPotential(
+        full_table,
+        atom_types,
+        bin_width,
+        n_bins * bin_width,
+        separation_edges[: len(tables)],
+        class_weights,
+    )
+
+
+def read_pdb_atoms(pdb_path: str) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+    """
+    Read the atoms of the first model of a .pdb file.
+    :param pdb_path: path to a .pdb file
+    :return: the coordinates, the residue names, the atom names and the residue indexes
+    """
+    with open(pdb_path, "r") as f:
+        return parse_pdb_atoms(f)
+
+
+def parse_pdb_atoms(lines: Iterable[str]) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+    """
+    Parse the atoms of the first model from the lines of a .pdb file.
+    :param lines: the lines of a .pdb file
+    :return: the coordinates, the residue names, the atom names and the residue indexes
+    """
+    coordinates, residue_names, atom_names, residue_indexes = [], [], [], []
+    previous_residue, residue_index = None, -1
+    for line in lines:
+        if line.startswith("ENDMDL"):
+            break
+        if not line.startswith(("ATOM", "HETATM")):
+            continue
+        residue_key = line[21:27]
+        if residue_key != previous_residue:
+            previous_residue, residue_index = residue_key, residue_index + 1
+        coordinates.append([float(line[30:38]), float(line[38:46]), float(line[46:54])])
+        residue_names.append(line[17:20].strip())
+        atom_names.append(line[12:16].strip().replace("*", "'"))
+        residue_indexes.append(residue_index)
+    return (
+        np.array(coordinates, dtype=np.float64).reshape(-1, 3),
+        residue_names,
+        atom_names,
+        np.array(residue_indexes, dtype=np.int64),
+    )
+
+
+def format_pdb_atoms(
+    coordinates: np.ndarray,
+    residue_names: List[str],
+    atom_names: List[str],
+    residue_indexes: np.ndarray,
+    chain: str = "A",
+) -> str:
+    """
+    Write atoms in the .pdb format, the inverse of `read_pdb_atoms`.
+    :param coordinates: array of shape (n_atoms, 3)
+    :param residue_names: name of the residue of each atom
+    :param atom_names: name of each atom
+    :param residue_indexes: index (starting at 0) of the residue of each atom
+    :param chain: chain identifier
+    :return: the content of the .pdb file
+    """
+    lines = []
+    for index, ((x, y, z), residue, atom, residue_index) in enumerate(
+        zip(coordinates, residue_names, atom_names, residue_indexes)
+    ):
+        name = atom if len(atom) == 4 else f" {atom:<3s}"
+        lines.append(
+            f"ATOM  {(index + 1) % 100000:5d} {name} {residue:>3s} {chain}"
+            f"{(residue_index + 1) % 10000:4d}    {x:8.3f}{y:8.3f}{z:8.3f}"
+            f"{1.0:6.2f}{0.0:6.2f}          {atom[0]:>2s}\n"
+        )
+    return "".join(lines) + "TER\nEND\n"
+
+
+class ScoreAbstractPotential(ScoreAbstract):
+    traj_support = True
+    memory_support = True
+    context_support = True
+    # Name of the output score
+    score_name: str = ""
+
+    def __init__(self, *args, **kwargs):
+        super(ScoreAbstractPotential, self).__init__(*args, **kwargs)
+        self._potentials: Dict[str, PairPotential] = {}
+
+    def __getstate__(self) -> Dict:
+        # The memory-mapped potentials are not copied to the worker processes, that map them
+        state = dict(self.__dict__)
+        state["_potentials"] = {}
+        return state
+
+    def get_table_paths(self) -> List[str]:
+        """Return the paths to the original energy tables of the potential."""
+        raise NotImplementedError
+
+    def check_tools(self):
+        """
+        Check that the energy tables of the score exist.
+        It raises a ToolNotFoundError otherwise, so the whole metric is skipped at once.
+        """
+        check_tables(self.get_table_paths())
+
+    def convert_table(self) -> PairPotential:
+        """Read the original energy tables and convert them to a PairPotential."""
+        raise NotImplementedError
+
+    def get_potentials(self) -> Dict[str, PairPotential]:
+        """
+        Return the potentials of the score, with the name of the output score.
+        Scores with several potentials override it, so the potentials share the neighbour list.
+        """
+        return {
+            self.score_name: self.load_potential(
+                self.score_name, self.get_table_paths(), self.convert_table
+            )
+        }
+
+    def load_potential(
+        self, name: str, table_paths: List[str], convert_fn: Callable[[], PairPotential]
+    ) -> PairPotential:
+        """
+        Return a potential. The original tables are converted to .npy only once and then
+        memory-mapped by every process.
+        :param name: name of the potential
+        :param table_paths: paths to the original tables
+        :param convert_fn: function that converts the original tables to a PairPotential
+        """
+        if name in self._potentials:
+            return self._potentials[name]
+        check_tables(table_paths)
+        key = hashlib.md5("_".join([name] + table_paths).encode()).hexdigest()
+        npy_path = os.path.join(POTENTIALS_DIR, f"{self.__class__.__name__}_{key}.npy")
+        last_update = max(os.path.getmtime(table_path) for table_path in table_paths)
+        logger.warning(f"EXPERIMENTAL POTENTIAL : {name} (FORMAT AND BINS OF THE TABLES ASSUMED)")
+        if not os.path.exists(npy_path) or os.path.getmtime(npy_path) < last_update:
+            logger.debug(f"CONVERSION OF THE ENERGY TABLES : {table_paths}")
+            convert_fn().save(npy_path)
+        self._potentials[name] = PairPotential.load(npy_path)
+        return self._potentials[name]
+
+    def get_type_indexes(
+        self, residue_names: List[str], atom_names: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Return the type index of each atom for each potential."""
+        return {
+            name: potential.get_type_indexes(residue_names, atom_names)
+            for name, potential in self.get_potentials().items()
+        }
+
+    def compute_energies(
+        self,
+        coordinates: np.ndarray,
+        type_indexes: Dict[str, np.ndarray],
+        residue_indexes: np.ndarray,
+    ) -> Dict[str, float]:
+        """
+        Compute the energy of each potential from one neighbour list.
+        :param coordinates: array of shape (n_atoms, 3) in Angstrom
+        :param type_indexes: type index of each atom for each potential
+        :param residue_indexes: index of the residue of each atom in the sequence
+        :return: the energy of each potential
+        """
+        potentials = self.get_potentials()
+        mask = np.any([c_types >= 0 for c_types in type_indexes.values()], axis=0)
+        cutoff = max(potential.cutoff for potential in potentials.values())
+        pairs, distances = get_neighbours(coordinates, mask, cutoff)
+        return {
+            name: round(
+                potential.compute_energy_from_pairs(
+                    pairs, distances, type_indexes[name], residue_indexes
+                ),
+                3,
+            )
+            for name, potential in potentials.items()
+        }
+
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        """
+        Compute the energies of one prediction.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: not used, the energy only depends on the prediction.
+        :return: dictionaries with the scores and the time
+        """
+        self.get_potentials()
+        time_b = time.time()
+        with TRACER.span("parse", self.__class__.__name__):
+            coordinates, residue_names, atom_names, residue_indexes = read_pdb_atoms(pred_path)
+        type_indexes = self.get_type_indexes(residue_names, atom_names)
+        scores = self.compute_energies(coordinates, type_indexes, residue_indexes)
+        execution_time = time.time() - time_b
+        return scores, {name: execution_time for name in scores}
+
+    def compute_context(self, context: Any, *args, **kwargs) -> Tuple[Dict, Dict]:
+        """
+        Compute the energies of one prediction from the atoms of its context.
+        """
+        self.get_potentials()
+        time_b = time.time()
+        coordinates, residue_names, atom_names, residue_indexes = context.get_atoms()
+        type_indexes = self.get_type_indexes(residue_names, atom_names)
+        scores = self.compute_energies(coordinates, type_indexes, residue_indexes)
+        execution_time = time.time() - time_b
+        return scores, {name: execution_time for name in scores}
+
+    def compute_atoms(
+        self, structures: Dict[str, Tuple], native: Optional[Tuple], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the energies of predictions in memory. The native is not used.
+        """
+        self.get_potentials()
+        scores, times = {}, {}
+        for name, (coordinates, residue_names, atom_names, residue_indexes) in structures.items():
+            time_b = time.time()
+            type_indexes = self.get_type_indexes(residue_names, atom_names)
+            scores[name] = self.compute_energies(coordinates, type_indexes, residue_indexes)
+            execution_time = time.time() - time_b
+            times[name] = {score_name: execution_time for score_name in scores[name]}
+        return scores, times
+
+    def compute_traj(
+        self, traj: Any, native_path: str, names: List[str], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute the energies of each frame. The atom types are computed once per chunk.
+        """
+        self.get_potentials()
+        time_b = time.time()
+        atoms = list(traj.topology.atoms)
+        type_indexes = self.get_type_indexes(
+            [atom.residue.name for atom in atoms],
+            [atom.name.replace("*", "'") for atom in atoms],
+        )
+        residue_indexes = np.array([atom.residue.index for atom in atoms], dtype=np.int64)
+        scores, times = {}, {}
+        for name, xyz in zip(names, traj.xyz):
+            # mdtraj coordinates are in nm
+            scores[name] = self.compute_energies(xyz * 10, type_indexes, residue_indexes)
+        execution_time = (time.time() - time_b) / max(1, len(names))
+        for name in names:
+            times[name] = {score_name: execution_time for score_name in scores[name]}
+        return scores, times
@@ -3,7 +3,7 @@ Class that get and convert the pdb files to structures encoded by RNA-tools.
 """
 
 import os
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from lib.rna_assessment.RNA_normalizer.structures.pdb_struct import PDBStruct
 
@@ -11,6 +11,9 @@ from src.score_abstract.score_abstract import ScoreAbstract
 
 
 class ScoreAbstractRnaAssessment(ScoreAbstract):
+    # The structures (with the MC-Annotate annotations) are shared by RMSD, INF, DI and P-VALUE
+    context_support = True
+
     def __init__(self, mc_annotate_bin: Optional[str] = None, *args, **kwargs):
         """
         :param mc_annotate_bin: path to the binary MC-Annotate file. Default in `config.py` file.
@@ -67,3 +70,21 @@ class ScoreAbstractRnaAssessment(ScoreAbstract):
             pred_path, native_path, mc_annotate_bin=self.mc_annotate_bin
         )
         return self._compute_from_structure(native_struc, pred_struc)
+
+    def get_context_structure(self, context: Any) -> PDBStruct:
+        """Return the structure of a context, loaded once for all the RNA-Assessment scores."""
+
+        def load_structure() -> PDBStruct:
+            structure = PDBStruct(self.mc_annotate_bin)
+            structure.load(context.path, None)
+            return structure
+
+        return context.get(f"rna_assessment_{self.mc_annotate_bin}", load_structure)
+
+    def compute_context(self, context: Any, *args, **kwargs) -> Tuple[Dict, Dict]:
+        """
+        Compute a given score from the structures of the prediction and native contexts.
+        """
+        native_struc = self.get_context_structure(context.native)
+        pred_struc = self.get_context_structure(context)
+        return self._compute_from_structure(native_struc, pred_struc)
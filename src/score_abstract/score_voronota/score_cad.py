@@ -10,51 +10,176 @@ The associated paper is the following:
     Pages W259–W263, https://doi.org/10.1093/nar/gku294
 """
 
-import subprocess
-from typing import Dict, Tuple
+import os
+from typing import Dict, List, Optional
 
 import numpy as np
 
-from src.score_abstract.score_abstract import ScoreAbstract
-from src.utils import time_it
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import ANY_LINE, find_field
 
+CAD_BIN_PATH = "voronota-cadscore"
+# Voronota stores the contacts of each input structure there, so the contacts of the
+# native are computed only once for all the predictions
+CAD_CACHE_DIR = os.path.join("tmp", "voronota_cache")
 
-class ScoreCAD(ScoreAbstract):
-    def __init__(self, *args, **kwargs):
+
+class ScoreCAD(ScoreAbstractBinary):
+    tool_name = "voronota"
+    # voronota-cadscore compares several models to the target in one run
+    batch_size = 100
+    memory_per_task = 512
+
+    def __init__(self, cad_bin_path: Optional[str] = None, *args, **kwargs):
+        """
+        :param cad_bin_path: path to the voronota-cadscore binary
+        """
         super(ScoreCAD, self).__init__(*args, **kwargs)
+        self.cad_bin_path = cad_bin_path if cad_bin_path is not None else CAD_BIN_PATH
+
+    def use_batch(self, cad_residue_dir: Optional[str] = None, *args, **kwargs) -> bool:
+        # The per-residue scores are written to one file per prediction
+        return cad_residue_dir is None and super(ScoreCAD, self).use_batch()
 
     @staticmethod
-    def compute_cad_score(
+    def get_cad_command(
         pred_path: str,
         native_path: str,
-    ) -> float:
+        residue_path: Optional[str] = None,
+        cad_bin_path: str = CAD_BIN_PATH,
+    ) -> List[str]:
         """
-        Compute the CAD score using the voronota implementation.
+        Return the command that computes the CAD score with voronota.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path: the path to the .pdb file of the native structure.
-        :return: return the CAD score using bash command
+        :param residue_path: path where to write the per-residue CAD scores
+        :param cad_bin_path: path to the voronota-cadscore binary
+        :return: the binary and its arguments
+        """
+        return ScoreCAD.get_cad_batch_command([pred_path], native_path, residue_path, cad_bin_path)
+
+    @staticmethod
+    def get_cad_batch_command(
+        pred_paths: List[str],
+        native_path: str,
+        residue_path: Optional[str] = None,
+        cad_bin_path: str = CAD_BIN_PATH,
+    ) -> List[str]:
+        """
+        Return the command that computes the CAD score of several predictions with voronota.
+        :param pred_paths: the paths to the .pdb files of the predictions.
+        :param native_path: the path to the .pdb file of the native structure.
+        :param residue_path: path where to write the per-residue CAD scores
+        :param cad_bin_path: path to the voronota-cadscore binary
+        :return: the binary and its arguments
+        """
+        command = [cad_bin_path, "--input-target", native_path, "--input-model", *pred_paths]
+        command += ["--cache-dir", CAD_CACHE_DIR]
+        if residue_path is not None:
+            command += ["--output-residue-scores", residue_path]
+        return command
+
+    @staticmethod
+    def get_residue_path(pred_path: str, cad_residue_dir: Optional[str]) -> Optional[str]:
+        """
+        Return the path of the per-residue CAD scores of a prediction.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param cad_residue_dir: directory of the per-residue CAD scores. None to skip them.
+        """
+        if cad_residue_dir is None:
+            return None
+        os.makedirs(cad_residue_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(pred_path))[0]
+        return os.path.join(cad_residue_dir, f"{name}_residues.txt")
+
+    @staticmethod
+    def parse_cad_score(output: str) -> float:
         """
-        # Get the shell command that will be executed
-        command = (
-            f"voronota-cadscore --input-target {native_path} --input-model {pred_path}"
-            + "| awk '{print $5}'"
-        )
-        output = subprocess.check_output(command, shell=True)
+        Convert the output of voronota-cadscore to the CAD score.
+        :param output: the output of the CAD command
+        :return: the CAD score. NaN if voronota failed.
+        """
+        # The CAD score is the fifth field of the output
+        field = find_field(output, ANY_LINE, 4)
+        if field is None:
+            return np.nan
         try:
-            cad_score = float(str(output.decode()).replace("\n", ""))
+            cad_score = float(field)
         except ValueError:
             cad_score = np.nan
         if cad_score == 0:
             cad_score = np.nan
         return cad_score
 
-    @time_it
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+    @staticmethod
+    def parse_cad_batch(output: str, pred_paths: List[str]) -> Dict[str, float]:
+        """
+        Convert the output of voronota-cadscore with several models to the CAD scores.
+        Each line starts with the target and the model files, the CAD score is the fifth field.
+        The lines are matched with the model paths (compared as absolute paths). A prediction
+        without a line has a NaN score.
+        :param output: the output of the CAD command
+        :param pred_paths: the predictions given to the command
+        :return: dictionary with the prediction path and its CAD score
+        """
+        lines = [line.split() for line in output.splitlines() if len(line.split()) >= 5]
+        by_name = {os.path.abspath(fields[1]): " ".join(fields) for fields in lines}
+        return {
+            pred_path: ScoreCAD.parse_cad_score(by_name.get(os.path.abspath(pred_path), ""))
+            for pred_path in pred_paths
+        }
+
+    @staticmethod
+    def compute_cad_score(
+        pred_path: str,
+        native_path: str,
+    ) -> float:
         """
-        Compute the CAD score for a given prediction and the native .pdb path.
+        Compute the CAD score using the voronota implementation.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path: the path to the .pdb file of the native structure.
-        :return: dictionary with the CAD score for the given inputs
+        :return: return the CAD score using bash command
         """
-        mcq_score = self.compute_cad_score(pred_path, native_path)
-        return {"CAD": mcq_score}  # type: ignore
+        command = ScoreCAD.get_cad_command(pred_path, native_path)
+        return ScoreCAD.parse_cad_score(run_command(command, ScoreCAD.tool_name))
+
+    def get_binaries(self) -> List[str]:
+        return [self.cad_bin_path]
+
+    def get_commands(
+        self,
+        pred_path: str,
+        native_path: str,
+        cad_residue_dir: Optional[str] = None,
+        *args,
+        **kwargs,
+    ) -> Dict[str, List[str]]:
+        """
+        Return the command to compute the CAD score for a given prediction and the native.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :param cad_residue_dir: directory where to write the per-residue CAD scores
+        :return: dictionary with the CAD command
+        """
+        residue_path = self.get_residue_path(pred_path, cad_residue_dir)
+        command = self.get_cad_command(pred_path, native_path, residue_path, self.cad_bin_path)
+        return {"CAD": command}
+
+    def get_batch_command(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> List[str]:
+        return self.get_cad_batch_command(pred_paths, native_path, cad_bin_path=self.cad_bin_path)
+
+    def parse_batch_output(
+        self, output: str, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Dict[str, Dict]:
+        return {
+            pred_path: {"CAD": cad_score}
+            for pred_path, cad_score in self.parse_cad_batch(output, pred_paths).items()
+        }
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        return {"CAD": self.parse_cad_score(output)}
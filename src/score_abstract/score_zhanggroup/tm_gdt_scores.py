@@ -3,6 +3,10 @@ Class that returns the scores from the Zhanggroup code to compute :
     GDT-TS score (Global Distance Test Total Score): the sum of percent of residues that are
     within the 1, 2, 4 and 8A sphere between a superimposed model and native reference structure,
     divided by 4.
+    GDT-HA score (High Accuracy): the same with the 0.5, 1, 2 and 4A spheres.
+    TM-score: from the same superposition, normalised by the length of the native.
+TMscore runs once per (prediction, native): the parsed output is shared by all the classes, in
+a bounded cache.
 
 The original code can be found at the following website:
         https://zhanggroup.org/TM-score/
@@ -12,22 +16,75 @@ Source for the GDT-TS score (adapted from the CASP competition):
 """
 
 import os
-import subprocess
-import time
-from typing import Dict, Optional, Tuple
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from loguru import logger
 
-from src.score_abstract.score_abstract import ScoreAbstract
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN, find_float
 
+GDT_DISTANCES = [1, 2, 4, 8]
+# Line of the TMscore output like `GDT-TS-score= 0.7500 %(d<1)=0.5000 %(d<2)=0.7500 ...`
+GDT_TS_PATTERN = re.compile(rf"^GDT-TS-score=\s*({FLOAT_PATTERN})(.*)$", re.MULTILINE)
+GDT_TS_DETAILED_PATTERN = re.compile(rf"%\(d<(\d+)\)=\s*({FLOAT_PATTERN})")
+GDT_HA_PATTERN = re.compile(rf"^GDT-HA-score=\s*({FLOAT_PATTERN})", re.MULTILINE)
+TM_SCORE_PATTERN = re.compile(rf"^TM-score\s*=\s*({FLOAT_PATTERN})", re.MULTILINE)
+GDT_TS_NAMES = ["GDT-TS"] + [f"GDT-TS@{distance}" for distance in GDT_DISTANCES]
 
-class GdtScores(ScoreAbstract):
+# Maximum number of parsed TMscore outputs kept for the other scores of the superposition
+ZHANG_CACHE_SIZE = 10000
+
+
+class ZhangOutputs:
+    def __init__(self, max_size: int = ZHANG_CACHE_SIZE):
+        """
+        Parsed TMscore outputs, shared between the scores that use the same superposition.
+        The least recently used outputs are removed once `max_size` is reached, so long runs
+        (watch mode, manifests, the Python API) do not keep every output.
+        :param max_size: maximum number of outputs kept
+        """
+        self.max_size = max_size
+        self._outputs: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._outputs
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def get(self, key: Tuple) -> Dict:
+        """Return the scores of the output, an empty dictionary if it is not kept."""
+        if key not in self._outputs:
+            return {}
+        self._outputs.move_to_end(key)
+        return self._outputs[key]
+
+    def set(self, key: Tuple, scores: Dict):
+        """Keep the scores of an output, and remove the oldest ones above the maximum size."""
+        self._outputs[key] = scores
+        self._outputs.move_to_end(key)
+        while len(self._outputs) > self.max_size:
+            self._outputs.popitem(last=False)
+
+
+_ZHANG_OUTPUTS = ZhangOutputs()
+
+
+class GdtScores(ScoreAbstractBinary):
     """
     Compute the GDT-TS scores using the C++ code from the Zhanggroup.
     It basically runs the C++ code and get the output before parsing the outputs.
     """
 
+    tool_name = "TMscore"
+    memory_per_task = 64
+    # Names of the scores returned by the class, among the ones parsed from TMscore
+    score_names: List[str] = GDT_TS_NAMES
+
     def __init__(self, zhang_bin_path: Optional[str] = None, *args, **kwargs):
         """
         :param zhang_bin_path: path to the binary executable TMScore file
@@ -39,24 +96,68 @@ class GdtScores(ScoreAbstract):
         )
         super(GdtScores, self).__init__(*args, **kwargs)
 
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+    def get_binaries(self) -> List[str]:
+        return [self.bin_path]
+
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
         """
-        Compute the score for a given prediction and the native .pdb path.
+        Return the command to run TMscore for a given prediction and the native .pdb path.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path: the path to the .pdb file of the native structure.
-        :return: dictionary with the scores and the given values for the inputs
+        :return: dictionary with the TMscore command
+        """
+        return {"TMscore": self.get_zhanggroup_command(pred_path, native_path, self.bin_path)}
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        """
+        Return all the scores from the output of TMscore.
+        """
+        gdt_ts, gdt_ts_detailed = self.parse_zhanggroup_output(output)
+        return {
+            "TM-score (TMscore)": GdtScores.parse_float(output, TM_SCORE_PATTERN),
+            "GDT-TS": gdt_ts,
+            **gdt_ts_detailed,
+            "GDT-HA": GdtScores.parse_float(output, GDT_HA_PATTERN),
+        }
+
+    def _compute_batch(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
         """
-        all_scores = {}
-        # Get the different scores
-        time_b = time.time()
-        gdt_ts, gdt_ts_detailed = self._compute_zhanggroup_scores(
-            pred_path, native_path, self.bin_path
+        Run TMscore only for the predictions that were not aligned by another Zhanggroup score,
+        and return the scores of the class. The time is only given to the first score class
+        that runs the alignment.
+        """
+
+        def get_key(pred_path: str) -> Tuple:
+            return self.bin_path, pred_path, native_path, os.path.getmtime(pred_path)
+
+        missing = [
+            pred_path for pred_path in pred_paths if get_key(pred_path) not in _ZHANG_OUTPUTS
+        ]
+        all_scores, all_times = super(GdtScores, self)._compute_batch(
+            missing, native_path, *args, **kwargs
         )
-        execution_time = time.time() - time_b
-        all_scores["GDT-TS"] = gdt_ts
-        all_scores = {**all_scores, **gdt_ts_detailed}
-        times = {key: execution_time for key in all_scores}
-        return all_scores, times
+        scores: Dict = {}
+        times: Dict = {}
+        for pred_path in pred_paths:
+            if pred_path in all_scores:
+                _ZHANG_OUTPUTS.set(get_key(pred_path), all_scores[pred_path])
+            c_scores = _ZHANG_OUTPUTS.get(get_key(pred_path))
+            c_times = all_times.get(pred_path, {})
+            scores[pred_path] = {name: c_scores.get(name, np.nan) for name in self.score_names}
+            times[pred_path] = {name: c_times.get(name, 0.0) for name in self.score_names}
+        return scores, times
+
+    @staticmethod
+    def parse_float(output: str, pattern: re.Pattern) -> float:
+        """Return the float of the pattern in the TMscore output, NaN if not found."""
+        value = find_float(output, pattern)
+        return value if value is not None else np.nan
 
     @staticmethod
     def compute_gdt_ts(
@@ -107,20 +208,56 @@ class GdtScores(ScoreAbstract):
         :return: GDT-TS score and a dictionary with the score for
             d<1, d<2, d<4 and d<8 for the GDT-TS score
         """
-        # Get the shell command that will be executed
-        command = f"{zhang_bin_path} {pred_path} {native_path} | grep -E 'GDT-TS'"
-        distances = [1, 2, 4, 8]
-        try:
-            output = subprocess.check_output(command, shell=True)
-            scores = str(output.decode()).split("\n")
-            # Convert the output of the shell command to scores
-            gdt_ts = float(scores[0].split()[1])
-            # Get the d<1, d<2, d<4 and d<8 values for the GDT-TS score
-            gdt_ts_detailed = {
-                f"GDT-TS@{distances[index]}": float(value.split("=")[1])
-                for index, value in enumerate(scores[0].split("%")[1:])
-            }
-            return gdt_ts, gdt_ts_detailed
-        except subprocess.CalledProcessError:
+        command = GdtScores.get_zhanggroup_command(pred_path, native_path, zhang_bin_path)
+        output = run_command(command, GdtScores.tool_name)
+        if output == "":
             logger.debug(f"PATH TO TMscore binary not found : {zhang_bin_path}")
-            return np.nan, {f"GDT-TS@{distance}": np.nan for distance in distances}
+        return GdtScores.parse_zhanggroup_output(output)
+
+    @staticmethod
+    def get_zhanggroup_command(
+        pred_path: str,
+        native_path: str,
+        zhang_bin_path: str = os.path.join("lib", "zhanggroup", "TMscore"),
+    ) -> List[str]:
+        """
+        Return the command that runs TMscore.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :param zhang_bin_path: path to the binary executable TMScore file
+        :return: the binary and its arguments
+        """
+        return [zhang_bin_path, pred_path, native_path]
+
+    @staticmethod
+    def parse_zhanggroup_output(output: str) -> Tuple[float, Dict]:
+        """
+        Convert the GDT-TS line of TMscore to scores.
+        :param output: the output of the TMscore command
+        :return: GDT-TS score and a dictionary with the score for
+            d<1, d<2, d<4 and d<8 for the GDT-TS score
+        """
+        gdt_ts_detailed = {f"GDT-TS@{distance}": np.nan for distance in GDT_DISTANCES}
+        match = GDT_TS_PATTERN.search(output)
+        if match is None:
+            return np.nan, gdt_ts_detailed
+        # Get the d<1, d<2, d<4 and d<8 values for the GDT-TS score
+        for distance, value in GDT_TS_DETAILED_PATTERN.findall(match.group(2)):
+            gdt_ts_detailed[f"GDT-TS@{distance}"] = float(value)
+        return float(match.group(1)), gdt_ts_detailed
+
+
+class GdtHaScores(GdtScores):
+    """
+    Compute the GDT-HA score from the TMscore superposition.
+    """
+
+    score_names = ["GDT-HA"]
+
+
+class TMScoreZhang(GdtScores):
+    """
+    Compute the TM-score from the TMscore superposition, without running US-align.
+    """
+
+    score_names = ["TM-score (TMscore)"]
@@ -1,12 +1,21 @@
+import hashlib
 import os
-import subprocess
-from typing import Tuple, Dict, Optional
+import re
+from typing import Dict, List, Optional
 
-from src.utils import time_it
-from src.score_abstract.score_abstract import ScoreAbstract
+import numpy as np
 
+from src.tool_runner import run_command
+from src.score_abstract.score_abstract_binary import ScoreAbstractBinary
+from src.tools import FLOAT_PATTERN
 
-class TMScoreUS(ScoreAbstract):
+# US-align outputs the TM-score normalised by the prediction, then by the native
+TM_SCORE_PATTERN = re.compile(rf"^TM-score=\s*({FLOAT_PATTERN})", re.MULTILINE)
+# Directory with the lists of predictions given to US-align in batch mode
+US_ALIGN_LISTS_DIR = os.path.join("tmp", "usalign")
+
+
+class TMScoreUS(ScoreAbstractBinary):
     """
     Compute the TM-Score score using the C++ code from the Zhanggroup US-Align.
                     (https://zhanggroup.org/US-align/)
@@ -17,6 +26,11 @@ class TMScoreUS(ScoreAbstract):
     It basically runs the C++ code and get the output before parsing the outputs.
     """
 
+    tool_name = "USalign"
+    # US-align aligns a list of predictions (-dir1) against the native in one process
+    batch_size = 200
+    memory_per_task = 128
+
     def __init__(self, zhang_bin_path_us: Optional[str] = None, *args, **kwargs):
         """
         :param zhang_bin_path_us: path to the binary executable US-Align file
@@ -28,22 +42,135 @@ class TMScoreUS(ScoreAbstract):
         )
         super(TMScoreUS, self).__init__(*args, **kwargs)
 
-    @time_it
-    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+    def get_binaries(self) -> List[str]:
+        return [self.bin_path]
+
+    def get_commands(
+        self, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict[str, List[str]]:
         """
-        Compute the TM-score for a single prediction.
+        Return the US-align command for a single prediction.
+        :param pred_path: the path to the .pdb file of a prediction.
+        :param native_path: the path to the .pdb file of the native structure.
+        :return: dictionary with the US-align command
+        """
+        return {"TM-score": self.get_tm_score_command(pred_path, native_path, self.bin_path)}
+
+    def parse_output(
+        self, name: str, output: str, pred_path: str, native_path: str, *args, **kwargs
+    ) -> Dict:
+        return {"TM-score": self.parse_tm_score(output)}
+
+    def get_chunks(self, pred_paths: List[str]) -> List[List[str]]:
+        """
+        Split the predictions into chunks, each chunk having predictions of only one directory.
+        """
+        directories: Dict[str, List[str]] = {}
+        for pred_path in pred_paths:
+            directories.setdefault(os.path.dirname(pred_path), []).append(pred_path)
+        return [
+            chunk
+            for c_pred_paths in directories.values()
+            for chunk in super(TMScoreUS, self).get_chunks(c_pred_paths)
+        ]
+
+    def get_batch_command(
+        self, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> List[str]:
+        """
+        Return the US-align command that aligns all the predictions of a chunk to the native.
+        The predictions are written in a list file, and the output is tabular.
+        """
+        list_path = self.get_list_path(pred_paths)
+        os.makedirs(os.path.dirname(list_path), exist_ok=True)
+        with open(list_path, "w") as f:
+            f.write("".join(f"{os.path.basename(pred_path)}\n" for pred_path in pred_paths))
+        pred_dir = os.path.join(os.path.dirname(pred_paths[0]), "")
+        return [
+            self.bin_path,
+            "-mol",
+            "RNA",
+            "-outfmt",
+            "2",
+            "-dir1",
+            pred_dir,
+            list_path,
+            native_path,
+        ]
+
+    def parse_batch_output(
+        self, output: str, pred_paths: List[str], native_path: str, *args, **kwargs
+    ) -> Dict[str, Dict]:
+        list_path = self.get_list_path(pred_paths)
+        if os.path.exists(list_path):
+            os.remove(list_path)
+        return {
+            pred_path: {"TM-score": tm_score}
+            for pred_path, tm_score in self.parse_tm_score_table(output, pred_paths).items()
+        }
+
+    @staticmethod
+    def get_list_path(pred_paths: List[str]) -> str:
+        """Return the path of the list file of a chunk of predictions."""
+        key = hashlib.md5("_".join(pred_paths).encode()).hexdigest()
+        return os.path.join(US_ALIGN_LISTS_DIR, f"{key}.txt")
+
+    @staticmethod
+    def parse_tm_score_table(output: str, pred_paths: List[str]) -> Dict[str, float]:
+        """
+        Return the TM-score (normalised by the native) of each prediction from the tabular
+        output of US-align (`-outfmt 2`). The columns are:
+            #PDBchain1 PDBchain2 TM1 TM2 RMSD ID1 ID2 IDali L1 L2 Lali
+        :param output: the output of US-align
+        :param pred_paths: the predictions given in the list file
+        :return: dictionary with the prediction path and its TM-score
+        """
+        names = {os.path.basename(pred_path): pred_path for pred_path in pred_paths}
+        tm_scores = {}
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) < 4 or line.startswith("#"):
+                continue
+            # The name of the chain is added after the file name
+            name = os.path.basename(fields[0]).rsplit(":", 1)[0]
+            try:
+                tm_score = float(fields[3])
+            except ValueError:
+                continue
+            if name in names:
+                tm_scores[names[name]] = tm_score
+        return {pred_path: tm_scores.get(pred_path, np.nan) for pred_path in pred_paths}
+
+    @staticmethod
+    def get_tm_score_command(
+        pred_path: str,
+        native_path: str,
+        zhang_bin_path_us: str = os.path.join("lib", "zhanggroup", "USalign"),
+    ) -> List[str]:
+        """
+        Return the command that runs US-align.
         :param pred_path: the path to the .pdb file of a prediction.
         :param native_path: the path to the .pdb file of the native structure.
+        :param zhang_bin_path_us: path to the binary executable US-Align file
+        :return: the binary and its arguments
+        """
+        return [zhang_bin_path_us, "-mol", "RNA", pred_path, native_path]
+
+    @staticmethod
+    def parse_tm_score(output: str) -> float:
+        """
+        Return the TM-score (normalised by the native) from the output of US-align.
+        :param output: the output of US-align
         :return: the TM-score
         """
-        tm_score = self.compute_tm_score(pred_path, native_path, self.bin_path)
-        return {"TM-score": tm_score}  # type: ignore
+        scores = TM_SCORE_PATTERN.findall(output)
+        return float(scores[1]) if len(scores) > 1 else np.nan
 
     @staticmethod
     def compute_tm_score(
         pred_path: str,
         native_path: str,
-        zhang_bin_path_us: Optional[str] = os.path.join("lib", "zhanggroup", "USalign"),
+        zhang_bin_path_us: str = os.path.join("lib", "zhanggroup", "USalign"),
     ) -> float:
         """
         Compute the TM-score for a single prediction.
@@ -51,8 +178,5 @@ class TMScoreUS(ScoreAbstract):
         :param native_path: the path to the .pdb file of the native structure.
         :return: the TM-score for the prediction.
         """
-        command = f"{zhang_bin_path_us} -mol RNA {pred_path} {native_path} | grep -E 'TM-score'"
-        output = subprocess.check_output(command, shell=True)
-        scores = str(output.decode()).split("\n")
-        tm_score = float(scores[1].split()[1])
-        return tm_score
+        command = TMScoreUS.get_tm_score_command(pred_path, native_path, zhang_bin_path_us)
+        return TMScoreUS.parse_tm_score(run_command(command, TMScoreUS.tool_name))
@@ -0,0 +1,281 @@
+"""
+Store of the parsed structures in shared memory, used to compute the Python scores in worker
+processes. The parent parses each structure once (the native included) into one segment with
+contiguous arrays, and the workers attach the segment by name instead of parsing the file or
+receiving a pickled copy. The coordinates and the residue indexes are read without copy.
+Each segment is reference-counted by the parent, and unlinked when it is not used anymore.
+
+Layout of a segment of n atoms:
+    coordinates       float64 (n, 3)
+    residue indexes   int64 (n)
+    residue names     S4 (n)
+    atom names        S4 (n)
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+from src.tracing import TRACER
+
+# Width (in bytes) of the residue and atom names
+NAME_DTYPE = "S4"
+# Number of tasks per worker, to balance the structures of different sizes
+TASKS_PER_WORKER = 4
+
+# Scores already received by a worker process, by key
+_WORKER_SCORES: Dict[str, ScoreAbstract] = {}
+
+
+class SharedStructure:
+    def __init__(self, segment_name: str, n_atoms: int):
+        """
+        Reference to a structure stored in shared memory, sent to the worker processes.
+        :param segment_name: name of the shared memory segment
+        :param n_atoms: number of atoms of the structure
+        """
+        self.segment_name = segment_name
+        self.n_atoms = n_atoms
+
+    @staticmethod
+    def get_size(n_atoms: int) -> int:
+        """Return the size (in bytes) of the segment of a structure."""
+        return n_atoms * (3 * 8 + 8 + 2 * np.dtype(NAME_DTYPE).itemsize)
+
+    def get_arrays(self, buffer) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return the views of the coordinates, residue indexes, residue and atom names."""
+        n, name_size = self.n_atoms, np.dtype(NAME_DTYPE).itemsize
+        coordinates = np.ndarray((n, 3), dtype=np.float64, buffer=buffer)
+        residue_indexes = np.ndarray((n,), dtype=np.int64, buffer=buffer, offset=24 * n)
+        residue_names = np.ndarray((n,), dtype=NAME_DTYPE, buffer=buffer, offset=32 * n)
+        atom_names = np.ndarray((n,), dtype=NAME_DTYPE, buffer=buffer, offset=(32 + name_size) * n)
+        return coordinates, residue_indexes, residue_names, atom_names
+
+    def attach(self) -> Tuple[Tuple, SharedMemory]:
+        """
+        Attach the segment of the structure, in a worker process.
+        :return: the atoms (as returned by `read_pdb_atoms`) and the segment, to close once
+                the atoms are not used anymore
+        """
+        segment = SharedMemory(name=self.segment_name)
+        coordinates, residue_indexes, residue_names, atom_names = self.get_arrays(segment.buf)
+        atoms = (
+            coordinates,
+            [name.decode() for name in residue_names.tolist()],
+            [name.decode() for name in atom_names.tolist()],
+            residue_indexes,
+        )
+        return atoms, segment
+
+
+class StructureStore:
+    def __init__(self):
+        """Segments of shared memory with the parsed structures, by path."""
+        self._segments: Dict[str, SharedMemory] = {}
+        self._structures: Dict[str, SharedStructure] = {}
+        self._references: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, path: str, atoms: Optional[Tuple] = None) -> SharedStructure:
+        """
+        Store a structure, or add a reference to it if it is already stored.
+        :param path: path to the .pdb file of the structure, used as key
+        :param atoms: the atoms of the structure. Default to the atoms read from the file.
+        :return: the reference to the structure, to send to the workers
+        """
+        with self._lock:
+            if path in self._structures:
+                self._references[path] += 1
+                return self._structures[path]
+        if atoms is None:
+            with TRACER.span("parse", "structure_store"):
+                atoms = read_pdb_atoms(path)
+        coordinates, residue_names, atom_names, residue_indexes = atoms
+        n_atoms = len(coordinates)
+        # A segment can not be empty
+        segment = SharedMemory(create=True, size=max(1, SharedStructure.get_size(n_atoms)))
+        structure = SharedStructure(segment.name, n_atoms)
+        arrays = structure.get_arrays(segment.buf)
+        arrays[0][:] = coordinates
+        arrays[1][:] = residue_indexes
+        arrays[2][:] = np.array(residue_names, dtype=NAME_DTYPE)
+        arrays[3][:] = np.array(atom_names, dtype=NAME_DTYPE)
+        del arrays
+        with self._lock:
+            if path in self._structures:
+                # Stored by another thread in the meantime
+                self._unlink(segment)
+                self._references[path] += 1
+                return self._structures[path]
+            self._segments[path], self._structures[path] = segment, structure
+            self._references[path] = 1
+        return structure
+
+    def get(self, path: str) -> Optional[SharedStructure]:
+        """Return the reference to a stored structure, or None if it is not stored."""
+        with self._lock:
+            return self._structures.get(path)
+
+    def release(self, path: str):
+        """Remove a reference to a structure, and unlink its segment after the last one."""
+        with self._lock:
+            if path not in self._references:
+                return None
+            self._references[path] -= 1
+            if self._references[path] > 0:
+                return None
+            self._unlink(self._segments.pop(path))
+            del self._structures[path], self._references[path]
+
+    def get_nb_segments(self) -> int:
+        """Return the number of structures stored."""
+        return len(self._segments)
+
+    def close(self):
+        """Unlink all the segments."""
+        with self._lock:
+            for segment in self._segments.values():
+                self._unlink(segment)
+            self._segments, self._structures, self._references = {}, {}, {}
+
+    @staticmethod
+    def _unlink(segment: SharedMemory):
+        segment.close()
+        segment.unlink()
+
+
+def _compute_shared(
+    score_key: str,
+    score_fn: ScoreAbstract,
+    structures: Dict[str, SharedStructure],
+    native: Optional[SharedStructure],
+    kwargs: Dict,
+) -> Tuple[Dict, Dict]:
+    """
+    Compute a score in a worker process, from the structures attached from shared memory.
+    :param score_key: key of the score, so each worker only keeps one instance of it
+    :param score_fn: the score to compute
+    :param structures: the references to the predictions, by path
+    :param native: the reference to the native structure, or None
+    :param kwargs: the parameters of the score
+    :return: dictionaries with the scores and times for each prediction path
+    """
+    score_fn = _WORKER_SCORES.setdefault(score_key, score_fn)
+    segments: List[SharedMemory] = []
+    all_atoms: Dict[str, Tuple] = {}
+    native_atoms = None
+    try:
+        for path, structure in structures.items():
+            all_atoms[path], segment = structure.attach()
+            segments.append(segment)
+        if native is not None:
+            native_atoms, segment = native.attach()
+            segments.append(segment)
+        return score_fn.compute_atoms(all_atoms, native_atoms, **kwargs)
+    finally:
+        # The views of the segments should be released before closing them
+        all_atoms.clear()
+        native_atoms = None
+        for segment in segments:
+            segment.close()
+
+
+class SharedScorer:
+    def __init__(self, nb_workers: int):
+        """
+        Compute the scores with in-memory support in worker processes, that read the
+        structures from a shared store.
+        :param nb_workers: number of worker processes
+        """
+        self.nb_workers = nb_workers
+        self.store = StructureStore()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """Return the pool of workers, started the first time it is needed."""
+        if self._executor is None:
+            # The workers are spawned, as the parent process runs threads
+            self._executor = ProcessPoolExecutor(self.nb_workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    def add(self, paths: List[str], structures: Optional[Dict[str, Tuple]] = None):
+        """
+        Store the predictions that are not stored yet. The stored predictions are kept for
+        the next scores, until they are released.
+        :param paths: paths to the .pdb files of the predictions
+        :param structures: the atoms already parsed, by path
+        """
+        structures = {} if structures is None else structures
+        for path in paths:
+            if self.store.get(path) is None:
+                self.store.add(path, structures.get(path))
+
+    def release(self, paths: List[str]):
+        """Release the predictions that are not scored anymore."""
+        for path in paths:
+            self.store.release(path)
+
+    def compute(
+        self, score_fn: ScoreAbstract, pred_paths: List[str], native_path: Optional[str], **kwargs
+    ) -> Tuple[Dict, Dict]:
+        """
+        Compute a score for stored predictions, split among the workers.
+        :param score_fn: a score with `memory_support`
+        :param pred_paths: paths to the predictions, added to the store if needed
+        :param native_path: path to the native structure, stored until the store is closed
+        :return: dictionaries with the scores and times for each prediction path
+        """
+        self.add(pred_paths)
+        native = None
+        if native_path and os.path.exists(native_path):
+            native = self.store.get(native_path) or self.store.add(native_path)
+        if hasattr(score_fn, "get_potentials"):
+            # The energy tables are converted once, before the workers memory-map them
+            score_fn.get_potentials()
+        structures: Dict[str, SharedStructure] = {}
+        for path in pred_paths:
+            structure = self.store.get(path)
+            # A prediction released in the meantime can not be sent to the workers
+            if structure is not None:
+                structures[path] = structure
+        stored = list(structures)
+        nb_tasks = max(1, min(len(stored), self.nb_workers * TASKS_PER_WORKER))
+        chunks = [stored[index::nb_tasks] for index in range(nb_tasks)]
+        score_key = f"{score_fn.__class__.__name__}_{id(score_fn)}"
+        scores: Dict = {}
+        times: Dict = {}
+        with TRACER.span("compute", score_fn.__class__.__name__, nb_predictions=len(pred_paths)):
+            futures = [
+                self.get_executor().submit(
+                    _compute_shared,
+                    score_key,
+                    score_fn,
+                    {path: structures[path] for path in chunk},
+                    native,
+                    kwargs,
+                )
+                for chunk in chunks
+                if len(chunk) > 0
+            ]
+            for future in futures:
+                c_scores, c_times = future.result()
+                scores.update(c_scores)
+                times.update(c_times)
+        # Same order as the predictions
+        scores = {path: scores[path] for path in pred_paths if path in scores}
+        times = {path: times[path] for path in pred_paths if path in times}
+        return scores, times
+
+    def close(self):
+        """Stop the workers and unlink all the segments."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.store.close()
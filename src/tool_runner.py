@@ -0,0 +1,314 @@
+"""
+Runner that executes the commands of the external binaries concurrently. The processes are
+waited in a pool of threads, without an event loop, so the runner can also be called from a
+running asyncio loop (Jupyter, an async web server...).
+The number of processes of each tool and the CPUs and memory of the node are shared by all the
+calls, even from different threads.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from src.tracing import TRACER
+
+
+def get_total_memory() -> Optional[int]:
+    """Return the physical memory of the node (in MB), or None if it is unknown."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def parse_memory(memory: Union[int, float, str, None]) -> Optional[int]:
+    """
+    Convert a memory to MB.
+    :param memory: a number of MB, or a string with a unit (`512M`, `16G`, `1T`)
+    :return: the memory in MB, or None if not given
+    """
+    if memory is None or isinstance(memory, (int, float)):
+        return None if memory is None else int(memory)
+    memory = memory.strip().upper().rstrip("B")
+    units = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024**2}
+    if len(memory) > 0 and memory[-1] in units:
+        return int(float(memory[:-1]) * units[memory[-1]])
+    return int(float(memory))
+
+
+class ResourcePool:
+    def __init__(self, cpus: int, memory: Optional[int]):
+        """
+        CPUs and memory of the node, shared by all the processes started by the runner.
+        :param cpus: number of CPU threads
+        :param memory: memory (in MB). None for no limit.
+        """
+        self.cpus, self.memory = cpus, memory
+        self.used_cpus, self.used_memory = 0, 0
+        self._condition = threading.Condition()
+
+    def _clip(self, cpus: int, memory: int) -> Tuple[int, int]:
+        """A task that needs more than the node runs alone."""
+        return min(cpus, self.cpus), memory if self.memory is None else min(memory, self.memory)
+
+    def _fits(self, cpus: int, memory: int) -> bool:
+        if self.used_cpus + cpus > self.cpus:
+            return False
+        return self.memory is None or self.used_memory + memory <= self.memory
+
+    def acquire(self, cpus: int, memory: int):
+        """Wait until the resources of a task are free, and reserve them."""
+        cpus, memory = self._clip(cpus, memory)
+        with self._condition:
+            self._condition.wait_for(lambda: self._fits(cpus, memory))
+            self.used_cpus += cpus
+            self.used_memory += memory
+
+    def release(self, cpus: int, memory: int):
+        """Free the resources of a task."""
+        cpus, memory = self._clip(cpus, memory)
+        with self._condition:
+            self.used_cpus -= cpus
+            self.used_memory -= memory
+            self._condition.notify_all()
+
+    def get_capacity(self, cpus: int, memory: int) -> int:
+        """Return the number of tasks with these resources that fit in the node."""
+        cpus, memory = self._clip(cpus, memory)
+        capacity = self.cpus // max(cpus, 1)
+        if self.memory is not None and memory > 0:
+            capacity = min(capacity, self.memory // memory)
+        return max(1, capacity)
+
+
+class ToolRunner:
+    def __init__(
+        self,
+        max_processes: Optional[int] = None,
+        max_cpus: Optional[int] = None,
+        max_memory: Union[int, str, None] = None,
+    ):
+        """
+        Runner shared by the scores that call external binaries.
+        :param max_processes: default maximum number of processes running at the same time for
+                each tool. Default to the number of CPUs.
+        :param max_cpus: number of CPU threads that the processes can use at the same time.
+                Default to the number of CPUs.
+        :param max_memory: memory (in MB, or with a unit like `16G`) that the processes can use
+                at the same time. Default to the physical memory.
+        """
+        self.max_processes = max_processes if max_processes is not None else os.cpu_count() or 1
+        self.tool_max_processes: Dict[str, int] = {}
+        # Slots of the processes of each tool, shared by the concurrent calls
+        self._tool_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self.pool = ResourcePool(os.cpu_count() or 1, get_total_memory())
+        self.set_resources(max_cpus, max_memory)
+
+    def set_resources(
+        self, max_cpus: Optional[int] = None, max_memory: Union[int, str, None] = None
+    ):
+        """
+        Set the CPUs and memory of the node shared by the processes.
+        :param max_cpus: number of CPU threads. Not changed if None.
+        :param max_memory: memory (in MB, or with a unit like `16G`). Not changed if None.
+        """
+        max_memory = parse_memory(max_memory)
+        self.pool = ResourcePool(
+            max_cpus if max_cpus is not None else self.pool.cpus,
+            max_memory if max_memory is not None else self.pool.memory,
+        )
+
+    def set_max_processes(self, max_processes: Union[int, Dict, None]):
+        """
+        Set the maximum number of concurrent processes.
+        :param max_processes: either a number used for every tool, or a dictionary with the
+                maximum number of processes for each tool (the key `default` is used for the
+                tools not specified).
+        """
+        if max_processes is None:
+            return None
+        with self._lock:
+            # The running processes keep the slots they hold
+            self._tool_slots = {}
+        if isinstance(max_processes, dict):
+            self.max_processes = max_processes.get("default", self.max_processes)
+            self.tool_max_processes = {
+                tool: value for tool, value in max_processes.items() if tool != "default"
+            }
+        else:
+            self.max_processes = max_processes
+
+    def get_max_processes(self, tool: str, max_tasks: Optional[int] = None) -> int:
+        """
+        Return the maximum number of concurrent processes for the given tool.
+        :param tool: name of the tool
+        :param max_tasks: default cap of the tool (for heavy tools), used when the tool has no
+                value of its own in `max_processes`
+        """
+        default = self.max_processes if max_tasks is None else min(max_tasks, self.max_processes)
+        return max(1, self.tool_max_processes.get(tool, default))
+
+    def get_concurrency(
+        self, tool: str, cpus: int = 1, memory: int = 0, max_tasks: Optional[int] = None
+    ) -> int:
+        """
+        Return the number of processes of the tool that can run at the same time: the cap of
+        the tool, and the number of processes that fit in the CPUs and memory of the node.
+        :param tool: name of the tool
+        :param cpus: CPU threads used by one process
+        :param memory: memory (in MB) used by one process
+        :param max_tasks: default cap of the tool
+        """
+        return min(self.get_max_processes(tool, max_tasks), self.pool.get_capacity(cpus, memory))
+
+    def get_tool_slots(self, tool: str, max_tasks: Optional[int] = None) -> threading.Semaphore:
+        """
+        Return the slots of the processes of a tool, shared by all the calls of the runner.
+        :param tool: name of the tool
+        :param max_tasks: default cap of the tool, used when the slots are created
+        """
+        with self._lock:
+            if tool not in self._tool_slots:
+                self._tool_slots[tool] = threading.Semaphore(
+                    self.get_max_processes(tool, max_tasks)
+                )
+            return self._tool_slots[tool]
+
+    def _run_process(
+        self,
+        command: List[str],
+        tool: str,
+        slots: threading.Semaphore,
+        cpus: int = 1,
+        memory: int = 0,
+    ) -> Tuple[str, float]:
+        """
+        Execute a binary (without shell) once a slot of its tool and its resources are free.
+        :param command: the binary and its arguments
+        :param tool: name of the tool, used as name of the span
+        :param slots: the slots of the processes of the tool
+        :param cpus: CPU threads used by the process
+        :param memory: memory (in MB) used by the process
+        :return: the standard output and the time spent to run the command
+        """
+        with slots:
+            pool = self.pool
+            pool.acquire(cpus, memory)
+            try:
+                return self._run_binary(command, tool)
+            finally:
+                pool.release(cpus, memory)
+
+    @staticmethod
+    def _run_binary(command: List[str], tool: str) -> Tuple[str, float]:
+        """
+        Execute a binary (without shell) and wait for it with `wait4`, so the CPU time and the
+        peak memory of the child process are recorded by the tracer.
+        :param command: the binary and its arguments
+        :param tool: name of the tool, used as name of the span
+        :return: the standard output and the time spent to run the command
+        """
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logger.debug(f"COMMAND CAN'T BE EXECUTED : {command} : {e}")
+            return "", time.perf_counter() - start
+        TRACER.add_span("spawn", tool, start, time.perf_counter() - start)
+        stdout = process.stdout.read() if process.stdout is not None else b""
+        if process.stdout is not None:
+            process.stdout.close()
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = (
+            -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        )
+        execution_time = time.perf_counter() - start
+        TRACER.add_span(
+            "subprocess",
+            tool,
+            start,
+            execution_time,
+            child_cpu=rusage.ru_utime + rusage.ru_stime,
+            child_max_rss=rusage.ru_maxrss,
+            binary=command[0],
+        )
+        if process.returncode != 0:
+            logger.debug(f"COMMAND RETURNED {process.returncode} : {command}")
+        return stdout.decode(errors="replace"), execution_time
+
+    def _run_all(
+        self,
+        commands: List[List[str]],
+        tool: str,
+        parser: Optional[Callable[[int, str], Any]],
+        cpus: int,
+        memory: int,
+        max_tasks: Optional[int],
+    ) -> List[Tuple[Any, float]]:
+        """
+        Run all the commands, with at most `get_concurrency(...)` processes at once.
+        Each process is waited in a thread of the executor, once a slot of the tool and its
+        resources are free. The parser is called on each output as soon as the process ends,
+        in the calling thread.
+        """
+        max_processes = self.get_concurrency(tool, cpus, memory, max_tasks)
+        slots = self.get_tool_slots(tool, max_tasks)
+        results: List = [None] * len(commands)
+        with ThreadPoolExecutor(max_workers=max_processes) as executor:
+            futures = {
+                executor.submit(self._run_process, command, tool, slots, cpus, memory): index
+                for index, command in enumerate(commands)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                output, execution_time = future.result()
+                with TRACER.span("parse", tool):
+                    parsed = parser(index, output) if parser is not None else output
+                results[index] = (parsed, execution_time)
+        return results
+
+    def run(
+        self,
+        commands: List[List[str]],
+        tool: str = "",
+        parser: Optional[Callable[[int, str], Any]] = None,
+        cpus: int = 1,
+        memory: int = 0,
+        max_tasks: Optional[int] = None,
+    ) -> List[Tuple[Any, float]]:
+        """
+        Run the commands concurrently and return the outputs in the same order. The processes of
+        the tool are limited across all the calls, even from other threads.
+        :param commands: list of commands to execute, each one is the binary and its arguments
+        :param tool: name of the tool, used to limit the number of concurrent processes
+        :param parser: function called with the index of the command and its standard output.
+                If None, the raw output is returned.
+        :param cpus: CPU threads used by one process
+        :param memory: memory (in MB) used by one process
+        :param max_tasks: default cap of the number of processes of the tool
+        :return: list of the parsed outputs and the time spent for each command
+        """
+        if len(commands) == 0:
+            return []
+        return self._run_all(commands, tool, parser, cpus, memory, max_tasks)
+
+
+# Runner shared by all the scores
+RUNNER = ToolRunner()
+
+
+def run_command(command: List[str], tool: str = "") -> str:
+    """
+    Run one command with the shared runner and return its standard output.
+    :param command: the binary and its arguments
+    :param tool: name of the tool, used to limit the number of concurrent processes
+    :return: the standard output of the command
+    """
+    output, _ = RUNNER.run([command], tool)[0]
+    return output
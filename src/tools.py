@@ -0,0 +1,83 @@
+"""Functions to resolve the external binaries and to parse their outputs without shell pipes."""
+
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Pattern
+
+# Regex that matches a (signed) float number
+FLOAT_PATTERN = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+
+_RESOLVED_BINARIES: Dict[str, str] = {}
+
+
+class ToolNotFoundError(FileNotFoundError):
+    """Error raised when the binary of a metric can't be found or executed."""
+
+
+def resolve_binary(bin_path: str) -> str:
+    """
+    Resolve the path of a binary and check that it can be executed. It is done once per binary.
+    :param bin_path: either a path to a binary, or the name of a binary in the PATH
+    :return: the path of the binary
+    """
+    if bin_path in _RESOLVED_BINARIES:
+        return _RESOLVED_BINARIES[bin_path]
+    if os.path.dirname(bin_path) == "":
+        resolved = shutil.which(bin_path)
+    elif os.path.isfile(bin_path) and os.access(bin_path, os.X_OK):
+        resolved = bin_path
+    else:
+        resolved = None
+    if resolved is None:
+        raise ToolNotFoundError(f"BINARY NOT FOUND OR NOT EXECUTABLE : {bin_path}")
+    _RESOLVED_BINARIES[bin_path] = resolved
+    return resolved
+
+
+def check_binaries(bin_paths: List[str]):
+    """
+    Check that all the binaries can be executed.
+    :param bin_paths: list of paths or names of binaries
+    """
+    for bin_path in bin_paths:
+        resolve_binary(bin_path)
+
+
+def find_field(output: str, pattern: Pattern, index: int) -> Optional[str]:
+    """
+    Return a field of the first line that matches the pattern (like `awk '/pattern/ {print $i}'`).
+    :param output: the output of a command
+    :param pattern: compiled regex that selects the line
+    :param index: index of the field (split by whitespaces) to return. Negative values are
+            counted from the end of the line.
+    :return: the field, or None if no line matches or the line is too short
+    """
+    for line in output.splitlines():
+        if pattern.search(line):
+            fields = line.split()
+            if -len(fields) <= index < len(fields):
+                return fields[index]
+            return None
+    return None
+
+
+def find_float(output: str, pattern: Pattern, group: int = 1) -> Optional[float]:
+    """
+    Return the float captured by a group of the first match of the pattern.
+    :param output: the output of a command
+    :param pattern: compiled regex with at least one group
+    :param group: the group to convert to float
+    :return: the float, or None if the pattern doesn't match
+    """
+    match = pattern.search(output)
+    if match is None:
+        return None
+    try:
+        return float(match.group(group))
+    except (TypeError, ValueError):
+        return None
+
+
+# Any line with at least one character
+ANY_LINE = re.compile(r"\S")
@@ -0,0 +1,175 @@
+"""Tracer that records the time spent in each stage (spans) of a run."""
+
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Stages of a run, used as categories of the spans
+STAGES = ["normalise", "parse", "spawn", "subprocess", "compute", "io"]
+
+
+class Tracer:
+    def __init__(self, keep_events: bool = False):
+        """
+        Record spans with their wall time (`perf_counter`) and CPU time (`process_time`).
+        The spans are always aggregated by stage and name; the individual events are only kept
+        when `keep_events` is True, as a long run can have millions of spans.
+        :param keep_events: whether to keep each span to export them as a trace
+        """
+        self.keep_events = keep_events
+        self.events: List[Dict] = []
+        self.summary: Dict[str, Dict] = {}
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reset(self, keep_events: Optional[bool] = None):
+        """Remove all the recorded spans."""
+        with self._lock:
+            self.keep_events = self.keep_events if keep_events is None else keep_events
+            self.events, self.summary = [], {}
+            self.origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str, name: str, **args) -> Iterator[Dict]:
+        """
+        Record the time spent in the block.
+        :param stage: the stage of the run (see STAGES)
+        :param name: name of the span, like the name of the score
+        :param args: additional information stored with the span. The block can add other
+                information to the returned dictionary.
+        """
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield args
+        finally:
+            self.add_span(
+                stage,
+                name,
+                start,
+                time.perf_counter() - start,
+                cpu=time.process_time() - cpu_start,
+                **args,
+            )
+
+    def add_span(
+        self,
+        stage: str,
+        name: str,
+        start: float,
+        duration: float,
+        cpu: float = 0.0,
+        child_cpu: float = 0.0,
+        child_max_rss: int = 0,
+        **args,
+    ):
+        """
+        Record a span timed by the caller.
+        :param stage: the stage of the run (see STAGES)
+        :param name: name of the span
+        :param start: `perf_counter` value at the start of the span
+        :param duration: wall time of the span (in seconds)
+        :param cpu: CPU time of this process during the span (in seconds)
+        :param child_cpu: CPU time of the child process (in seconds), from `wait4`
+        :param child_max_rss: peak memory of the child process (in KB)
+        """
+        with self._lock:
+            key = f"{stage}/{name}"
+            stats = self.summary.setdefault(
+                key,
+                {
+                    "stage": stage,
+                    "name": name,
+                    "count": 0,
+                    "wall": 0.0,
+                    "wall_max": 0.0,
+                    "cpu": 0.0,
+                    "child_cpu": 0.0,
+                    "child_max_rss": 0,
+                },
+            )
+            stats["count"] += 1
+            stats["wall"] += duration
+            stats["wall_max"] = max(stats["wall_max"], duration)
+            stats["cpu"] += cpu
+            stats["child_cpu"] += child_cpu
+            stats["child_max_rss"] = max(stats["child_max_rss"], child_max_rss)
+            if self.keep_events:
+                self.events.append(
+                    {
+                        "stage": stage,
+                        "name": name,
+                        "start": start - self.origin,
+                        "duration": duration,
+                        "cpu": cpu,
+                        "child_cpu": child_cpu,
+                        "child_max_rss": child_max_rss,
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                )
+
+    @staticmethod
+    def get_peak_rss() -> Dict[str, int]:
+        """Return the peak memory (in KB) of this process and of its waited children."""
+        return {
+            "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        }
+
+    def get_summary(self) -> List[Dict]:
+        """Return the aggregated spans, the most expensive first."""
+        with self._lock:
+            summary = [dict(stats) for stats in self.summary.values()]
+        for stats in summary:
+            stats["wall_mean"] = stats["wall"] / stats["count"]
+        return sorted(summary, key=lambda stats: stats["wall"], reverse=True)
+
+    def save_json(self, out_path: str):
+        """
+        Save the summary, the peak memory and the spans to a .json file.
+        :param out_path: path to the .json file
+        """
+        content = {
+            "summary": self.get_summary(),
+            "peak_rss": self.get_peak_rss(),
+            "events": self.events,
+        }
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        with open(out_path, "w") as f:
+            json.dump(content, f, indent=1, default=str)
+
+    def save_chrome_trace(self, out_path: str):
+        """
+        Save the spans in the Chrome trace format (chrome://tracing or https://ui.perfetto.dev).
+        :param out_path: path to the .json file
+        """
+        pid = os.getpid()
+        trace_events = [
+            {
+                "name": event["name"],
+                "cat": event["stage"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["duration"] * 1e6,
+                "pid": pid,
+                "tid": event["tid"],
+                "args": {
+                    "cpu": event["cpu"],
+                    "child_cpu": event["child_cpu"],
+                    "child_max_rss": event["child_max_rss"],
+                    **event["args"],
+                },
+            }
+            for event in self.events
+        ]
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        with open(out_path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f, default=str)
+
+
+# Tracer shared by the whole run
+TRACER = Tracer()
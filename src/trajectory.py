@@ -0,0 +1,125 @@
+"""Class that streams the frames of a multi-model .pdb file or a MD trajectory as predictions."""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import mdtraj as md
+from loguru import logger
+
+# Trajectory formats that need a topology to be read
+TRAJECTORY_EXTENSIONS = [".dcd", ".xtc", ".trr", ".nc", ".ncdf", ".netcdf", ".h5", ".hdf5"]
+
+
+class TrajectorySource:
+    def __init__(
+        self,
+        traj_path: str,
+        top_path: Optional[str] = None,
+        chunk_size: int = 100,
+        frames_dir: Optional[str] = None,
+    ):
+        """
+        Source of predictions where each frame of a trajectory is a prediction.
+        :param traj_path: path to a multi-model .pdb file or a trajectory readable by mdtraj.
+        :param top_path: path to the topology (.pdb file) of the trajectory. Not needed for
+                multi-model .pdb files.
+        :param chunk_size: number of frames loaded in memory at once.
+        :param frames_dir: directory where the single-frame .pdb files are written when needed.
+                Default to a new temporary directory of the run, removed by `cleanup`.
+        """
+        self.traj_path = traj_path
+        self.top_path = top_path
+        self.chunk_size = chunk_size
+        self.frames_dir = frames_dir
+        self._frame_paths: Optional[Dict[str, str]] = None
+        # Whether the directory of the frames is created by the run (and removed after it)
+        self._tmp_dir = frames_dir is None
+
+    @staticmethod
+    def is_trajectory(in_path: str) -> bool:
+        """
+        Check if the path is a trajectory or a .pdb file with several models.
+        :param in_path: path to a prediction file
+        :return: True if the frames of the file should be used as predictions.
+        """
+        if not os.path.isfile(in_path):
+            return False
+        if os.path.splitext(in_path)[1] in TRAJECTORY_EXTENSIONS:
+            return True
+        return in_path.endswith(".pdb") and TrajectorySource.count_models(in_path) > 1
+
+    @staticmethod
+    def count_models(pdb_path: str, max_models: int = 2) -> int:
+        """
+        Count the MODEL records of a .pdb file.
+        :param pdb_path: path to a .pdb file
+        :param max_models: stop reading the file once this number of models is reached
+        :return: the number of models found (up to max_models)
+        """
+        nb_models = 0
+        with open(pdb_path, "r") as f:
+            for line in f:
+                if line.startswith("MODEL"):
+                    nb_models += 1
+                    if nb_models >= max_models:
+                        break
+        return nb_models
+
+    @staticmethod
+    def get_frame_name(index: int) -> str:
+        """Return the name of the output row for the given frame index."""
+        return f"frame_{index}"
+
+    def iter_chunks(self) -> Iterator[Tuple[List[str], md.Trajectory]]:
+        """
+        Stream the trajectory by chunks of frames.
+        :return: an iterator over the frame names and the associated chunk of trajectory
+        """
+        # Multi-model .pdb files already have their topology
+        use_top = self.top_path is not None and not self.traj_path.endswith(".pdb")
+        kwargs = {"top": self.top_path} if use_top else {}
+        start = 0
+        for chunk in md.iterload(self.traj_path, chunk=self.chunk_size, **kwargs):
+            names = [self.get_frame_name(index) for index in range(start, start + chunk.n_frames)]
+            start += chunk.n_frames
+            yield names, chunk
+
+    def get_frame_paths(self) -> Dict[str, str]:
+        """
+        Write each frame to a single .pdb file. It is done only once, the first time a metric
+        that needs files (external binaries) is computed.
+        :return: dictionary with the frame name and the path of the associated .pdb file
+        """
+        if self._frame_paths is not None:
+            return self._frame_paths
+        if self.frames_dir is None:
+            # A directory per run: concurrent runs do not overwrite the frames of each other
+            os.makedirs("tmp", exist_ok=True)
+            self.frames_dir = tempfile.mkdtemp(prefix="frames_", dir="tmp")
+        else:
+            os.makedirs(self.frames_dir, exist_ok=True)
+        frame_paths = {}
+        for names, chunk in self.iter_chunks():
+            for index, name in enumerate(names):
+                out_path = os.path.join(self.frames_dir, f"{name}.pdb")
+                chunk[index].save_pdb(out_path)
+                frame_paths[name] = out_path
+        logger.debug(f"{len(frame_paths)} FRAMES WRITTEN IN {self.frames_dir}")
+        self._frame_paths = frame_paths
+        return frame_paths
+
+    def cleanup(self):
+        """Remove the single-frame .pdb files, once the scores are computed."""
+        if self._frame_paths is None:
+            return
+        if self._tmp_dir and self.frames_dir is not None:
+            shutil.rmtree(self.frames_dir, ignore_errors=True)
+        else:
+            for path in self._frame_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+        self._frame_paths = None
+        if self._tmp_dir:
+            self.frames_dir = None
@@ -19,6 +19,8 @@ from Bio.PDB import (
     PDBParser,
 )
 
+from src.tracing import TRACER
+
 
 def read_yaml_to_dict(path: str) -> Dict:
     """
@@ -36,22 +38,32 @@ def read_yaml_to_dict(path: str) -> Dict:
 
 
 def time_it(func):
+    """
+    Decorator that returns the result of a score function and its time for each output score.
+    The time is recorded as a span of the tracer.
+    """
+
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        execution_time = end_time - start_time
-        time_result = {list(result.keys())[0]: execution_time}
+        with TRACER.span("compute", func.__qualname__) as span:
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            execution_time = time.perf_counter() - start_time
+            span["scores"] = list(result.keys())
+        time_result = {key: execution_time for key in result}
         return result, time_result
 
     return wrapper
 
 
 def fn_time(func, *args, **kwargs) -> Tuple[Any, float]:
-    start_time = time.time()
-    result = func(*args, **kwargs)
-    end_time = time.time()
-    execution_time = end_time - start_time
+    """
+    Call the function and return its result and its time. The time is recorded as a span of
+    the tracer.
+    """
+    with TRACER.span("compute", getattr(func, "__qualname__", str(func))):
+        start_time = time.perf_counter()
+        result = func(*args, **kwargs)
+        execution_time = time.perf_counter() - start_time
     return result, execution_time
 
 
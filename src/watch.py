@@ -0,0 +1,93 @@
+"""
+Watcher of the directory of the predictions, used to score the predictions while they are
+written. The directory is polled, and a file is only given once its size and modification
+time did not change for `debounce` seconds, so the files being written are not read.
+The run ends when the sentinel file is written in the directory, or after an idle timeout.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Name of the file that marks the end of the predictions
+SENTINEL_NAME = "DONE"
+# Time (in seconds) without change before a file is considered as complete
+DEBOUNCE = 2.0
+# Time (in seconds) between two polls of the directory
+POLL_INTERVAL = 1.0
+
+
+class DirectoryWatcher:
+    def __init__(self, pred_dir: str, debounce: float = DEBOUNCE):
+        """
+        Watcher of the new .pdb and .cif files of a directory.
+        :param pred_dir: the directory of the predictions
+        :param debounce: time (in seconds) without change before a file is given
+        """
+        self.pred_dir = pred_dir
+        self.debounce = debounce
+        self.seen: Set[str] = set()
+        # Size and modification time of the files not given yet
+        self.pending: Dict[str, Tuple[int, int]] = {}
+
+    def poll(self) -> List[str]:
+        """
+        Look for the new files of the directory.
+        :return: the paths of the new files that are complete, sorted by name
+        """
+        ready, pending, now = [], {}, time.time()
+        with os.scandir(self.pred_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith((".pdb", ".cif")) or entry.name.startswith("."):
+                    continue
+                if entry.path in self.seen:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                state = (stat.st_size, stat.st_mtime_ns)
+                if self.pending.get(entry.path) == state and now - stat.st_mtime >= self.debounce:
+                    ready.append(entry.path)
+                else:
+                    pending[entry.path] = state
+        # The files removed before they were complete are forgotten
+        self.pending = pending
+        self.mark_seen(ready)
+        return sorted(ready)
+
+    def mark_seen(self, paths: Iterable[str]):
+        """Ignore files of the directory, e.g. the .pdb files converted from .cif files."""
+        for path in paths:
+            self.seen.add(path)
+            self.pending.pop(path, None)
+
+    def is_done(self) -> bool:
+        """Whether the sentinel file is written and all the files were given."""
+        sentinel_path = os.path.join(self.pred_dir, SENTINEL_NAME)
+        return os.path.exists(sentinel_path) and len(self.pending) == 0
+
+    def iter_paths(
+        self, timeout: Optional[float] = None, poll_interval: float = POLL_INTERVAL
+    ) -> Iterator[str]:
+        """
+        Yield the new files of the directory until the sentinel file is written.
+        :param timeout: time (in seconds) without new file before the end. None to only stop
+                with the sentinel file.
+        :param poll_interval: time (in seconds) between two polls of the directory
+        :return: the paths of the new files, once they are complete
+        """
+        last_time = time.time()
+        while True:
+            new_paths = self.poll()
+            if len(new_paths) == 0:
+                if self.is_done() or (timeout is not None and time.time() - last_time > timeout):
+                    return None
+                time.sleep(poll_interval)
+                continue
+            last_time = time.time()
+            for path in new_paths:
+                if path.endswith(".cif"):
+                    # The .pdb file converted from the .cif file is written in the directory
+                    self.mark_seen([path.replace(".cif", ".pdb")])
+                yield path
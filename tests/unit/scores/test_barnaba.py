@@ -1,6 +1,7 @@
 """
 Class that tests the baRNAba scores
 """
+
 import os
 import unittest
 
@@ -10,6 +11,8 @@ STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
 STRUCT2 = os.path.join("tests", "data", "structure_2.pdb")
 
 RMSD, E_RMSD, E_SCORE = 2.072, 1.302, 2.43
+
+
 class TestBarnaba(unittest.TestCase):
     def test_rmsd(self):
         rmsd = ScoreBarnaba.compute_rmsd(STRUCT1, STRUCT2)
@@ -22,3 +25,19 @@ class TestBarnaba(unittest.TestCase):
     def test_escore(self):
         e_score = ScoreBarnaba.compute_escore(STRUCT1, STRUCT2)
         self.assertEqual(e_score, E_SCORE)
+
+    def test_batch(self):
+        # Two different decoys with the same topology, stacked as the frames of a trajectory
+        groups, not_loaded = ScoreBarnaba.group_by_topology([STRUCT1, STRUCT2])
+        self.assertEqual((len(groups), not_loaded), (1, []))
+        score = ScoreBarnaba()
+        scores, _ = score.compute([STRUCT1, STRUCT2], STRUCT2)
+        # The fit of the native is only timed by the call that fitted it
+        self.assertEqual(score.get_native(STRUCT2)[2], 0.0)
+        self.assertEqual(list(scores), [STRUCT1, STRUCT2])
+        for pred_path in [STRUCT1, STRUCT2]:
+            expected, _ = ScoreBarnaba()._compute(pred_path, STRUCT2)
+            for name, value in expected.items():
+                self.assertAlmostEqual(scores[pred_path][name], value, places=2)
+        self.assertEqual(scores[STRUCT1]["BARNABA-RMSD"], RMSD)
+        self.assertNotEqual(scores[STRUCT2]["BARNABA-RMSD"], RMSD)
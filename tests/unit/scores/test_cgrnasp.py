@@ -1,8 +1,18 @@
 """Class that implements the test for the cgRNASP score."""
+
 import os
+import tempfile
 import unittest
 
+import numpy as np
+
 from src.score_abstract.cgrnasp.score_cgrnasp import ScoreCGRNASP
+from src.score_abstract.cgrnasp.score_cgrnasp_numpy import (
+    CGRNASP_TABLE_NAMES,
+    CGRNASP_VARIANTS,
+    ScoreCGRNASPNumpy,
+)
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
 
 STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
 STRUCT2 = os.path.join("tests", "data", "structure_2.pdb")
@@ -33,3 +43,37 @@ class TestARES(unittest.TestCase):
         print(cgrnasp_1, cgrnasp_2)
         self.assertEqual(cgrnasp_1, cgRNASP_PC_1)
         self.assertEqual(cgrnasp_2, cgRNASP_PC_2)
+
+    def test_cgrnasp_numpy(self):
+        # Parity with the three binaries, on the tables installed in lib/cgRNASP
+        scores, _ = ScoreCGRNASPNumpy().compute([STRUCT1, STRUCT2], STRUCT1)
+        self.assertAlmostEqual(scores[STRUCT1]["cgRNASP (NUMPY)"], cgRNASP_1, delta=1e-3)
+        self.assertAlmostEqual(scores[STRUCT2]["cgRNASP-C (NUMPY)"], cgRNASP_C_2, delta=1e-3)
+        self.assertAlmostEqual(scores[STRUCT1]["cgRNASP-PC (NUMPY)"], cgRNASP_PC_1, delta=1e-3)
+
+    def test_cgrnasp_numpy_shared_neighbours(self):
+        beads = {
+            "cgRNASP": ["P", "C4'", "N1", "N9"],
+            "cgRNASP-C": ["C4'"],
+            "cgRNASP-PC": ["P", "C4'"],
+        }
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for variant, atoms in beads.items():
+                os.makedirs(os.path.join(tmp_dir, CGRNASP_VARIANTS[variant]))
+                types = [f"{res} {atom}" for res in "ACGU" for atom in atoms]
+                for table_name, n_bins in zip(CGRNASP_TABLE_NAMES, [40, 20]):
+                    table_path = os.path.join(tmp_dir, CGRNASP_VARIANTS[variant], table_name)
+                    with open(table_path, "w") as f:
+                        for type_1 in types:
+                            for type_2 in types:
+                                energies = " ".join(map(str, rng.normal(size=n_bins)))
+                                f.write(f"{type_1} {type_2} {energies}\n")
+            score = ScoreCGRNASPNumpy(cgrnasp_tables_dir=tmp_dir)
+            scores, _ = score.compute([STRUCT1], STRUCT1)
+            for variant in beads:
+                potential = score.get_potentials()[f"{variant} (NUMPY)"]
+                coordinates, residue_names, atom_names, residue_indexes = read_pdb_atoms(STRUCT1)
+                type_indexes = potential.get_type_indexes(residue_names, atom_names)
+                energy = potential.compute_energy(coordinates, type_indexes, residue_indexes)
+                self.assertAlmostEqual(scores[STRUCT1][f"{variant} (NUMPY)"], energy, places=3)
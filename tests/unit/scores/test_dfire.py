@@ -5,6 +5,7 @@ import os
 import unittest
 
 from src.score_abstract.dfire.score_dfire import ScoreDfire
+from src.score_abstract.dfire.score_dfire_numpy import ScoreDfireNumpy
 
 STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
 STRUCT2 = os.path.join("tests", "data", "structure_2.pdb")
@@ -16,3 +17,14 @@ class TestDfire(unittest.TestCase):
         dfire2 = ScoreDfire.compute_dfire(STRUCT2)
         self.assertEqual(dfire1, DFIRE1)
         self.assertEqual(dfire2, DFIRE2)
+
+    def test_dfire_batch(self):
+        scores, _ = ScoreDfire().compute([STRUCT1, STRUCT2], STRUCT1)
+        self.assertEqual(scores[STRUCT1]["DFIRE"], DFIRE1)
+        self.assertEqual(scores[STRUCT2]["DFIRE"], DFIRE2)
+
+    def test_dfire_numpy(self):
+        # Parity with the binary, on the table installed in lib/dfire
+        scores, _ = ScoreDfireNumpy().compute([STRUCT1, STRUCT2], STRUCT1)
+        self.assertAlmostEqual(scores[STRUCT1]["DFIRE (NUMPY)"], DFIRE1, delta=1e-3)
+        self.assertAlmostEqual(scores[STRUCT2]["DFIRE (NUMPY)"], DFIRE2, delta=1e-3)
@@ -3,6 +3,7 @@ import os
 import unittest
 
 from src.score_abstract.rs_rnasp.score_rs_rnasp import ScoreRsRNASP
+from src.score_abstract.rs_rnasp.score_rs_rnasp_numpy import ScoreRsRNASPNumpy
 
 STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
 STRUCT2 = os.path.join("tests", "data", "structure_2.pdb")
@@ -15,3 +16,9 @@ class TestRsRNASP(unittest.TestCase):
         rs_rasp2 = ScoreRsRNASP.compute_rs_rnasp(STRUCT2)
         self.assertTrue(rs_rasp1, rs_RASP1)
         self.assertTrue(rs_rasp2, rs_RASP2)
+
+    def test_rs_rnasp_numpy(self):
+        # Parity with the binary, on the tables installed in lib/rs_rnasp
+        scores, _ = ScoreRsRNASPNumpy().compute([STRUCT1, STRUCT2], STRUCT1)
+        self.assertAlmostEqual(scores[STRUCT1]["rsRNASP (NUMPY)"], rs_RASP1, delta=1e-3)
+        self.assertAlmostEqual(scores[STRUCT2]["rsRNASP (NUMPY)"], rs_RASP2, delta=1e-3)
@@ -1,4 +1,5 @@
 """File to test the Voronota implementation of the CAD score"""
+import math
 import os
 import unittest
 
@@ -17,3 +18,18 @@ class TestVoronota(unittest.TestCase):
         cad_score_2 = ScoreCAD.compute_cad_score(STRUCT2, STRUCT1)
         self.assertAlmostEqual(TRUE_CAD_SCORE_1_2, cad_score)
         self.assertAlmostEqual(TRUE_CAD_SCORE_2_1, cad_score_2)
+
+    def test_parse_cad_batch(self):
+        output = (
+            f"{STRUCT1} {STRUCT2} query residue 0.766022 10 10\n"
+            f"{STRUCT1} {STRUCT1} query residue 1.0 10 10\n"
+        )
+        cad_scores = ScoreCAD.parse_cad_batch(output, [STRUCT1, STRUCT2])
+        self.assertEqual(cad_scores, {STRUCT1: 1.0, STRUCT2: TRUE_CAD_SCORE_2_1})
+
+    def test_parse_cad_batch_missing(self):
+        # A failed model has no line: the scores are not shifted to the next models
+        output = f"{STRUCT1} ./{STRUCT2} query residue 0.766022 10 10\n"
+        cad_scores = ScoreCAD.parse_cad_batch(output, [STRUCT1, STRUCT2])
+        self.assertEqual(cad_scores[STRUCT2], TRUE_CAD_SCORE_2_1)
+        self.assertTrue(math.isnan(cad_scores[STRUCT1]))
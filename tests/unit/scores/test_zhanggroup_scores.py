@@ -1,8 +1,10 @@
 """Class that does the tests for the Zhanggroup code"""
+import math
 import os
 import unittest
 
 from src.score_abstract.score_zhanggroup.tm_gdt_scores import GdtScores
+from src.score_abstract.score_zhanggroup.tm_score_us import TMScoreUS
 
 STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
 STRUCT2 = os.path.join("tests", "data", "structure_2.pdb")
@@ -22,4 +24,13 @@ class TestZhanggroupScores(unittest.TestCase):
 
     def test_gdt_ts_detailed(self):
         gdt_ts_detailed = GdtScores.compute_gdt_ts_detailed(STRUCT1, STRUCT2)
-        self.assertAlmostEqual(gdt_ts_detailed, TRUE_SCORES['GDT-TS-DETAILED'])
\ No newline at end of file
+        self.assertAlmostEqual(gdt_ts_detailed, TRUE_SCORES['GDT-TS-DETAILED'])
+
+    def test_tm_score_table(self):
+        output = (
+            "#PDBchain1\tPDBchain2\tTM1\tTM2\tRMSD\tID1\tID2\tIDali\tL1\tL2\tLali\n"
+            "tests/data/structure_2.pdb:A\tnative.pdb:A\t0.5\t0.6\t2.1\t1\t1\t1\t10\t10\t10\n"
+        )
+        tm_scores = TMScoreUS.parse_tm_score_table(output, [STRUCT1, STRUCT2])
+        self.assertEqual(tm_scores[STRUCT2], 0.6)
+        self.assertTrue(math.isnan(tm_scores[STRUCT1]))
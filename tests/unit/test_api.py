@@ -0,0 +1,64 @@
+"""Class that tests the in-memory scoring API."""
+
+import os
+import unittest
+from typing import Dict, Optional, Tuple
+
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+
+try:
+    from src.api import InputStructure, Scorer
+except ImportError:
+    Scorer = None
+
+PDB_PATH = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class ScoreNbAtomsFile(ScoreAbstract):
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        return {"FILE": len(read_pdb_atoms(pred_path)[0])}, {"FILE": 0.0}
+
+
+class ScoreNbAtomsMemory(ScoreAbstract):
+    memory_support = True
+
+    def compute_atoms(
+        self, structures: Dict[str, Tuple], native: Optional[Tuple], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        scores = {name: {"MEMORY": len(atoms[0])} for name, atoms in structures.items()}
+        return scores, {name: {"MEMORY": 0.0} for name in structures}
+
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        raise NotImplementedError
+
+
+@unittest.skipIf(Scorer is None, "ScoreCLI dependencies not installed")
+class TestAPI(unittest.TestCase):
+    def test_inputs(self):
+        atoms = read_pdb_atoms(PDB_PATH)
+        with open(PDB_PATH, "r") as f:
+            content = f.read()
+        for structure in [PDB_PATH, content, atoms]:
+            c_atoms = InputStructure(structure).get_atoms()
+            self.assertEqual(c_atoms[2], atoms[2])
+            self.assertTrue((abs(c_atoms[0] - atoms[0]) < 1e-3).all())
+        with self.assertRaises(TypeError):
+            InputStructure(3)
+
+    def test_score(self):
+        atoms = read_pdb_atoms(PDB_PATH)
+        scorer = Scorer([ScoreNbAtomsFile(), ScoreNbAtomsMemory()])
+        score_df = scorer.score({"path": PDB_PATH, "atoms": atoms}, native=PDB_PATH)
+        self.assertEqual(list(score_df.index), ["path", "atoms"])
+        self.assertEqual(score_df["FILE"].tolist(), [len(atoms[0])] * 2)
+        self.assertEqual(score_df["MEMORY"].tolist(), [len(atoms[0])] * 2)
+        records = scorer.score_records([atoms])
+        self.assertEqual(records["MEMORY"][0], len(atoms[0]))
+
+    def test_same_path(self):
+        scorer = Scorer([ScoreNbAtomsFile()])
+        score_df = scorer.score({"first": PDB_PATH, "second": PDB_PATH}, native=PDB_PATH)
+        self.assertEqual(list(score_df.index), ["first", "second"])
+        nb_atoms = len(read_pdb_atoms(PDB_PATH)[0])
+        self.assertEqual(score_df["FILE"].tolist(), [nb_atoms, nb_atoms])
@@ -0,0 +1,81 @@
+"""Class that tests the generation of decoys and the comparison of the benchmarks."""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from benchmarks.compare import compare_benchmarks
+from benchmarks.decoys import generate_decoy_set
+from benchmarks.fake_tools import write_fake_tools
+from src.score_abstract.dfire.score_dfire import ScoreDfire
+from src.score_abstract.mcq4structures.score_mcq import ScoreMCQ
+from src.score_abstract.mcq4structures.score_mcq_lcs import ScoreMCQLCS
+from src.score_abstract.openstructure.qs_score import QSScore
+from src.score_abstract.openstructure.score_lddt import ScorelDDT
+from src.score_abstract.rs_rnasp.score_rs_rnasp import ScoreRsRNASP
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+from src.score_abstract.score_voronota.score_cad import ScoreCAD
+from src.score_abstract.score_zhanggroup.tm_gdt_scores import GdtScores
+from src.score_abstract.score_zhanggroup.tm_score_us import TMScoreUS
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_decoys(self):
+        native_path, decoy_paths = generate_decoy_set(self.tmp_dir.name, 3, n_residues=120)
+        native, residue_names, _, residue_indexes = read_pdb_atoms(native_path)
+        self.assertEqual(residue_indexes.max(), 119)
+        for decoy_path in decoy_paths:
+            decoy, decoy_residue_names, _, _ = read_pdb_atoms(decoy_path)
+            self.assertEqual(decoy.shape, native.shape)
+            self.assertEqual(decoy_residue_names, residue_names)
+            self.assertGreater(np.abs(decoy - native).mean(), 0.1)
+
+    def test_fake_tools(self):
+        bin_paths = write_fake_tools(os.path.join(self.tmp_dir.name, "bin"))
+        native_path, decoy_paths = generate_decoy_set(self.tmp_dir.name, 3)
+        all_scores = [
+            GdtScores(zhang_bin_path=bin_paths["ZHANG_GROUP"]),
+            TMScoreUS(zhang_bin_path_us=bin_paths["ZHANG_GROUP_US"]),
+            ScoreDfire(dfire_bin_path=bin_paths["DFIRE"]),
+            ScoreRsRNASP(rs_rnasp_bin_path=bin_paths["rsRNASP"]),
+            ScoreCAD(cad_bin_path=bin_paths["VORONOTA"]),
+            ScorelDDT(ost_bin_path=bin_paths["OST"]),
+            QSScore(ost_bin_path=bin_paths["OST"]),
+            ScoreMCQ(mcq_bin_path=bin_paths["MCQ4STRUCTURES"]),
+            ScoreMCQLCS(mcq_bin_path=bin_paths["MCQ4STRUCTURES"]),
+        ]
+        for score_fn in all_scores:
+            scores, _ = score_fn.compute(decoy_paths, native_path)
+            for decoy_path in decoy_paths:
+                values = list(scores[decoy_path].values())
+                self.assertTrue(len(values) > 0 and not np.isnan(values).any(), score_fn)
+
+    def test_compare(self):
+        result = {
+            "case": "template_10",
+            "metric": "RMSD",
+            "status": "ok",
+            "n_scored": 10,
+            "throughput": 100.0,
+            "latency": {"p50": 0.01, "p90": 0.02},
+            "peak_rss_kb": 1000,
+        }
+        paths = []
+        for name, throughput, peak_rss in [("baseline", 100, 1000), ("current", 50, 1100)]:
+            paths.append(os.path.join(self.tmp_dir.name, f"{name}.json"))
+            results = [{**result, "throughput": throughput, "peak_rss_kb": peak_rss}]
+            with open(paths[-1], "w") as f:
+                json.dump({"metadata": {}, "results": results}, f)
+        regressions = compare_benchmarks(*paths)
+        self.assertEqual(list(regressions.keys()), [("template_10", "RMSD")])
+        self.assertEqual(len(regressions[("template_10", "RMSD")]), 1)
+        self.assertEqual(compare_benchmarks(paths[0], paths[0]), {})
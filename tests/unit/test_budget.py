@@ -0,0 +1,53 @@
+"""Class that tests the planning of the cells within a time budget."""
+
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from src.budget import TimeBudget, fit_tasks, get_skipped, plan_metric
+from src.scheduler import CostModel
+
+
+class TestBudget(unittest.TestCase):
+    def test_fit_tasks(self):
+        self.assertEqual(fit_tasks([1.0, 2.0, 3.0, 4.0], 1, 6.5), 3)
+        self.assertEqual(fit_tasks([1.0, 2.0, 3.0, 4.0], 2, 4.0), 3)
+        self.assertEqual(fit_tasks([1.0], 1, 0.5), 0)
+
+    def test_plan(self):
+        costs = pd.DataFrame({"metric": ["ScoreCAD"] * 2, "n_atoms": [10, 100], "time": [1, 10]})
+        cost_model = CostModel(costs)
+        sizes = {"a.pdb": 30, "b.pdb": 10, "c.pdb": 20}
+        pred_paths, predicted = plan_metric(cost_model, "ScoreCAD", 1, sizes, 3.5)
+        self.assertEqual(pred_paths, ["b.pdb", "c.pdb"])
+        self.assertAlmostEqual(predicted, 3.0)
+        # Metric without previous cost
+        pred_paths, predicted = plan_metric(cost_model, "ScoreRMSD", 1, sizes, 0.0)
+        self.assertEqual((len(pred_paths), predicted), (3, 0.0))
+
+    def test_skipped(self):
+        skipped = get_skipped(
+            {0: ["dir/a.pdb", "dir/b.pdb"], 1: ["dir/a.pdb"]},
+            ["dir/a.pdb", "dir/b.pdb"],
+            {0: "ScoreRMSD", 1: "ScoreCAD"},
+        )
+        self.assertEqual(skipped, {"a.pdb": "", "b.pdb": "ScoreCAD"})
+        skipped = get_skipped(
+            {0: ["dir/a.pdb"]},
+            ["dir/a.pdb", "dir/b.pdb"],
+            {0: "ScoreDfire"},
+            {0: "ScoreDfireNumpy"},
+        )
+        self.assertEqual(
+            skipped, {"a.pdb": "ScoreDfire REPLACED BY ScoreDfireNumpy", "b.pdb": "ScoreDfire"}
+        )
+
+    def test_deadline(self):
+        budget = TimeBudget(100, start=time.time() - 99)
+        self.assertTrue(budget.is_expired())
+        self.assertEqual(budget.get_remaining(), 0.0)
+        expired = threading.Event()
+        TimeBudget(2.1).start_watchdog(expired.set)
+        self.assertTrue(expired.wait(timeout=5))
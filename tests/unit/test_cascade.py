@@ -0,0 +1,54 @@
+"""Class that tests the stages of the cascade mode."""
+
+import math
+import unittest
+
+from src.cascade import CascadeStage, fill_filtered, read_cascade
+
+
+class TestCascade(unittest.TestCase):
+    def test_nb_kept(self):
+        self.assertEqual(CascadeStage(["RMSD"], 0.2).get_nb_kept(11), 3)
+        self.assertEqual(CascadeStage(["RMSD"], "50%").get_nb_kept(10), 5)
+        self.assertEqual(CascadeStage(["RMSD"], 50).get_nb_kept(10), 10)
+        self.assertEqual(CascadeStage(["RMSD"]).get_nb_kept(10), 10)
+
+    def test_select(self):
+        scores = {
+            "a.pdb": {"RMSD": 3.0, "TM-SCORE": 0.5},
+            "b.pdb": {"RMSD": 1.0, "TM-SCORE": 0.4},
+            "c.pdb": {"RMSD": float("nan"), "TM-SCORE": 0.9},
+            "d.pdb": {},
+        }
+        self.assertEqual(CascadeStage(["RMSD"], 2).select(scores), ["b.pdb", "a.pdb"])
+        self.assertEqual(CascadeStage(["TM-SCORE"], 1, "TM-score").select(scores), ["c.pdb"])
+        with self.assertRaises(ValueError):
+            CascadeStage(["CAD"], 1, "CAD").select(scores)
+
+    def test_order(self):
+        scores = {
+            "a.pdb": {"BARNABA-eSCORE": 0.2, "LCS-TA-RESIDUES": 10},
+            "b.pdb": {"BARNABA-eSCORE": 0.8, "LCS-TA-RESIDUES": 30},
+        }
+        self.assertEqual(CascadeStage(["BARNABA"], 1, "BARNABA-eSCORE").select(scores), ["b.pdb"])
+        self.assertEqual(CascadeStage(["LCS-TA"], 1, "LCS-TA-RESIDUES").select(scores), ["b.pdb"])
+        stage = CascadeStage(["BARNABA"], 1, "BARNABA-eSCORE", "asc")
+        self.assertEqual(stage.select(scores), ["a.pdb"])
+        with self.assertRaises(ValueError):
+            CascadeStage(["BARNABA"], 1, "BARNABA-eSCORE", "UP")
+
+    def test_read(self):
+        stages = read_cascade(
+            "[{'scores': 'CLASH,RMSD', 'keep': '20%', 'sort_by': 'RMSD'}, {'SCORES': ['CAD']}]"
+        )
+        self.assertEqual([stage.scores for stage in stages], [["CLASH", "RMSD"], ["CAD"]])
+        self.assertEqual(stages[0].sort_by, "RMSD")
+        self.assertIsNone(stages[0].order)
+        self.assertEqual(read_cascade("[{'SCORES': ['RMSD'], 'ORDER': 'DESC'}]")[0].order, "DESC")
+        self.assertIsNone(read_cascade(None))
+
+    def test_fill(self):
+        scores, times = {"a.pdb": {"CAD": 0.5}}, {"a.pdb": {"CAD": 1.0}}
+        fill_filtered(scores, times, ["b.pdb"])
+        self.assertTrue(math.isnan(scores["b.pdb"]["CAD"]))
+        self.assertTrue(math.isnan(times["b.pdb"]["CAD"]))
@@ -0,0 +1,50 @@
+"""Class that tests the context shared by the scores of a prediction."""
+
+import os
+import unittest
+
+import numpy as np
+
+from src.decoy_context import DecoyContext
+from src.score_abstract.score_abstract_potential import (
+    PairPotential,
+    ScoreAbstractPotential,
+    read_pdb_atoms,
+)
+
+STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class ScoreRandomPotential(ScoreAbstractPotential):
+    score_name = "RANDOM"
+
+    def __init__(self, *args, **kwargs):
+        super(ScoreRandomPotential, self).__init__(*args, **kwargs)
+        _, residue_names, atom_names, _ = read_pdb_atoms(STRUCT1)
+        atom_types = sorted({f"{res}:{atom}" for res, atom in zip(residue_names, atom_names)})
+        table = np.random.default_rng(0).normal(size=(1, len(atom_types), len(atom_types), 20))
+        table = (table + table.transpose(0, 2, 1, 3)) / 2
+        self.potential = PairPotential(table, atom_types, 0.5, 10, [1], [1])
+
+    def get_potentials(self):
+        return {self.score_name: self.potential}
+
+
+class TestDecoyContext(unittest.TestCase):
+    def test_cache(self):
+        context = DecoyContext(STRUCT1)
+        atoms = context.get_atoms()
+        self.assertIs(context.get_atoms(), atoms)
+        self.assertEqual(context.get("count", lambda: 1), 1)
+        self.assertEqual(context.get("count", lambda: 2), 1)
+        context.release()
+        self.assertEqual(context.get("count", lambda: 2), 2)
+
+    def test_potential(self):
+        score_fn = ScoreRandomPotential()
+        context = DecoyContext(STRUCT1, DecoyContext(STRUCT1))
+        scores, _ = score_fn.compute_context(context)
+        expected, _ = score_fn._compute(STRUCT1, STRUCT1)
+        self.assertEqual(scores, expected)
+        # The atoms are kept for the next scores of the prediction
+        self.assertIsNotNone(context.get("atoms", lambda: None))
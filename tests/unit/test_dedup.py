@@ -0,0 +1,66 @@
+"""Class that tests the deduplication of the predictions."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.dedup import fan_out, get_superposed_rmsd, group_duplicates
+from src.score_abstract.score_abstract_potential import format_pdb_atoms, read_pdb_atoms
+
+PDB_PATH = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class TestDedup(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        coordinates, residue_names, atom_names, residue_indexes = read_pdb_atoms(PDB_PATH)
+        rotation = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        variants = {
+            "original": coordinates,
+            "rotated": coordinates @ rotation.T + 10.0,
+            "translated": coordinates + np.random.default_rng(0).normal(scale=2.0, size=(1, 3)),
+        }
+        self.paths = {}
+        for name, c_coordinates in variants.items():
+            self.paths[name] = os.path.join(self.tmp_dir.name, f"{name}.pdb")
+            with open(self.paths[name], "w") as f:
+                f.write(
+                    format_pdb_atoms(c_coordinates, residue_names, atom_names, residue_indexes)
+                )
+        self.paths["copy"] = os.path.join(self.tmp_dir.name, "copy.pdb")
+        shutil.copy(self.paths["original"], self.paths["copy"])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_exact(self):
+        paths = [self.paths[name] for name in ["original", "rotated", "copy"]]
+        groups = group_duplicates(paths)
+        self.assertEqual(groups, {paths[0]: [paths[2]], paths[1]: []})
+
+    def test_residues(self):
+        coordinates, residue_names, atom_names, residue_indexes = read_pdb_atoms(PDB_PATH)
+        variants = {"chain": (residue_indexes, "B"), "renumbered": (residue_indexes + 5, "A")}
+        paths = [self.paths["original"]]
+        for name, (c_indexes, chain) in variants.items():
+            paths.append(os.path.join(self.tmp_dir.name, f"{name}.pdb"))
+            with open(paths[-1], "w") as f:
+                f.write(format_pdb_atoms(coordinates, residue_names, atom_names, c_indexes, chain))
+        self.assertEqual(group_duplicates(paths), {path: [] for path in paths})
+        self.assertEqual(
+            group_duplicates(paths, rmsd_tolerance=0.01), {path: [] for path in paths}
+        )
+
+    def test_rmsd(self):
+        paths = [self.paths[name] for name in ["original", "rotated", "translated"]]
+        self.assertEqual(group_duplicates(paths, rmsd_tolerance=0.01), {paths[0]: paths[1:]})
+        coordinates = read_pdb_atoms(PDB_PATH)[0]
+        self.assertAlmostEqual(get_superposed_rmsd(coordinates + 1.0, coordinates), 0.0, 4)
+
+    def test_fan_out(self):
+        scores, times = fan_out({"a": {"RMSD": 1.0}}, {"a": {"RMSD": 2.0}}, {"a": ["b"]})
+        self.assertEqual(scores, {"a": {"RMSD": 1.0}, "b": {"RMSD": 1.0}})
+        self.assertEqual(times, {"a": {"RMSD": 2.0}, "b": {"RMSD": 0.0}})
@@ -0,0 +1,102 @@
+"""Class that tests the work queue of the distributed mode."""
+
+import os
+import tempfile
+import time
+import unittest
+from typing import Dict, Tuple
+
+from src.score_abstract.score_abstract import ScoreAbstract
+
+try:
+    from src.distributed import FileLeaseQueue, compute_task, get_task_id, run_worker
+except ImportError:
+    FileLeaseQueue = None
+
+
+class ScoreError(ScoreAbstract):
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        raise RuntimeError("Crash of the tool")
+
+
+class ScoreSize(ScoreAbstract):
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        return {"SIZE": os.path.getsize(pred_path)}, {"SIZE": 0.0}
+
+
+@unittest.skipIf(FileLeaseQueue is None, "ScoreCLI dependencies not installed")
+class TestDistributed(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queue = FileLeaseQueue(os.path.join(self.tmp_dir.name, "queue"), lease_timeout=60)
+        self.tasks = [{"id": f"{index:06d}_ScoreSize", "index": index} for index in range(3)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_claim(self):
+        self.assertEqual(self.queue.submit(self.tasks), 3)
+        self.assertEqual(self.queue.submit(self.tasks), 0)
+        task = self.queue.claim()
+        self.assertEqual(task["index"], 0)
+        self.assertIsNone(self.queue.claim({"ScoreRMSD"}))
+        self.queue.complete(task["id"], {"index": 0})
+        self.assertEqual(self.queue.get_pending(), (2, 0))
+        self.assertEqual(list(self.queue.get_results()), [{"index": 0}])
+
+    def test_reclaim(self):
+        self.queue.submit(self.tasks[:1])
+        task = self.queue.claim()
+        self.assertIsNone(self.queue.claim())
+        lease_path = os.path.join(self.queue.dirs["leases"], f"{task['id']}.json")
+        os.utime(lease_path, (time.time() - 120, time.time() - 120))
+        self.assertEqual(self.queue.claim()["id"], task["id"])
+
+    def test_worker(self):
+        pred_paths = []
+        for index in range(3):
+            pred_paths.append(os.path.join(self.tmp_dir.name, f"pred_{index}.pdb"))
+            with open(pred_paths[-1], "w") as f:
+                f.write("ATOM\n" * (index + 1))
+        tasks = [
+            {
+                "id": f"{index:06d}_ScoreSize",
+                "target": "target",
+                "metric": "ScoreSize",
+                "pred_paths": [pred_path],
+                "native_path": pred_paths[0],
+            }
+            for index, pred_path in enumerate(pred_paths)
+        ]
+        self.queue.submit(tasks)
+        self.assertEqual(run_worker(self.queue, [ScoreSize()], {}, wait=False), 3)
+        sizes = {}
+        for result in self.queue.get_results():
+            sizes.update(result["scores"])
+        self.assertEqual([sizes[path]["SIZE"] for path in pred_paths], [5, 10, 15])
+
+    def test_targets(self):
+        # The same chunk of two targets, or of the same target with another native
+        ids = [
+            get_task_id("rp_01", 0, "native_1.pdb", ["a.pdb"], "ScoreSize"),
+            get_task_id("rp_02", 0, "native_2.pdb", ["a.pdb"], "ScoreSize"),
+            get_task_id("rp_01", 0, "native_2.pdb", ["a.pdb"], "ScoreSize"),
+        ]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(self.queue.submit([{"id": task_id} for task_id in ids[:1]]), 1)
+        self.assertEqual(self.queue.submit([{"id": task_id} for task_id in ids]), 2)
+        self.assertEqual(self.queue.get_pending({"ScoreSize"}), (3, 0))
+
+    def test_error(self):
+        pred_path = os.path.join(self.tmp_dir.name, "pred.pdb")
+        with open(pred_path, "w") as f:
+            f.write("ATOM\n")
+        task = {"id": "000000_ScoreError", "target": "target", "metric": "ScoreError"}
+        task.update({"pred_paths": [pred_path], "native_path": pred_path})
+        self.queue.submit([task])
+        # The worker does not die and the task is done once
+        self.assertEqual(run_worker(self.queue, [ScoreError()], {}, wait=False), 1)
+        result = list(self.queue.get_results())[0]
+        self.assertEqual(result["scores"], {})
+        self.assertIn("Crash of the tool", result["error"])
+        self.assertEqual(compute_task(ScoreError(), task, {})["pred_paths"], [pred_path])
@@ -0,0 +1,47 @@
+"""Class that tests the manifest of the multi-target mode."""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+try:
+    from src.manifest import read_manifest, to_long_format
+except ImportError:
+    read_manifest = None
+
+
+@unittest.skipIf(read_manifest is None, "ScoreCLI dependencies not installed")
+class TestManifest(unittest.TestCase):
+    def test_read_csv(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manifest_path = os.path.join(tmp_dir, "manifest.csv")
+            pd.DataFrame(
+                {
+                    "target": ["rp_01", None],
+                    "native_path": ["natives/1.pdb", "natives/rp_02.pdb"],
+                    "pred_path": ["preds/rp_01", "preds/rp_02"],
+                    "params": ['{"mcq_threshold": 15}', None],
+                }
+            ).to_csv(manifest_path, index=False)
+            manifest = read_manifest(manifest_path)
+        self.assertEqual([target["target"] for target in manifest], ["rp_01", "rp_02"])
+        self.assertEqual(manifest[0]["params"], {"mcq_threshold": 15})
+        self.assertEqual(manifest[1]["params"], {})
+
+    def test_read_yaml(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manifest_path = os.path.join(tmp_dir, "manifest.yaml")
+            with open(manifest_path, "w") as f:
+                f.write("TARGETS:\n  - native_path: 1.pdb\n    pred_path: preds\n")
+                f.write("  - native_path: 1.pdb\n    pred_path: preds_2\n")
+            with self.assertRaises(ValueError):
+                read_manifest(manifest_path)
+
+    def test_long_format(self):
+        score_df = pd.DataFrame({"RMSD": [1.0, 2.0], "DFIRE": [-3.0, -4.0]}, index=["a", "b"])
+        long_df = to_long_format(score_df, "rp_01")
+        self.assertEqual(list(long_df.columns), ["target", "decoy", "metric", "value"])
+        self.assertEqual(len(long_df), 4)
+        self.assertEqual(long_df.iloc[-1].tolist(), ["rp_01", "b", "DFIRE", -4.0])
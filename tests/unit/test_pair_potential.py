@@ -0,0 +1,90 @@
+"""Class that tests the Python engine of the statistical potentials."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.score_abstract.cgrnasp.score_cgrnasp_numpy import ScoreCGRNASPNumpy
+from src.score_abstract.dfire.score_dfire_numpy import ScoreDfireNumpy
+from src.score_abstract.score_abstract_potential import (
+    PairPotential,
+    read_pair_table,
+    read_pdb_atoms,
+)
+from src.tools import ToolNotFoundError
+
+STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class TestPairPotential(unittest.TestCase):
+    def setUp(self):
+        coordinates, residue_names, atom_names, residue_indexes = read_pdb_atoms(STRUCT1)
+        self.coordinates, self.residue_indexes = coordinates, residue_indexes
+        self.atom_types = sorted({f"{res}:{atom}" for res, atom in zip(residue_names, atom_names)})
+        rng = np.random.default_rng(0)
+        table = rng.normal(size=(2, len(self.atom_types), len(self.atom_types), 20))
+        self.table = (table + table.transpose(0, 2, 1, 3)) / 2
+        self.potential = PairPotential(self.table, self.atom_types, 0.5, 10, [1, 4], [1, 0.5])
+        self.type_indexes = self.potential.get_type_indexes(residue_names, atom_names)
+
+    def test_compute_energy(self):
+        energy = self.potential.compute_energy(
+            self.coordinates, self.type_indexes, self.residue_indexes
+        )
+        # Brute force computation over all the pairs
+        first, second = np.triu_indices(len(self.coordinates), k=1)
+        distances = np.linalg.norm(self.coordinates[first] - self.coordinates[second], axis=1)
+        separation = np.abs(self.residue_indexes[first] - self.residue_indexes[second])
+        keep = (distances <= 10) & (separation >= 1)
+        first, second = first[keep], second[keep]
+        distances, separation = distances[keep], separation[keep]
+        classes = (separation >= 4).astype(int)
+        weights = np.where(classes == 0, 1, 0.5)
+        bins = np.minimum((distances / 0.5).astype(int), 19)
+        energies = self.table[classes, self.type_indexes[first], self.type_indexes[second], bins]
+        expected = float(np.sum(weights * energies))
+        self.assertAlmostEqual(energy, expected, places=6)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_path = os.path.join(tmp_dir, "potential.npy")
+            self.potential.save(out_path)
+            potential = PairPotential.load(out_path)
+            self.assertIsInstance(potential.table, np.memmap)
+            # The flat table is a view of the memory-mapped file, not a copy
+            self.assertTrue(np.shares_memory(potential.flat_table, potential.table))
+            self.assertFalse(potential.flat_table.flags.owndata)
+            self.assertAlmostEqual(
+                potential.compute_energy(
+                    self.coordinates, self.type_indexes, self.residue_indexes
+                ),
+                self.potential.compute_energy(
+                    self.coordinates, self.type_indexes, self.residue_indexes
+                ),
+            )
+
+    def test_read_pair_table(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            table_path = os.path.join(tmp_dir, "table.txt")
+            with open(table_path, "w") as f:
+                f.write("# comment\nA P G C1' 1.0 2.0\nA:P A:P 3.0 4.0 5.0\n")
+            table, atom_types = read_pair_table(table_path)
+        self.assertEqual(atom_types, ["A:P", "G:C1'"])
+        self.assertEqual(table.shape, (2, 2, 3))
+        self.assertEqual(table[1, 0, 1], 2.0)
+        self.assertEqual(table[0, 0, 2], 5.0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            table_path = os.path.join(tmp_dir, "table.txt")
+            with open(table_path, "w") as f:
+                f.write("A:P A:P 3.0 4.0\nA P G 1.0 2.0\n")
+            with self.assertRaises(ValueError):
+                read_pair_table(table_path)
+
+    def test_missing_tables(self):
+        for score in [ScoreDfireNumpy("missing.txt"), ScoreCGRNASPNumpy("missing")]:
+            with self.assertRaises(ToolNotFoundError):
+                score.check_tools()
+        with self.assertRaises(ToolNotFoundError):
+            ScoreDfireNumpy("missing.txt").compute([STRUCT1], STRUCT1)
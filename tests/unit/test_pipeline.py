@@ -0,0 +1,55 @@
+"""Class that tests the pipeline of the ingestion of the predictions."""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from src.pipeline import Pipeline, iter_pred_dir
+
+
+class TestPipeline(unittest.TestCase):
+    def test_stages(self):
+        stages = [
+            ("double", lambda x: 2 * x),
+            ("filter", lambda x: x if x % 3 != 0 else None),
+        ]
+        batches = list(Pipeline(range(10), stages).iter_batches(batch_size=4))
+        self.assertTrue(all(0 < len(batch) <= 4 for batch in batches))
+        self.assertEqual(sum(batches, []), [2, 4, 8, 10, 14, 16])
+
+    def test_back_pressure(self):
+        read = []
+
+        def source():
+            for index in range(100):
+                read.append(index)
+                yield index
+
+        batches = Pipeline(source(), [("copy", lambda x: x)], queue_size=2).iter_batches(1)
+        self.assertEqual(next(batches), [0])
+        # The source is stopped by the full queues while the first batch is consumed
+        self.assertLess(len(read), 10)
+        self.assertEqual(sum([[0]] + list(batches), []), list(range(100)))
+
+    def test_error(self):
+        def fail(x):
+            if x == 5:
+                raise ValueError("Error of the stage")
+            return x
+
+        with self.assertRaises(ValueError):
+            list(Pipeline(range(10), [("fail", fail)]).iter_batches())
+        # The threads of the pipeline are stopped
+        for thread in threading.enumerate():
+            if thread.name in ["source", "fail"]:
+                thread.join(timeout=1)
+                self.assertFalse(thread.is_alive())
+
+    def test_pred_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["a.pdb", "b.cif", "c.txt"]:
+                with open(os.path.join(tmp_dir, name), "w") as f:
+                    f.write("")
+            paths = sorted(os.path.basename(path) for path in iter_pred_dir(tmp_dir))
+        self.assertEqual(paths, ["a.pdb", "b.cif"])
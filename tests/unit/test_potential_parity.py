@@ -0,0 +1,109 @@
+"""
+Class that tests the NumPy engine against a pair loop, on the synthetic tables of tests/data.
+The loop follows the same assumed model (every pair of typed atoms of different residues is
+looked up in the table of its residue separation, at the bin of its distance), so it checks the
+vectorised engine, not the model: the parity with the binaries is tested in tests/unit/scores.
+"""
+
+import os
+import unittest
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.score_abstract.cgrnasp.score_cgrnasp_numpy import (
+    CGRNASP_BIN_WIDTHS,
+    CGRNASP_SEPARATION_EDGES,
+    CGRNASP_VARIANTS,
+    ScoreCGRNASPNumpy,
+)
+from src.score_abstract.dfire.score_dfire_numpy import ScoreDfireNumpy
+from src.score_abstract.rs_rnasp.score_rs_rnasp_numpy import (
+    RS_RNASP_BIN_WIDTHS,
+    RS_RNASP_SEPARATION_EDGES,
+    ScoreRsRNASPNumpy,
+)
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+
+STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
+STRUCT2 = os.path.join("tests", "data", "structure_2.pdb")
+TABLES_DIR = os.path.join("tests", "data", "potentials")
+DFIRE_TABLE = os.path.join(TABLES_DIR, "dfire.txt")
+RS_RNASP_TABLES = [
+    os.path.join(TABLES_DIR, "short_ranged.txt"),
+    os.path.join(TABLES_DIR, "long_ranged.txt"),
+]
+
+CGRNASP_TABLES_DIR = os.path.join(TABLES_DIR, "cgrnasp")
+
+
+def read_rows(table_path: str) -> Dict[Tuple[str, str], List[float]]:
+    """Read the energies of each pair of atom types, in both orders."""
+    rows = {}
+    with open(table_path, "r") as f:
+        for line in f:
+            tokens = line.split()
+            if len(tokens) == 0 or tokens[0].startswith("#"):
+                continue
+            first, second = f"{tokens[0]}:{tokens[1]}", f"{tokens[2]}:{tokens[3]}"
+            rows[(first, second)] = rows[(second, first)] = list(map(float, tokens[4:]))
+    return rows
+
+
+def compute_pair_loop(
+    pdb_path: str, tables: List[Dict], bin_widths: List[float], edges: List[int], weights: List
+) -> float:
+    """Compute the energy of a structure with a loop over all the atom pairs."""
+    coordinates, residue_names, atom_names, residue_indexes = read_pdb_atoms(pdb_path)
+    types = [f"{residue}:{atom}" for residue, atom in zip(residue_names, atom_names)]
+    known_types = {pair[0] for table in tables for pair in table}
+    atoms = [index for index, atom_type in enumerate(types) if atom_type in known_types]
+    energy = 0.0
+    for position, first in enumerate(atoms):
+        for second in atoms[position + 1 :]:
+            separation = abs(residue_indexes[first] - residue_indexes[second])
+            if separation < edges[0]:
+                continue
+            index = max(i for i, edge in enumerate(edges) if separation >= edge)
+            energies = tables[index].get((types[first], types[second]))
+            if energies is None:
+                continue
+            distance = np.linalg.norm(coordinates[first] - coordinates[second])
+            c_bin = int(distance / bin_widths[index])
+            if c_bin < len(energies):
+                energy += weights[index] * energies[c_bin]
+    return energy
+
+
+class TestPotentialParity(unittest.TestCase):
+    def test_dfire(self):
+        score = ScoreDfireNumpy(dfire_table_path=DFIRE_TABLE)
+        scores, _ = score.compute([STRUCT1, STRUCT2], STRUCT1)
+        for pred_path in [STRUCT1, STRUCT2]:
+            expected = compute_pair_loop(pred_path, [read_rows(DFIRE_TABLE)], [0.5], [1], [1])
+            # The scores are rounded to 3 decimals, like the outputs of the binaries
+            self.assertAlmostEqual(scores[pred_path]["DFIRE (NUMPY)"], expected, delta=1e-3)
+
+    def test_rs_rnasp(self):
+        weights = [1.0, 0.5]
+        score = ScoreRsRNASPNumpy(rs_rnasp_table_paths=RS_RNASP_TABLES, rs_rnasp_weights=weights)
+        scores, _ = score.compute([STRUCT1, STRUCT2], STRUCT1)
+        tables = [read_rows(table_path) for table_path in RS_RNASP_TABLES]
+        for pred_path in [STRUCT1, STRUCT2]:
+            expected = compute_pair_loop(
+                pred_path, tables, RS_RNASP_BIN_WIDTHS, RS_RNASP_SEPARATION_EDGES, weights
+            )
+            self.assertAlmostEqual(scores[pred_path]["rsRNASP (NUMPY)"], expected, delta=1e-3)
+
+    def test_cgrnasp(self):
+        score = ScoreCGRNASPNumpy(cgrnasp_tables_dir=CGRNASP_TABLES_DIR)
+        scores, _ = score.compute([STRUCT1, STRUCT2], STRUCT1)
+        for variant in CGRNASP_VARIANTS:
+            tables = [read_rows(path) for path in score.get_variant_table_paths(variant)]
+            for pred_path in [STRUCT1, STRUCT2]:
+                expected = compute_pair_loop(
+                    pred_path, tables, CGRNASP_BIN_WIDTHS, CGRNASP_SEPARATION_EDGES, [1, 1]
+                )
+                self.assertAlmostEqual(
+                    scores[pred_path][f"{variant} (NUMPY)"], expected, delta=1e-3
+                )
@@ -0,0 +1,77 @@
+"""Class that tests the cost model used to order the predictions."""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.scheduler import (
+    CostModel,
+    get_costs_path,
+    get_metric,
+    order_by_cost,
+    predict_makespan,
+)
+
+
+class TestScheduler(unittest.TestCase):
+    def test_fit(self):
+        costs = pd.DataFrame(
+            {
+                "metric": ["ScoreCAD"] * 3 + ["ScoreClash"],
+                "n_atoms": [100, 1000, 10000, 500],
+                "time": [0.02, 2.0, 200.0, 0.001],
+            }
+        )
+        cost_model = CostModel(costs)
+        self.assertAlmostEqual(cost_model.params["ScoreCAD"][1], 2.0)
+        self.assertAlmostEqual(cost_model.predict("ScoreCAD", 2000), 8.0)
+        # Linear with only one size
+        self.assertAlmostEqual(cost_model.predict("ScoreClash", 1000), 0.002)
+        self.assertIsNone(cost_model.predict("ScoreRMSD", 1000))
+
+    def test_from_time_paths(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            time_path = os.path.join(tmp_dir, "time.csv")
+            costs = {"metric": ["ScoreDfire"], "n_atoms": [100], "time": [1.0]}
+            pd.DataFrame(costs).to_csv(get_costs_path(time_path), index=False)
+            missing_path = os.path.join(tmp_dir, "missing.csv")
+            cost_model = CostModel.from_time_paths([time_path, missing_path])
+        self.assertTrue(cost_model.has_metric("ScoreDfire"))
+
+    def test_order(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for index, nb_lines in enumerate([10, 1000, 100]):
+                paths.append(os.path.join(tmp_dir, f"{index}.pdb"))
+                with open(paths[-1], "w") as f:
+                    f.write("ATOM\n" * nb_lines)
+            self.assertEqual(order_by_cost(paths), [paths[1], paths[2], paths[0]])
+            costs = {"metric": ["ScoreCAD"] * 2, "n_atoms": [10, 100], "time": [1.0, 10.0]}
+            cost_model = CostModel(pd.DataFrame(costs))
+            ordered = order_by_cost(paths, cost_model, ["ScoreCAD", "ScoreRMSD"])
+            self.assertEqual(ordered, [paths[1], paths[2], paths[0]])
+
+    def test_makespan(self):
+        self.assertEqual(predict_makespan([5, 4, 3, 3, 3], 2), 10)
+        self.assertEqual(predict_makespan([5, 1], 4), 5)
+        self.assertEqual(predict_makespan([], 4), 0)
+
+    def test_from_time_table(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pred_paths = []
+            for index, nb_lines in enumerate([100, 1000]):
+                pred_paths.append(os.path.join(tmp_dir, f"{index}.pdb"))
+                with open(pred_paths[-1], "w") as f:
+                    f.write("ATOM\n" * nb_lines)
+            time_path = os.path.join(tmp_dir, "time.csv")
+            times = {"INF-ALL": [1.0, 10.0], "INF-WC": [1.0, 5.0], "CLASH": [0.1, 1.0]}
+            pd.DataFrame(times, index=["0.pdb", "1.pdb"]).to_csv(time_path)
+            names = {"INF": "ScoreINF", "CLASH": "ScoreClash"}
+            cost_model = CostModel.from_time_paths([time_path], pred_paths, names)
+            self.assertFalse(CostModel.from_time_paths([time_path]).has_metric("ScoreINF"))
+        self.assertAlmostEqual(cost_model.params["ScoreINF"][1], 1.0, places=1)
+        self.assertTrue(cost_model.has_metric("ScoreClash"))
+        self.assertEqual(get_metric("INF-WC", names), "ScoreINF")
+        self.assertIsNone(get_metric("RMSD", names))
@@ -0,0 +1,69 @@
+"""Class that tests the store of the structures in shared memory."""
+
+import os
+import unittest
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.score_abstract.score_abstract import ScoreAbstract
+from src.score_abstract.score_abstract_potential import read_pdb_atoms
+from src.structure_store import SharedScorer, StructureStore
+
+PDB_PATH = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class ScoreCentre(ScoreAbstract):
+    memory_support = True
+
+    def _compute(self, pred_path: str, native_path: str, *args, **kwargs) -> Tuple[Dict, Dict]:
+        scores, times = self.compute_atoms({pred_path: read_pdb_atoms(pred_path)}, None)
+        return scores[pred_path], times[pred_path]
+
+    def compute_atoms(
+        self, structures: Dict[str, Tuple], native: Optional[Tuple], *args, **kwargs
+    ) -> Tuple[Dict, Dict]:
+        scores = {
+            name: {"CENTRE": float(atoms[0].mean()), "PROCESS": os.getpid()}
+            for name, atoms in structures.items()
+        }
+        return scores, {name: {"CENTRE": 0.0, "PROCESS": 0.0} for name in structures}
+
+
+class TestStructureStore(unittest.TestCase):
+    def test_attach(self):
+        store = StructureStore()
+        atoms = read_pdb_atoms(PDB_PATH)
+        c_atoms, segment = store.add(PDB_PATH).attach()
+        np.testing.assert_array_equal(c_atoms[0], atoms[0])
+        np.testing.assert_array_equal(c_atoms[3], atoms[3])
+        self.assertEqual(c_atoms[1:3], atoms[1:3])
+        del c_atoms
+        segment.close()
+        store.close()
+
+    def test_references(self):
+        store = StructureStore()
+        structure = store.add(PDB_PATH)
+        self.assertIs(store.add(PDB_PATH), structure)
+        store.release(PDB_PATH)
+        self.assertEqual(store.get_nb_segments(), 1)
+        store.release(PDB_PATH)
+        self.assertEqual(store.get_nb_segments(), 0)
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=structure.segment_name)
+
+    def test_scorer(self):
+        scorer = SharedScorer(nb_workers=2)
+        paths = [PDB_PATH, os.path.join("tests", "data", "structure_2.pdb")]
+        try:
+            scores, _ = scorer.compute(ScoreCentre(), paths, PDB_PATH)
+        finally:
+            scorer.close()
+        expected, _ = ScoreCentre().compute(paths, PDB_PATH)
+        self.assertEqual(list(scores), paths)
+        for path in paths:
+            self.assertAlmostEqual(scores[path]["CENTRE"], expected[path]["CENTRE"])
+            self.assertNotEqual(scores[path]["PROCESS"], os.getpid())
+        self.assertEqual(scorer.store.get_nb_segments(), 0)
@@ -0,0 +1,67 @@
+"""Class that tests the runner of the external binaries."""
+
+import asyncio
+import threading
+import unittest
+
+from src.tool_runner import ToolRunner
+
+
+class TestToolRunner(unittest.TestCase):
+    def test_run_order(self):
+        runner = ToolRunner(max_processes=2)
+        commands = [["sh", "-c", f"sleep 0.0{5 - index}; echo {index}"] for index in range(5)]
+        results = runner.run(commands, "echo", lambda index, output: int(output))
+        self.assertEqual([output for output, _ in results], list(range(5)))
+
+    def test_running_loop(self):
+        # Called from an async host, like Jupyter
+        async def run_in_loop():
+            return ToolRunner().run([["echo", "1"]], "echo", lambda index, output: int(output))
+
+        results = asyncio.run(run_in_loop())
+        self.assertEqual(results[0][0], 1)
+
+    def test_max_processes(self):
+        runner = ToolRunner(max_processes=4)
+        runner.set_max_processes({"default": 3, "ost": 1})
+        self.assertEqual(runner.get_max_processes("ost"), 1)
+        self.assertEqual(runner.get_max_processes("DFIRE"), 3)
+
+    def test_missing_binary(self):
+        runner = ToolRunner()
+        results = runner.run([["not_a_binary_rnadvisor"]], "echo")
+        self.assertEqual(results[0][0], "")
+
+    def test_concurrency(self):
+        runner = ToolRunner(max_processes=8, max_cpus=8, max_memory="4G")
+        self.assertEqual(runner.get_concurrency("DFIRE", 1, 256), 8)
+        self.assertEqual(runner.get_concurrency("mcq4structures", 2, 1024, max_tasks=6), 4)
+        self.assertEqual(runner.get_concurrency("ost", 1, 8192), 1)
+        runner.set_max_processes({"default": 8, "mcq4structures": 2})
+        self.assertEqual(runner.get_concurrency("mcq4structures", 2, 1024, max_tasks=6), 2)
+
+    def test_resources(self):
+        runner = ToolRunner(max_processes=4, max_cpus=4, max_memory=1000)
+        commands = [["sh", "-c", "date +%s%N; sleep 0.1; date +%s%N"] for _ in range(4)]
+        results = runner.run(commands, "echo", memory=500)
+        intervals = sorted(tuple(map(int, output.split())) for output, _ in results)
+        running = [sum(start <= s < end for start, end in intervals) for s, _ in intervals]
+        self.assertLessEqual(max(running), 2)
+
+    def test_shared_slots(self):
+        runner = ToolRunner(max_processes=4)
+        runner.set_max_processes({"default": 4, "echo": 1})
+        command = ["sh", "-c", "date +%s%N; sleep 0.1; date +%s%N"]
+        outputs: list = []
+        threads = [
+            threading.Thread(target=lambda: outputs.extend(runner.run([command] * 2, "echo")))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        intervals = sorted(tuple(map(int, output.split())) for output, _ in outputs)
+        running = [sum(start <= s < end for start, end in intervals) for s, _ in intervals]
+        self.assertEqual((len(intervals), max(running)), (4, 1))
@@ -0,0 +1,73 @@
+"""Class that tests the parsing of the external binaries outputs."""
+
+import os
+import re
+import unittest
+
+import numpy as np
+
+from src.score_abstract.dfire.score_dfire import ScoreDfire
+from src.score_abstract.mcq4structures.score_mcq_lcs import ScoreMCQLCS
+from src.score_abstract.score_zhanggroup.tm_gdt_scores import GdtScores, ZhangOutputs
+from src.score_abstract.score_zhanggroup.tm_score_us import TMScoreUS
+from src.tools import ToolNotFoundError, find_field, resolve_binary
+
+TM_SCORE_OUTPUT = os.path.join("tests", "data", "tmscore_output.txt")
+
+
+class TestTools(unittest.TestCase):
+    def test_find_field(self):
+        output = "Header\nCoverage: 80.5%\nNumber of residues: 40\n"
+        self.assertEqual(find_field(output, re.compile("Coverage"), 1), "80.5%")
+        self.assertEqual(find_field(output, re.compile("residues"), -1), "40")
+        self.assertIsNone(find_field(output, re.compile("Missing"), 0))
+
+    def test_resolve_binary(self):
+        self.assertTrue(resolve_binary("sh").endswith("sh"))
+        with self.assertRaises(ToolNotFoundError):
+            resolve_binary("lib/not_a_binary_rnadvisor")
+
+    def test_parse_outputs(self):
+        gdt_output = (
+            "TM-score    = 0.5000\n"
+            "GDT-TS-score= 0.7500 %(d<1)=0.5000 %(d<2)=0.7500 %(d<4)=0.8750 %(d<8)=0.8750\n"
+        )
+        gdt_ts, gdt_ts_detailed = GdtScores.parse_zhanggroup_output(gdt_output)
+        self.assertEqual(gdt_ts, 0.75)
+        self.assertEqual(gdt_ts_detailed["GDT-TS@4"], 0.875)
+        zhang_scores = GdtScores().parse_output("TMscore", gdt_output, "", "")
+        self.assertEqual(zhang_scores["TM-score (TMscore)"], 0.5)
+        self.assertTrue(np.isnan(zhang_scores["GDT-HA"]))
+        # Full output of TMscore, with the header, the GDT-HA line and the rotation matrix
+        with open(TM_SCORE_OUTPUT, "r") as f:
+            zhang_scores = GdtScores().parse_output("TMscore", f.read(), "", "")
+        self.assertEqual(zhang_scores["TM-score (TMscore)"], 0.295)
+        self.assertEqual(zhang_scores["GDT-TS"], 0.3713)
+        self.assertEqual(zhang_scores["GDT-TS@8"], 0.604)
+        self.assertEqual(zhang_scores["GDT-HA"], 0.2401)
+        us_output = (
+            "TM-score= 0.40 (normalized by Chain_1)\nTM-score= 0.60 (normalized by Chain_2)"
+        )
+        self.assertEqual(TMScoreUS.parse_tm_score(us_output), 0.6)
+        lcs_output = "Coverage: 80.5%\nNumber of residues: 40"
+        self.assertEqual(ScoreMCQLCS.parse_mcq_lcs(lcs_output), (80.5, 40))
+        self.assertTrue(np.isnan(ScoreMCQLCS.parse_mcq_lcs("Coverage: 80.5%")[1]))
+        self.assertTrue(np.isnan(TMScoreUS.parse_tm_score("")))
+
+    def test_parse_dfire_batch(self):
+        pred_paths = ["dir/a.pdb", "dir/b.pdb", "dir/c.pdb"]
+        # `b.pdb` failed and the paths are printed in another form: no score is shifted
+        output = f"{os.path.abspath('dir/c.pdb')} -3.0\n./dir/a.pdb -1.0\n"
+        energies = ScoreDfire.parse_dfire_batch(output, pred_paths)
+        self.assertEqual((energies["dir/a.pdb"], energies["dir/c.pdb"]), (-1.0, -3.0))
+        self.assertTrue(np.isnan(energies["dir/b.pdb"]))
+        energies = ScoreDfire.parse_dfire_batch("-1.0\n-2.0\n", pred_paths[:2])
+        self.assertTrue(all(np.isnan(value) for value in energies.values()))
+
+    def test_zhang_outputs(self):
+        outputs = ZhangOutputs(max_size=2)
+        for index in range(3):
+            outputs.set(("TMscore", f"{index}.pdb"), {"GDT-TS": index})
+        self.assertEqual(len(outputs), 2)
+        self.assertEqual(outputs.get(("TMscore", "0.pdb")), {})
+        self.assertEqual(outputs.get(("TMscore", "2.pdb")), {"GDT-TS": 2})
@@ -0,0 +1,45 @@
+"""Class that tests the tracer of the run stages."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.tool_runner import ToolRunner
+from src.tracing import Tracer, TRACER
+from src.utils import time_it
+
+
+class TestTracing(unittest.TestCase):
+    def test_summary(self):
+        tracer = Tracer(keep_events=True)
+        for _ in range(3):
+            with tracer.span("compute", "RMSD", decoy="1.pdb"):
+                sum(range(1000))
+        tracer.add_span("subprocess", "DFIRE", 0, 2.0, child_cpu=1.5, child_max_rss=10)
+        summary = {stats["name"]: stats for stats in tracer.get_summary()}
+        self.assertEqual(summary["RMSD"]["count"], 3)
+        self.assertEqual(summary["DFIRE"]["child_cpu"], 1.5)
+        self.assertEqual(tracer.get_summary()[0]["name"], "DFIRE")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tracer.save_chrome_trace(os.path.join(tmp_dir, "trace.json"))
+            with open(os.path.join(tmp_dir, "trace.json")) as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual(len(events), 4)
+        self.assertEqual(events[0]["args"]["decoy"], "1.pdb")
+
+    def test_child_cpu(self):
+        TRACER.reset()
+        ToolRunner().run([["sh", "-c", "echo 1"]], "sh")
+        summary = {stats["stage"]: stats for stats in TRACER.get_summary()}
+        self.assertEqual(summary["subprocess"]["count"], 1)
+        self.assertGreater(summary["subprocess"]["child_max_rss"], 0)
+
+    def test_time_it(self):
+        @time_it
+        def compute():
+            return {"A": 1, "B": 2}
+
+        _, times = compute()
+        self.assertEqual(list(times.keys()), ["A", "B"])
+        self.assertEqual(times["A"], times["B"])
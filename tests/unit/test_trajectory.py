@@ -0,0 +1,52 @@
+"""Class that tests the reading of multi-model .pdb files as predictions."""
+
+import os
+import tempfile
+import unittest
+
+import mdtraj as md
+
+from src.trajectory import TrajectorySource
+
+STRUCT1 = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class TestTrajectorySource(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        traj = md.load(STRUCT1)
+        self.multi_model = os.path.join(self.tmp_dir.name, "models.pdb")
+        md.join([traj, traj, traj]).save_pdb(self.multi_model)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_is_trajectory(self):
+        self.assertFalse(TrajectorySource.is_trajectory(STRUCT1))
+        self.assertTrue(TrajectorySource.is_trajectory(self.multi_model))
+
+    def test_iter_chunks(self):
+        source = TrajectorySource(self.multi_model, chunk_size=2)
+        all_names = []
+        for names, chunk in source.iter_chunks():
+            self.assertEqual(len(names), chunk.n_frames)
+            all_names.extend(names)
+        self.assertEqual(all_names, ["frame_0", "frame_1", "frame_2"])
+
+    def test_get_frame_paths(self):
+        frames_dir = os.path.join(self.tmp_dir.name, "frames")
+        source = TrajectorySource(self.multi_model, frames_dir=frames_dir)
+        frame_paths = source.get_frame_paths()
+        self.assertEqual(len(frame_paths), 3)
+        self.assertTrue(all(os.path.exists(path) for path in frame_paths.values()))
+
+    def test_cleanup(self):
+        sources = [TrajectorySource(self.multi_model) for _ in range(2)]
+        frame_paths = [source.get_frame_paths() for source in sources]
+        # Each run writes its frames in its own directory
+        self.assertNotEqual(frame_paths[0]["frame_0"], frame_paths[1]["frame_0"])
+        for source, paths in zip(sources, frame_paths):
+            frames_dir = source.frames_dir
+            source.cleanup()
+            self.assertFalse(os.path.exists(frames_dir))
+            self.assertFalse(any(os.path.exists(path) for path in paths.values()))
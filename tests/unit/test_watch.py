@@ -0,0 +1,69 @@
+"""Class that tests the watcher of the directory of the predictions."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.watch import SENTINEL_NAME, DirectoryWatcher
+
+try:
+    from src.rnadvisor_cli import ScoreCLI
+except ImportError:
+    ScoreCLI = None
+
+PDB_PATH = os.path.join("tests", "data", "structure_1.pdb")
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.watcher = DirectoryWatcher(self.tmp_dir.name, debounce=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_poll(self):
+        path = os.path.join(self.tmp_dir.name, "a.pdb")
+        shutil.copy(PDB_PATH, path)
+        with open(os.path.join(self.tmp_dir.name, "a.txt"), "w") as f:
+            f.write("")
+        # A file is only given once it did not change between two polls
+        self.assertEqual(self.watcher.poll(), [])
+        self.assertEqual(self.watcher.poll(), [path])
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_mark_seen(self):
+        paths = [os.path.join(self.tmp_dir.name, name) for name in ["a.pdb", "b.pdb"]]
+        for path in paths:
+            shutil.copy(PDB_PATH, path)
+        self.watcher.poll()
+        self.watcher.mark_seen(paths[:1])
+        self.assertEqual(self.watcher.poll(), paths[1:])
+
+    def test_done(self):
+        self.assertFalse(self.watcher.is_done())
+        shutil.copy(PDB_PATH, os.path.join(self.tmp_dir.name, "a.pdb"))
+        with open(os.path.join(self.tmp_dir.name, SENTINEL_NAME), "w") as f:
+            f.write("")
+        self.watcher.poll()
+        self.assertFalse(self.watcher.is_done())
+        self.watcher.poll()
+        self.assertTrue(self.watcher.is_done())
+
+
+@unittest.skipIf(ScoreCLI is None, "ScoreCLI dependencies not installed")
+class TestWatchModes(unittest.TestCase):
+    def test_incompatible(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for options in [{"cascade": [{"SCORES": ["RMSD"]}]}, {"dedup": True}]:
+                for mode in ["watch", "pipeline"]:
+                    with self.assertRaises(ValueError):
+                        ScoreCLI(tmp_dir, PDB_PATH, time_budget=60, **{mode: True}, **options)
+        ScoreCLI._check_modes(False, False, True, True, None)
+        with self.assertRaises(ValueError):
+            ScoreCLI._check_modes(False, False, True, False, 60)
+        for cascade, time_budget in [(True, None), (False, 60)]:
+            with self.assertRaises(ValueError):
+                ScoreCLI._check_modes(False, False, cascade, False, time_budget, True)
+        ScoreCLI._check_modes(True, False, False, False, None, True)